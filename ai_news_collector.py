@@ -1,15 +1,29 @@
-import requests
-import feedparser
+import hashlib
 import json
-from datetime import datetime, timedelta
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 import time
-from dataclasses import dataclass
-import anthropic
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from dotenv import load_dotenv
 import os
+import signal
 import sys
-from email_handler import EmailHandler
+import threading
+from article_index import ArticleIndex
+from summary_cache import SummaryCache
+from rate_limiter import AdaptiveRateLimiter
+from batch_summarizer import BatchResult, BatchSummarizer
+from feed_scheduler import FeedScheduler, next_digest_time, parse_digest_times
+from keyword_matcher import KeywordMatcher
+from near_duplicates import IncrementalNearDuplicateIndex, NearDuplicateClusterer
+from profiles import NEWS_API_SOURCE, ProfileMatcher, TopicProfile, load_profiles
+from relevance_ranker import RelevanceRanker
+from metrics import RunMetrics
+from run_archive import RunArchive
+from run_checkpoint import RunCheckpoint
+from prompt_budget import estimate_tokens, pack_into_chunks, strip_markup, truncate_to_budget
 
 @dataclass
 class NewsItem:
@@ -18,6 +32,8 @@ class NewsItem:
     published: datetime
     content: str
     source: str
+    matched_keywords: List[str] = field(default_factory=list)
+    citations: List[Tuple[str, str]] = field(default_factory=list)  # 同一ニュースの他ソース (source, url)
 
 class AINewsCollector:
     # クラス定数
@@ -43,132 +59,301 @@ class AINewsCollector:
     
     CLAUDE_MODEL = "claude-opus-4-20250514"
     MAX_NEWS_ITEMS_FOR_SUMMARY = 20
-    NEWS_API_PAGE_SIZE = 20
-    NEWS_API_RATE_LIMIT_DELAY = 1  # seconds
+    NEWS_API_PAGE_SIZE = 100
+    NEWS_API_MAX_PAGES = 1
+    NEWS_API_REQUESTS_PER_MINUTE = 60
+    RSS_MAX_WORKERS = 16
+    RSS_CONNECT_TIMEOUT = 5  # seconds
+    RSS_READ_TIMEOUT = 15  # seconds
+    CACHE_DIR = ".cache"
+    ARCHIVE_PATH = "ai_news_archive.sqlite3"
+    TEST_ARCHIVE_PATH = os.path.join(CACHE_DIR, "test_archive.sqlite3")  # テストモードの結果は本番と分ける
+    PROMETHEUS_METRICS_PATH = "ai_news_metrics.prom"
+    CHECKPOINT_PATH = os.path.join(CACHE_DIR, "checkpoints.sqlite3")
+    TEST_CHECKPOINT_PATH = os.path.join(CACHE_DIR, "test_checkpoints.sqlite3")
+    OVERALL_SUMMARY_ERROR = "全体要約エラー"
+    ARTICLE_RETENTION_DAYS = 30
+    SUMMARY_ERROR_PREFIX = "要約エラー"
+    SUMMARY_PROMPT_VERSION = "4"  # 個別要約プロンプトを変更したら更新する
+    SUMMARY_CACHE_TTL_DAYS = 14
+    SUMMARY_CACHE_MAX_ENTRIES = 50000
+    SUMMARY_MAX_WORKERS = 8
+    CLAUDE_REQUESTS_PER_MINUTE = 50
+    CLAUDE_INPUT_TOKENS_PER_MINUTE = 40000
+    CLAUDE_MAX_RETRIES = 5
+    CLAUDE_RETRY_BASE_DELAY = 1  # seconds
+    CLAUDE_RETRY_MAX_DELAY = 60  # seconds
+    CLAUDE_RETRYABLE_STATUS = (429, 503, 529)  # レート制限・過負荷（送信レートも下げる）
+    BATCH_POLL_INTERVAL = 30  # seconds
+    BATCH_TIMEOUT = 3600  # seconds
+    NEAR_DUPLICATE_THRESHOLD = 0.5  # 推定Jaccard係数
+    ARTICLE_CONTENT_TOKEN_BUDGET = 600  # 1記事あたりの本文トークン上限
+    OVERALL_SUMMARY_TOKEN_BUDGET = 12000  # 全体要約に渡す個別要約の合計トークン上限
+    OVERALL_SUMMARY_MAX_ROUNDS = 3  # 中間要約（map-reduce）の最大段数
+    SUMMARY_TOP_K = 50  # 個別要約に回す記事数の上限（重要度順、Noneで無制限）
+    SUMMARY_TOKEN_BUDGET = None  # 個別要約の入力トークン合計の上限（Noneで無制限）
+    SOURCE_WEIGHTS: Dict[str, float] = {}  # ソース名ごとの重要度の重み（未指定は1.0）
+    RECENCY_HALF_LIFE_HOURS = 12  # 重要度の新しさの半減期
+    DAEMON_DIGEST_TIMES = "07:00"  # 常駐モードでダイジェストを作成する時刻（ローカル時刻、カンマ区切り）
+    DAEMON_MIN_POLL_INTERVAL = 5 * 60  # seconds
+    DAEMON_MAX_POLL_INTERVAL = 6 * 3600  # seconds
+    DAEMON_MAX_SLEEP = 60  # seconds（停止要求や時計の変更に追従するための待機の上限）
+    DAEMON_DIGEST_RETRY_INTERVAL = 15 * 60  # seconds（全体要約や配信に失敗したダイジェストを再開する間隔）
     
-    def __init__(self, anthropic_api_key: str, test_mode: bool = False):
+    def __init__(self, anthropic_api_key: str, test_mode: bool = False, batch_mode: bool = False,
+                 streaming: bool = False):
         self.test_mode = test_mode
+        self.batch_mode = batch_mode
+        self.streaming = streaming
+        # anthropic・requests・feedparser などの重い依存は、使う処理の中で初めて読み込む
+        self._anthropic_api_key = anthropic_api_key
+        self._client = None
+        self._batch_backend = None
+        self._feed_fetcher = None
         if not test_mode:
-            self.client = anthropic.Anthropic(api_key=anthropic_api_key)
+            self.article_index = ArticleIndex(
+                os.path.join(self.CACHE_DIR, "articles.sqlite3"),
+                retention_days=self.ARTICLE_RETENTION_DAYS
+            )
+            self.summary_cache = SummaryCache(
+                os.path.join(self.CACHE_DIR, "summaries.sqlite3"),
+                ttl_days=self.SUMMARY_CACHE_TTL_DAYS,
+                max_entries=self.SUMMARY_CACHE_MAX_ENTRIES
+            )
         else:
-            self.client = None
+            self.article_index = None
+            self.summary_cache = None
         
         # インスタンス変数
+        self.archive = RunArchive(self.TEST_ARCHIVE_PATH if test_mode else self.ARCHIVE_PATH)
+        self.checkpoint = RunCheckpoint(self.TEST_CHECKPOINT_PATH if test_mode else self.CHECKPOINT_PATH)
+        self.metrics = RunMetrics()
+        self.last_run_id: Optional[str] = None  # 最後に開始（再開）した run_daily_collection の実行ID
+        self.rate_limiter = AdaptiveRateLimiter(
+            self.CLAUDE_REQUESTS_PER_MINUTE,
+            self.CLAUDE_INPUT_TOKENS_PER_MINUTE
+        )
+        self.keyword_matcher = KeywordMatcher(self.AI_FILTER_KEYWORDS)
+        self.ranker = self._create_ranker(self.AI_FILTER_KEYWORDS)
+        self.near_duplicate_clusterer = NearDuplicateClusterer(threshold=self.NEAR_DUPLICATE_THRESHOLD)
         self.rss_feeds = self.DEFAULT_RSS_FEEDS.copy()
-        self.news_api_key = None  # NewsAPIのキーを設定
+        self.news_api_key = os.getenv("NEWS_API_KEY")  # 未設定ならNewsAPIは使わない
+        self.news_api_client = None
         self.github_url = "https://github.com/HayatoFunahashi/ai_news"
 
-    def _parse_date(self, entry) -> datetime:
-        """RSS entryから日付を解析"""
-        if hasattr(entry, 'published_parsed'):
-            return datetime(*entry.published_parsed[:6])
-        else:
-            return datetime.now()
+    @property
+    def client(self):
+        """Anthropicクライアント（テストモードではNone、初回アクセス時に生成）"""
+        if self._client is None and not self.test_mode:
+            import anthropic
+            # リトライはレートリミッターと連動させるため自前で行う
+            self._client = anthropic.Anthropic(api_key=self._anthropic_api_key, max_retries=0)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+        self._batch_backend = None
+
+    @property
+    def batch_backend(self):
+        if self._batch_backend is None and self.client is not None:
+            from batch_summarizer import AnthropicBatchBackend
+            self._batch_backend = AnthropicBatchBackend(self.client)
+        return self._batch_backend
+
+    @batch_backend.setter
+    def batch_backend(self, backend):
+        self._batch_backend = backend
+
+    @property
+    def feed_fetcher(self):
+        if self._feed_fetcher is None:
+            from feed_cache import FeedCache
+            from feed_fetcher import FeedFetcher
+            self._feed_fetcher = FeedFetcher(
+                max_workers=self.RSS_MAX_WORKERS,
+                connect_timeout=self.RSS_CONNECT_TIMEOUT,
+                read_timeout=self.RSS_READ_TIMEOUT,
+                cache=FeedCache(os.path.join(self.CACHE_DIR, "feeds"))
+            )
+        return self._feed_fetcher
+
+    @feed_fetcher.setter
+    def feed_fetcher(self, fetcher):
+        self._feed_fetcher = fetcher
+
+    @staticmethod
+    def _cutoff_time(hours_back: int) -> datetime:
+        """対象期間の締め切り（記事の公開日時と同じくUTCのnaive datetime）"""
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=hours_back)
 
     def _is_within_timeframe(self, pub_date: datetime, hours_back: int) -> bool:
         """指定された時間内かどうかをチェック"""
-        cutoff_time = datetime.now() - timedelta(hours=hours_back)
-        return pub_date > cutoff_time
+        return pub_date > self._cutoff_time(hours_back)
         
-    def collect_rss_news(self, hours_back: int = 24) -> List[NewsItem]:
-        """RSSフィードからニュースを収集"""
-        news_items = []
+    def _feed_to_news_items(self, result, hours_back: int) -> List[NewsItem]:
+        """取得済みフィードから対象期間内の記事を抽出（日付のない記事は除外）"""
+        self.metrics.record_feed(result.url, result.elapsed, result.bytes_downloaded,
+                                 result.ok, result.not_modified)
+        if not result.ok:
+            print(f"Error processing RSS feed {result.url}: {result.error}")
+            return []
         
-        for feed_url in self.rss_feeds:
-            try:
-                feed = feedparser.parse(feed_url)
+        news_items = []
+        feed = result.feed
+        undated = 0
+        try:
+            for entry in feed.entries:
+                if entry.published is None:
+                    undated += 1
+                    continue
                 
-                for entry in feed.entries:
-                    pub_date = self._parse_date(entry)
+                if self._is_within_timeframe(entry.published, hours_back):
+                    news_item = NewsItem(
+                        title=entry.title,
+                        url=entry.link,
+                        published=entry.published,
+                        content=strip_markup(entry.summary),
+                        source=feed.title
+                    )
+                    news_items.append(news_item)
                     
-                    if self._is_within_timeframe(pub_date, hours_back):
-                        content = entry.get('summary', entry.get('description', ''))
-                        
-                        news_item = NewsItem(
-                            title=entry.title,
-                            url=entry.link,
-                            published=pub_date,
-                            content=content,
-                            source=feed.feed.get('title', 'Unknown')
-                        )
-                        news_items.append(news_item)
-                        
-            except Exception as e:
-                print(f"Error processing RSS feed {feed_url}: {e}")
-                
+        except Exception as e:
+            print(f"Error processing RSS feed {result.url}: {e}")
+        if undated:
+            print(f"日付のない記事を除外しました: {result.url} ({undated}件)")
         return news_items
+        
+    def _print_feed_cache_stats(self):
+        cache_stats = self.feed_fetcher.cache.stats()
+        self.metrics.set_cache_stats('feed', cache_stats)
+        print(f"フィードキャッシュ: ヒット {cache_stats['hits']}件, ミス {cache_stats['misses']}件")
+
+    def collect_rss_by_feed(self, feeds: List[str], hours_back: int = 24) -> Dict[str, List[NewsItem]]:
+        """フィードURLごとに記事を収集（フィードごとに並列取得、同じURLは1回だけ取得）"""
+        news_by_feed = {}
+        with self.metrics.stage('collect_rss'):
+            for result in self.feed_fetcher.fetch_all(list(dict.fromkeys(feeds)), self._cutoff_time(hours_back)):
+                news_by_feed[result.url] = self._feed_to_news_items(result, hours_back)
+        self._print_feed_cache_stats()
+        return news_by_feed
+
+    def collect_rss_news(self, hours_back: int = 24) -> List[NewsItem]:
+        """RSSフィードからニュースを収集（フィードごとに並列取得）"""
+        news_by_feed = self.collect_rss_by_feed(self.rss_feeds, hours_back)
+        return [item for news_items in news_by_feed.values() for item in news_items]
     
-    def collect_news_api(self, hours_back: int = 24) -> List[NewsItem]:
-        """News APIからニュースを収集"""
+    def collect_news_api(self, hours_back: int = 24, keywords: Optional[List[str]] = None) -> List[NewsItem]:
+        """News APIからニュースを収集（キーワードをORクエリにまとめて取得、省略時は NEWS_API_KEYWORDS）"""
         if not self.news_api_key:
             return []
+        
+        if self.news_api_client is None or self.news_api_client.api_key != self.news_api_key:
+            from news_api_client import NewsAPIClient
+            self.news_api_client = NewsAPIClient(
+                self.news_api_key,
+                page_size=self.NEWS_API_PAGE_SIZE,
+                max_pages=self.NEWS_API_MAX_PAGES,
+                requests_per_minute=self.NEWS_API_REQUESTS_PER_MINUTE
+            )
             
         news_items = []
         
-        # AI関連のキーワード
-        keywords = self.NEWS_API_KEYWORDS
+        from_date = self._cutoff_time(hours_back).strftime('%Y-%m-%d')
         
-        from_date = (datetime.now() - timedelta(hours=hours_back)).strftime('%Y-%m-%d')
+        with self.metrics.stage('collect_news_api'):
+            articles = self.news_api_client.search_keywords(keywords or self.NEWS_API_KEYWORDS, from_date)
         
-        for keyword in keywords:
+        for article in articles:
             try:
-                url = f"https://newsapi.org/v2/everything"
-                params = {
-                    'q': keyword,
-                    'from': from_date,
-                    'sortBy': 'publishedAt',
-                    'language': 'en',
-                    'apiKey': self.news_api_key,
-                    'pageSize': self.NEWS_API_PAGE_SIZE
-                }
-                
-                response = requests.get(url, params=params)
-                data = response.json()
+                pub_date = datetime.fromisoformat(
+                    article['publishedAt'].replace('Z', '+00:00')
+                ).replace(tzinfo=None)
                 
-                for article in data.get('articles', []):
-                    pub_date = datetime.fromisoformat(
-                        article['publishedAt'].replace('Z', '+00:00')
-                    ).replace(tzinfo=None)
-                    
-                    news_item = NewsItem(
-                        title=article['title'],
-                        url=article['url'],
-                        published=pub_date,
-                        content=article.get('description', ''),
-                        source=article['source']['name']
-                    )
-                    news_items.append(news_item)
-                    
-                time.sleep(self.NEWS_API_RATE_LIMIT_DELAY)  # API制限対策
+                news_item = NewsItem(
+                    title=article['title'],
+                    url=article['url'],
+                    published=pub_date,
+                    content=strip_markup(article.get('description') or ''),
+                    source=article['source']['name']
+                )
+                news_items.append(news_item)
                 
             except Exception as e:
-                print(f"Error collecting news for keyword '{keyword}': {e}")
+                print(f"Error processing NewsAPI article {article.get('url')}: {e}")
                 
         return news_items
     
     def filter_and_deduplicate(self, news_items: List[NewsItem]) -> List[NewsItem]:
         """ニュースのフィルタリングと重複除去"""
-        # AI関連キーワードでフィルタリング
-        ai_keywords = self.AI_FILTER_KEYWORDS
-        
         filtered_items = []
         seen_titles = set()
         
         for item in news_items:
-            # AI関連かチェック
-            is_ai_related = any(
-                keyword.lower() in item.title.lower() or 
-                keyword.lower() in item.content.lower()
-                for keyword in ai_keywords
-            )
+            if item.title in seen_titles:
+                continue
             
-            if is_ai_related and item.title not in seen_titles:
+            # AI関連かチェック（タイトルと本文を1回ずつ走査）
+            matched = self.keyword_matcher.matched_keywords(item.title, item.content)
+            
+            if matched:
+                item.matched_keywords = matched
                 filtered_items.append(item)
                 seen_titles.add(item.title)
+        
+        # 別ソースから配信された同一ニュースをまとめる
+        filtered_items = self._merge_near_duplicates(filtered_items)
                 
         # 日付順でソート（新しい順）
         return sorted(filtered_items, key=lambda x: x.published, reverse=True)
     
+    def _merge_near_duplicates(self, news_items: List[NewsItem]) -> List[NewsItem]:
+        """近似重複をクラスタリングし、各クラスタの代表記事に他ソースを出典として残す"""
+        return [representative for representative, _ in self._near_duplicate_groups(news_items)]
+
+    def _near_duplicate_groups(self, news_items: List[NewsItem]) -> List[Tuple[NewsItem, List[int]]]:
+        """近似重複のクラスタごとに (代表記事, メンバーの添字) を返す"""
+        if len(news_items) < 2:
+            return [(item, [i]) for i, item in enumerate(news_items)]
+        
+        groups = self.near_duplicate_clusterer.cluster(
+            [f"{item.title}\n{item.content}" for item in news_items]
+        )
+        merged = []
+        for group in groups:
+            # 本文が最も長い記事を代表にする
+            members = [news_items[i] for i in group]
+            representative = max(members, key=lambda item: len(item.content))
+            for item in members:
+                if item is not representative:
+                    representative.citations.append((item.source, item.url))
+            merged.append((representative, group))
+        
+        if len(merged) < len(news_items):
+            print(f"近似重複の統合: {len(news_items)}件 → {len(merged)}件")
+        return merged
+
+    def _create_ranker(self, keywords: List[str]) -> RelevanceRanker:
+        return RelevanceRanker(keywords, self.SOURCE_WEIGHTS, self.RECENCY_HALF_LIFE_HOURS)
+
+    def _select_for_summary(self, news_items: List[NewsItem], ranker: Optional[RelevanceRanker] = None,
+                            top_k: Optional[int] = None) -> List[NewsItem]:
+        """重要度の高い記事を top_k 件（省略時 SUMMARY_TOP_K）・SUMMARY_TOKEN_BUDGET トークンまで選ぶ
+
+        選ばれなかった記事は処理済みにしないので、収集期間内であれば次回の実行で再び候補になる。
+        戻り値は日付順（新しい順）。
+        """
+        top_k = self.SUMMARY_TOP_K if top_k is None else top_k
+        with self.metrics.stage('rank'):
+            selected = (ranker or self.ranker).select(
+                news_items, top_k, self.SUMMARY_TOKEN_BUDGET,
+                cost=lambda item: self._estimate_input_tokens(self._single_summary_params(item))
+            )
+        if len(selected) < len(news_items):
+            print(f"重要度で選択: {len(news_items)}件 → {len(selected)}件")
+        return sorted(selected, key=lambda item: item.published, reverse=True)
+
     def load_test_data(self) -> tuple[List[NewsItem], str]:
         """テスト用データを読み込み"""
         try:
@@ -193,23 +378,13 @@ class AINewsCollector:
             print(f"テストデータの読み込みエラー: {e}")
             return [], "テストデータが利用できません。"
     
-    def _create_summary_prompt(self, news_items: List[NewsItem]) -> str:
-        """要約用のプロンプトを作成"""
-        news_text = "\n\n".join([
-            f"タイトル: {item.title}\n"
-            f"ソース: {item.source}\n"
-            f"内容: {item.content}\n"
-            f"URL: {item.url}"
-            for item in news_items[:self.MAX_NEWS_ITEMS_FOR_SUMMARY]
-        ])
-        
-        return f"""
-"あなたはAI関連の経済ニュースを分析するアナリストです。"
-"投資家が素早く判断できるよう、複数記事の要点を簡潔に、かつ出典を含めて整理してください。\n\n"        
-以下のAI関連ニュースを分析して、投資判断に役立つ要約を作成してください。
-それぞれの要約には【出典】としてニュースソースとURLも明示してください。
+    # 複数記事をまとめて要約する際の固定指示（プロンプトキャッシュ対象）
+    DIGEST_SUMMARY_INSTRUCTIONS = """
+あなたはAI関連の経済ニュースを分析するアナリストです。
+投資家が素早く判断できるよう、複数記事の要点を簡潔に、かつ出典を含めて整理してください。
 
-{news_text}
+ユーザーが渡すAI関連ニュースを分析して、投資判断に役立つ要約を作成してください。
+それぞれの要約には【出典】としてニュースソースとURLも明示してください。
 
 出力形式はマークダウン形式であり以下にしたがってください：
 
@@ -229,6 +404,102 @@ class AINewsCollector:
 わかりやすく、具体性のある日本語で簡潔に書いてください。
 """
 
+    def _create_summary_prompt(self, news_items: List[NewsItem]) -> str:
+        """要約用のプロンプト（記事部分）を作成"""
+        news_text = "\n\n".join([
+            f"タイトル: {item.title}\n"
+            f"ソース: {item.source}\n"
+            f"内容: {truncate_to_budget(item.content, self.ARTICLE_CONTENT_TOKEN_BUDGET)}\n"
+            f"URL: {item.url}"
+            for item in self.ranker.rank(news_items)[:self.MAX_NEWS_ITEMS_FOR_SUMMARY]
+        ])
+        
+        return f"以下のAI関連ニュースを分析してください。\n\n{news_text}"
+
+    @staticmethod
+    def _cached_system(instructions: str) -> List[dict]:
+        """固定指示をキャッシュ可能なsystemブロックとして返す"""
+        return [{
+            "type": "text",
+            "text": instructions.strip(),
+            "cache_control": {"type": "ephemeral"}
+        }]
+
+    @staticmethod
+    def _estimate_input_tokens(request: dict) -> int:
+        """入力トークン数の概算（system + messages）"""
+        system = request.get('system') or []
+        if isinstance(system, str):
+            system = [{"text": system}]
+        return (
+            sum(estimate_tokens(block.get('text', '')) for block in system) +
+            sum(estimate_tokens(str(message['content'])) for message in request.get('messages', []))
+        )
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """retry-afterヘッダーの秒数を取得（無ければ0）"""
+        response = getattr(error, 'response', None)
+        try:
+            return float(response.headers.get('retry-after', 0))
+        except (AttributeError, TypeError, ValueError):
+            return 0.0
+
+    def _retry_reason(self, error: Exception, anthropic) -> Optional[str]:
+        """再試行すべきエラーならその理由（ステータスコードなど）、そうでなければNone
+
+        SDKの再試行は無効にしているため、SDKが再試行していた接続エラー・タイムアウト・5xxもここで扱う。
+        """
+        if isinstance(error, anthropic.APIConnectionError):
+            return "タイムアウト" if isinstance(error, anthropic.APITimeoutError) else "接続エラー"
+        if isinstance(error, anthropic.APIStatusError) and (
+                error.status_code in self.CLAUDE_RETRYABLE_STATUS or error.status_code >= 500):
+            return str(error.status_code)
+        return None
+
+    def _create_message(self, call: str = "claude", **kwargs):
+        """レート制限内でClaude APIを呼び出し、一時的なエラーは指数バックオフで再試行
+        
+        429/過負荷は送信レートも下げる。接続エラー・タイムアウト・その他の5xxは待って再試行するだけ。
+        call は計測用の呼び出し種別（summarize_single_news など）。
+        """
+        estimated_tokens = self._estimate_input_tokens(kwargs)
+        for attempt in range(self.CLAUDE_MAX_RETRIES + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            start = time.monotonic()
+            try:
+                response = self.client.messages.create(**kwargs)
+            except Exception as e:
+                # anthropic が未読み込みならAPIエラーではない（読み込みを誘発しないよう sys.modules を見る）
+                anthropic = sys.modules.get('anthropic')
+                if anthropic is None or not isinstance(e, anthropic.APIError):
+                    raise
+                self.metrics.record_claude_call(call, time.monotonic() - start, error=True)
+                reason = self._retry_reason(e, anthropic)
+                if reason is None or attempt == self.CLAUDE_MAX_RETRIES:
+                    raise
+                retry_after = self._retry_after(e)
+                if isinstance(e, anthropic.APIStatusError) and e.status_code in self.CLAUDE_RETRYABLE_STATUS:
+                    self.rate_limiter.on_rate_limited(retry_after)
+                backoff = min(self.CLAUDE_RETRY_MAX_DELAY, self.CLAUDE_RETRY_BASE_DELAY * 2 ** attempt)
+                delay = max(retry_after, backoff * random.uniform(0.5, 1.0))
+                print(f"[RETRY] Claude API {reason}: {delay:.1f}秒後に再試行 ({attempt + 1}/{self.CLAUDE_MAX_RETRIES})")
+                time.sleep(delay)
+                continue
+            self.rate_limiter.on_success()
+            # トークン使用量（キャッシュ読み書きを含む）とレイテンシを記録
+            self.metrics.record_claude_call(call, time.monotonic() - start, getattr(response, 'usage', None))
+            return response
+
+    def _print_usage(self):
+        usage = self.metrics.claude_totals()
+        if not usage:
+            return
+        usage = {key: int(value) for key, value in usage.items() if key != 'latency_seconds'}
+        print(f"Claude API使用量: {usage['requests']}リクエスト, 入力 {usage['input_tokens']}, "
+              f"出力 {usage['output_tokens']}, キャッシュ書込 {usage['cache_creation_input_tokens']}, "
+              f"キャッシュ読込 {usage['cache_read_input_tokens']} トークン")
+
     def summarize_with_claude(self, news_items: List[NewsItem]) -> str:
         """Claudeを使ってニュースを要約（テストモード対応）"""
         if self.test_mode:
@@ -243,9 +514,11 @@ class AINewsCollector:
         prompt = self._create_summary_prompt(news_items)
         
         try:
-            message = self.client.messages.create(
+            message = self._create_message(
+                call="summarize_with_claude",
                 model=self.CLAUDE_MODEL,
                 max_tokens=1000,
+                system=self._cached_system(self.DIGEST_SUMMARY_INSTRUCTIONS),
                 messages=[{
                     "role": "user",
                     "content": prompt
@@ -259,110 +532,344 @@ class AINewsCollector:
             return "要約の生成中にエラーが発生しました。"
     
 
-    def _collect_all_news(self) -> List[NewsItem]:
-        """全ニュースソースから記事を収集"""
+    @staticmethod
+    def _news_item_to_dict(item: NewsItem) -> dict:
+        return {
+            'title': item.title,
+            'url': item.url,
+            'published': item.published.isoformat(),
+            'content': item.content,
+            'source': item.source,
+            'matched_keywords': item.matched_keywords,
+            'citations': [list(citation) for citation in item.citations]
+        }
+
+    @staticmethod
+    def _news_item_from_dict(data: dict) -> NewsItem:
+        return NewsItem(
+            title=data['title'],
+            url=data['url'],
+            published=datetime.fromisoformat(data['published']),
+            content=data['content'],
+            source=data['source'],
+            matched_keywords=data.get('matched_keywords', []),
+            citations=[tuple(citation) for citation in data.get('citations', [])]
+        )
+
+    def _checkpoint_items(self, run_id: Optional[str], stage: str, items: List[NewsItem]):
+        if run_id is not None:
+            self.checkpoint.complete(run_id, stage, [self._news_item_to_dict(item) for item in items])
+
+    def _load_checkpoint_items(self, run_id: Optional[str], stage: str) -> Optional[List[NewsItem]]:
+        """完了済みステージの記事一覧を復元（未完了ならNone）"""
+        if run_id is None or not self.checkpoint.is_done(run_id, stage):
+            return None
+        data = self.checkpoint.load(run_id, stage)
+        return None if data is None else [self._news_item_from_dict(item) for item in data]
+
+    def _collect_all_news(self, run_id: Optional[str] = None,
+                          collected: Optional[List[NewsItem]] = None) -> List[NewsItem]:
+        """全ニュースソースから記事を収集（run_id を渡すと収集・フィルタ結果をチェックポイントに保存）
+
+        collected を渡すと取得は行わず、その記事（常駐モードで巡回済みの記事）をフィルタする。
+        """
+        new_news = self._load_checkpoint_items(run_id, 'filtered')
+        if new_news is not None:
+            print(f"[RESUME] フィルタ済みの記事を再利用: {len(new_news)}件")
+            return new_news
+        
         if self.test_mode:
             print("[TEST MODE] テストデータを使用しています")
             filtered_news, _ = self.load_test_data()
             print(f"テストニュース数: {len(filtered_news)}")
+            self._checkpoint_items(run_id, 'filtered', filtered_news)
             return filtered_news
         else:
-            # 本番モード：実際のニュース収集
-            rss_news = self.collect_rss_news()
-            api_news = self.collect_news_api()
-            all_news = rss_news + api_news
+            all_news = self._load_checkpoint_items(run_id, 'collected')
+            if all_news is not None:
+                print(f"[RESUME] 収集済みの記事を再利用: {len(all_news)}件")
+            elif collected is not None:
+                all_news = collected
+                self._checkpoint_items(run_id, 'collected', all_news)
+            else:
+                # 本番モード：実際のニュース収集（RSSとNewsAPIを並行して取得）
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="collect") as executor:
+                    rss_future = executor.submit(self.collect_rss_news)
+                    api_future = executor.submit(self.collect_news_api)
+                    rss_news = rss_future.result()
+                    api_news = api_future.result()
+                all_news = rss_news + api_news
+                self._checkpoint_items(run_id, 'collected', all_news)
             
             print(f"収集したニュース数: {len(all_news)}")
             
             # フィルタリング・重複除去
-            filtered_news = self.filter_and_deduplicate(all_news)
+            with self.metrics.stage('filter_and_deduplicate'):
+                filtered_news = self.filter_and_deduplicate(all_news)
             print(f"フィルタリング後: {len(filtered_news)}")
-            return filtered_news
+            
+            # 過去の実行で処理済みの記事を除外
+            new_news = self.article_index.filter_new(filtered_news)
+            print(f"未処理の記事: {len(new_news)}")
+            self.metrics.set_count('collected', len(all_news))
+            self.metrics.set_count('filtered', len(filtered_news))
+            self.metrics.set_count('new', len(new_news))
 
-    def _save_results(self, filtered_news: List[NewsItem], summary: str) -> str:
-        """結果をファイルに保存"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # JSON形式で保存
-        json_data = {
-            'timestamp': timestamp,
-            'summary': summary,
-            'news_count': len(filtered_news),
-            'news_items': [
-                {
-                    'title': item.title,
-                    'url': item.url,
-                    'published': item.published.isoformat(),
-                    'source': item.source
-                }
-                for item in filtered_news
-            ]
-        }
-        
-        with open(f'ai_news_{timestamp}.json', 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
-        
-        # テキスト形式で保存
-        with open(f'ai_news_summary_{timestamp}.txt', 'w', encoding='utf-8') as f:
-            f.write(summary)
-        
-        print("ファイル保存完了")
-        return timestamp
+            # 重要度の高い記事だけを個別要約に回す
+            new_news = self._select_for_summary(new_news)
+            self.metrics.set_count('selected', len(new_news))
+            self._checkpoint_items(run_id, 'filtered', new_news)
+            return new_news
+
+    @staticmethod
+    def _new_run_id() -> str:
+        return datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
+
+    def _save_results(self, filtered_news: List[NewsItem], summary: str,
+                      individual_summaries: Optional[List[str]] = None, run_id: Optional[str] = None) -> str:
+        """結果（全体要約・記事本文・個別要約・メトリクス）をアーカイブに追記"""
+        run_id = run_id or self._new_run_id()
+        # 再開した実行では、前回アーカイブ済みなら追記しない
+        if self.archive.get_run(run_id) is None:
+            self.archive.save_run(
+                run_id,
+                summary,
+                filtered_news,
+                individual_summaries,
+                metrics=self.metrics.to_dict()
+            )
+        self._write_prometheus_metrics()
+        print(f"アーカイブ保存完了: {run_id} ({self.archive.db_path})")
+        return run_id
 
-    def summarize_single_news(self, item: NewsItem) -> str:
-        """Claudeで1記事を要約"""
-        prompt = f"""
-    以下のAI関連ニュースについて、要点を3行程度で簡潔にまとめてください。日本語で、出典とURLも明示してください。
+    def _write_prometheus_metrics(self):
+        try:
+            self.metrics.write(prometheus_path=self.PROMETHEUS_METRICS_PATH)
+        except Exception as e:
+            print(f"メトリクス保存エラー: {e}")
 
+    def _save_metrics(self, run_id: str):
+        """メール送信後などに実行メトリクスを更新"""
+        try:
+            self.archive.update_metrics(run_id, self.metrics.to_dict())
+        except Exception as e:
+            print(f"メトリクス保存エラー: {e}")
+        self._write_prometheus_metrics()
+
+    # 個別要約の固定指示（全記事で共通のためプロンプトキャッシュ対象）
+    # 注意: 現在の指示は100トークン程度で、APIがキャッシュできる最小長（CLAUDE_MODEL では1024トークン）に
+    # 届かないため、cache_control を付けても実際にはキャッシュされない（cache_*_input_tokens は0になる）。
+    # 指示を最小長以上に増やした場合は、変更なしでキャッシュが効く。
+    SINGLE_SUMMARY_INSTRUCTIONS = """
+ユーザーが渡すAI関連ニュースについて、要点を3行程度で簡潔にまとめてください。日本語で、出典とURLも明示してください。
+関連ソースが示されている場合は、それらも出典として併記してください。
+"""
+
+    def _create_single_summary_prompt(self, item: NewsItem) -> str:
+        """1記事要約用のプロンプト（記事ごとに変わる部分）を作成"""
+        related = ""
+        if item.citations:
+            related = "関連ソース: " + ", ".join(f"{source}（{url}）" for source, url in item.citations)
+        return f"""
     ---
     タイトル: {item.title}
     ソース: {item.source}
-    内容: {item.content}
+    内容: {truncate_to_budget(item.content, self.ARTICLE_CONTENT_TOKEN_BUDGET)}
     URL: {item.url}
+    {related}
     ---
     """
+
+    def _single_summary_params(self, item: NewsItem, instructions: Optional[str] = None) -> dict:
+        """1記事要約のリクエストパラメータ（同期・バッチ共通、instructions 省略時は既定の指示）"""
+        return {
+            "model": self.CLAUDE_MODEL,
+            "max_tokens": 500,
+            "system": self._cached_system(instructions or self.SINGLE_SUMMARY_INSTRUCTIONS),
+            "messages": [{
+                "role": "user",
+                "content": self._create_single_summary_prompt(item)
+            }]
+        }
+
+    def _summary_cache_key(self, item: NewsItem, instructions: Optional[str] = None) -> Optional[str]:
+        if self.summary_cache is None:
+            return None
+        prompt_version = self.SUMMARY_PROMPT_VERSION
+        if instructions is not None:
+            # プロファイル独自の指示はその内容ごとに別のキャッシュにする
+            prompt_version += ":" + hashlib.sha256(instructions.encode('utf-8')).hexdigest()[:16]
+        return SummaryCache.make_key(
+            self.CLAUDE_MODEL, prompt_version,
+            item.title, item.content, item.url
+        )
+
+    def summarize_single_news(self, item: NewsItem, use_cache: bool = True,
+                              instructions: Optional[str] = None) -> str:
+        """Claudeで1記事を要約（キャッシュ済みならAPIを呼ばない）"""
+        if self.test_mode:
+            # テストモード：APIを呼ばずに固定の要約を返す
+            return f"- タイトル: {item.title}\n- 出典: {item.source}（{item.url}）"
+        
+        cache_key = self._summary_cache_key(item, instructions)
+        if use_cache and cache_key is not None:
+            cached = self.summary_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            response = self.client.messages.create(
-                model=self.CLAUDE_MODEL,
-                max_tokens=500,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            return response.content[0].text.strip()
+            response = self._create_message(call="summarize_single_news",
+                                            **self._single_summary_params(item, instructions))
+            summary = response.content[0].text.strip()
         except Exception as e:
             print(f"[ERROR] 要約失敗: {item.title} : {e}")
-            return f"要約エラー: {item.title}"
+            return f"{self.SUMMARY_ERROR_PREFIX}: {item.title}"
+        
+        if cache_key is not None:
+            self.summary_cache.put(cache_key, summary)
+        return summary
+
+    def _map_parallel(self, func, items: list) -> List[str]:
+        """記事（または要約グループ）ごとの処理を並列に実行（結果は入力順）"""
+        if not items:
+            return []
+        workers = min(self.SUMMARY_MAX_WORKERS, len(items))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary") as executor:
+            return list(executor.map(func, items))
 
     def summarize_all_individually(self, news_items: List[NewsItem]) -> List[str]:
-        """すべてのニュースを個別に要約"""
-        return [self.summarize_single_news(item) for item in news_items]
+        """すべてのニュースを並列に個別要約（結果は入力順）"""
+        return self._map_parallel(self.summarize_single_news, news_items)
+
+    def summarize_all_in_batch(self, news_items: List[NewsItem], instructions: Optional[str] = None) -> List[str]:
+        """Message Batches APIで一括要約（失敗した記事は同期呼び出しで再要約）"""
+        summaries: List[Optional[str]] = [None] * len(news_items)
+        requests = []
+        for i, item in enumerate(news_items):
+            cache_key = self._summary_cache_key(item, instructions)
+            cached = self.summary_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                summaries[i] = cached
+            else:
+                requests.append({"custom_id": f"item-{i}", "params": self._single_summary_params(item, instructions)})
+        
+        try:
+            batch = BatchSummarizer(
+                self.batch_backend,
+                poll_interval=self.BATCH_POLL_INTERVAL,
+                timeout=self.BATCH_TIMEOUT
+            )
+            results = batch.run(requests)
+        except Exception as e:
+            print(f"[ERROR] バッチ要約失敗: {e}")
+            results = {}
+        
+        failed = []
+        for request in requests:
+            i = int(request["custom_id"].split("-")[1])
+            result = results.get(request["custom_id"]) or BatchResult()
+            # バッチの待ち時間は要求ごとに分けられないため、レイテンシは summarize_individual ステージで計測する
+            self.metrics.record_claude_call("summarize_batch", 0.0, result.usage, error=result.text is None)
+            text = result.text
+            if text is None:
+                failed.append(i)
+                continue
+            summaries[i] = text
+            cache_key = self._summary_cache_key(news_items[i], instructions)
+            if cache_key is not None:
+                self.summary_cache.put(cache_key, text)
+        
+        if failed:
+            print(f"▶ バッチで失敗した{len(failed)}件を個別に再要約...")
+            retried = self._map_parallel(
+                lambda item: self.summarize_single_news(item, use_cache=False, instructions=instructions),
+                [news_items[i] for i in failed]
+            )
+            for i, text in zip(failed, retried):
+                summaries[i] = text
+        return summaries
+
+    # 全体要約・中間要約の固定指示（プロンプトキャッシュ対象。SINGLE_SUMMARY_INSTRUCTIONS と同じく最小長未満のため現状はキャッシュされない）
+    OVERALL_SUMMARY_INSTRUCTIONS = """
+あなたはAIに詳しい投資アナリストです。
+ユーザーが渡すのは個別に要約されたAI関連ニュースです。この要約をもとに、全体の動向や注目すべきポイントを投資家向けに簡潔にまとめてください。
+動向やポイントがどのソースからの解釈なのかが理解できるように言及部分に出典も併記してください。
+
+出力形式は以下に従ってください：
+---
+- トレンド: ◯◯
+- 注目企業: ◯◯
+- 技術的ポイント: ◯◯
+- 投資判断へのヒント: ◯◯
+---
+"""
+    PARTIAL_SUMMARY_INSTRUCTIONS = """
+あなたはAIに詳しい投資アナリストです。
+ユーザーが渡すのはAI関連ニュースの個別要約の一部です。後で全体要約に統合するため、重要な動向・企業・技術を箇条書きに圧縮してください。
+各項目には出典（ソース名とURL）を必ず残してください。
+"""
 
-    def summarize_overall(self, individual_summaries: List[str]) -> str:
-        """全体要約をClaudeで生成"""
+    def _create_overall_prompt(self, individual_summaries: List[str]) -> str:
+        """全体要約用のプロンプト（個別要約部分）を作成"""
         combined_text = "\n\n".join(individual_summaries)
-        prompt = f"""
-    あなたはAIに詳しい投資アナリストです。
-    以下は個別に要約されたAI関連ニュースです。この要約をもとに、全体の動向や注目すべきポイントを投資家向けに簡潔にまとめてください。
-    動向やポイントがどのソースからの解釈なのかが理解できるように言及部分に出典も併記してください。
+        return f"以下が個別要約です：\n\n{combined_text}"
 
-    出力形式は以下に従ってください：
-    ---
-    - トレンド: ◯◯
-    - 注目企業: ◯◯
-    - 技術的ポイント: ◯◯
-    - 投資判断へのヒント: ◯◯
-    ---
+    def _create_partial_overall_prompt(self, individual_summaries: List[str]) -> str:
+        """中間要約（map段階）用のプロンプト（個別要約部分）を作成"""
+        combined_text = "\n\n".join(individual_summaries)
+        return f"以下が個別要約の一部です：\n\n{combined_text}"
 
-    以下が個別要約です：
+    def _summarize_chunk(self, chunk: List[str]) -> str:
+        """個別要約のグループを中間要約に圧縮（失敗時は切り詰めた原文を返す）"""
+        try:
+            response = self._create_message(
+                call="summarize_partial",
+                model=self.CLAUDE_MODEL,
+                max_tokens=1000,
+                system=self._cached_system(self.PARTIAL_SUMMARY_INSTRUCTIONS),
+                messages=[{
+                    "role": "user",
+                    "content": self._create_partial_overall_prompt(chunk)
+                }]
+            )
+            return response.content[0].text.strip()
+        except Exception as e:
+            print(f"[ERROR] 中間要約失敗: {e}")
+            return truncate_to_budget("\n\n".join(chunk), self.OVERALL_SUMMARY_TOKEN_BUDGET // len(chunk))
 
-    {combined_text}
-    """
+    def _reduce_summaries(self, individual_summaries: List[str]) -> List[str]:
+        """合計がトークン予算を超える場合、グループごとの中間要約で段階的に圧縮"""
+        summaries = individual_summaries
+        budget = self.OVERALL_SUMMARY_TOKEN_BUDGET
+        for _ in range(self.OVERALL_SUMMARY_MAX_ROUNDS):
+            if len(summaries) <= 1 or estimate_tokens("\n\n".join(summaries)) <= budget:
+                return summaries
+            chunks = pack_into_chunks(summaries, budget)
+            print(f"▶ 個別要約が多いため{len(chunks)}グループに分けて中間要約を生成...")
+            summaries = self._map_parallel(self._summarize_chunk, chunks)
+        
+        # それでも収まらない場合は各要約を均等に切り詰める
+        if estimate_tokens("\n\n".join(summaries)) > budget:
+            per_summary = max(1, budget // max(1, len(summaries)))
+            summaries = [truncate_to_budget(summary, per_summary) for summary in summaries]
+        return summaries
+
+    def summarize_overall(self, individual_summaries: List[str], instructions: Optional[str] = None) -> str:
+        """全体要約をClaudeで生成（入力が大きい場合はmap-reduceで圧縮してから統合）"""
+        if self.test_mode:
+            # テストモード：固定の要約を返す
+            _, test_summary = self.load_test_data()
+            print("[TEST MODE] 固定の要約を使用しています")
+            return test_summary
+        
+        summaries = self._reduce_summaries(individual_summaries)
+        prompt = self._create_overall_prompt(summaries)
         try:
-            response = self.client.messages.create(
+            response = self._create_message(
+                call="summarize_overall",
                 model=self.CLAUDE_MODEL,
                 max_tokens=1000,
+                system=self._cached_system(instructions or self.OVERALL_SUMMARY_INSTRUCTIONS),
                 messages=[{
                     "role": "user",
                     "content": prompt
@@ -371,42 +878,590 @@ class AINewsCollector:
             return response.content[0].text.strip()
         except Exception as e:
             print(f"[ERROR] 全体要約失敗: {e}")
-            return "全体要約エラー"
+            return self.OVERALL_SUMMARY_ERROR
+
+    def _mark_processed(self, news_items: List[NewsItem], individual_summaries: List[Optional[str]]):
+        """要約に成功した記事を処理済みとして記録（失敗した記事は次回再試行）"""
+        if self.article_index is None:
+            return
+        self.article_index.mark_processed(
+            item for item, summary in zip(news_items, individual_summaries)
+            if summary is not None and not summary.startswith(self.SUMMARY_ERROR_PREFIX)
+        )
+
+    def _print_summary_cache_stats(self):
+        if self.summary_cache is not None:
+            cache_stats = self.summary_cache.stats()
+            self.metrics.set_cache_stats('summary', cache_stats)
+            print(f"要約キャッシュ: ヒット {cache_stats['hits']}件, ミス {cache_stats['misses']}件 "
+                  f"(ヒット率 {cache_stats['hit_rate']:.0%})")
 
     def run_summarization_pipeline(self, news_items: List[NewsItem]) -> str:
         """個別要約→統合要約パイプライン"""
-        print(f"▶ 個別要約中... 記事数: {len(news_items)}")
-        individual_summaries = self.summarize_all_individually(news_items)
-        print(f"▶ 全体要約を生成中...")
-        overall_summary = self.summarize_overall(individual_summaries)
+        individual_summaries, overall_summary = self._summarize_news(news_items)
+        if overall_summary != self.OVERALL_SUMMARY_ERROR:
+            self._mark_processed(news_items, individual_summaries)
         return overall_summary
 
-    def run_daily_collection(self, recipient_emails: List[str] = None):
-        """日次のニュース収集・要約・配信"""
+    def _checkpoint_summary(self, run_id: Optional[str], item: NewsItem, summary: str):
+        """成功した個別要約だけをチェックポイントに記録（失敗した記事は再開時に再要約）"""
+        if run_id is not None and not summary.startswith(self.SUMMARY_ERROR_PREFIX):
+            self.checkpoint.save_summary(run_id, item.url, summary)
+
+    def _summarize_and_checkpoint(self, run_id: Optional[str], item: NewsItem) -> str:
+        summary = self.summarize_single_news(item)
+        self._checkpoint_summary(run_id, item, summary)
+        return summary
+
+    def _summarize_news(self, news_items: List[NewsItem], run_id: Optional[str] = None) -> Tuple[List[str], str]:
+        """個別要約と統合要約を生成し、両方を返す（run_id を渡すと要約済みの記事は再要約しない）"""
+        done = self.checkpoint.summaries(run_id) if run_id is not None else {}
+        individual_summaries: List[Optional[str]] = [done.get(item.url) for item in news_items]
+        pending = [i for i, summary in enumerate(individual_summaries) if summary is None]
+        if done:
+            print(f"[RESUME] 要約済みの記事を再利用: {len(news_items) - len(pending)}件")
+        
+        print(f"▶ 個別要約中... 記事数: {len(pending)}")
+        pending_items = [news_items[i] for i in pending]
+        with self.metrics.stage('summarize_individual'):
+            if self.batch_mode and not self.test_mode:
+                results = self.summarize_all_in_batch(pending_items)
+                for item, summary in zip(pending_items, results):
+                    self._checkpoint_summary(run_id, item, summary)
+            else:
+                results = self._map_parallel(lambda item: self._summarize_and_checkpoint(run_id, item), pending_items)
+        for i, summary in zip(pending, results):
+            individual_summaries[i] = summary
+        if run_id is not None:
+            self.checkpoint.complete(run_id, 'summarized')
+        self._print_summary_cache_stats()
+        print(f"▶ 全体要約を生成中...")
+        with self.metrics.stage('summarize_overall'):
+            overall_summary = self.summarize_overall(individual_summaries)
+        return individual_summaries, overall_summary
+
+    def _iter_collected_news(self, hours_back: int = 24) -> Iterator[NewsItem]:
+        """RSS（取得できたフィードから順に）とNewsAPIの記事を逐次返す"""
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="collect") as executor:
+            api_future = executor.submit(self.collect_news_api, hours_back)
+            for result in self.feed_fetcher.iter_fetch(self.rss_feeds, self._cutoff_time(hours_back)):
+                yield from self._feed_to_news_items(result, hours_back)
+            self._print_feed_cache_stats()
+            yield from api_future.result()
+
+    def run_streaming_pipeline(self, run_id: Optional[str] = None) -> Tuple[List[NewsItem], List[str], str]:
+        """収集と個別要約を重ねて実行し、全記事の要約が揃ってから全体要約を生成
+        
+        取得→解析→フィルタ→重複除去を記事単位で行い、残った記事はすぐに要約へ回す。
+        近似重複は先に届いた記事を代表とし、後から届いた記事は出典として追加する。
+        戻り値は (記事, 個別要約, 全体要約)。run_id を渡すと個別要約と記事一覧をチェックポイントに保存する。
+        """
+        done = self.checkpoint.summaries(run_id) if run_id is not None else {}
+        seen_titles = set()
+        near_duplicates = IncrementalNearDuplicateIndex(self.near_duplicate_clusterer)
+        representatives: List[NewsItem] = []
+        new_items: List[NewsItem] = []
+        futures = []
+        collected = 0
+        
+        # 収集と個別要約は重なって進むため、まとめて1つのステージとして計測
+        with self.metrics.stage('collect_and_summarize'), \
+                ThreadPoolExecutor(max_workers=self.SUMMARY_MAX_WORKERS, thread_name_prefix="summary") as executor:
+            for item in self._iter_collected_news():
+                collected += 1
+                if item.title in seen_titles:
+                    continue
+                matched = self.keyword_matcher.matched_keywords(item.title, item.content)
+                if not matched:
+                    continue
+                item.matched_keywords = matched
+                seen_titles.add(item.title)
+                
+                duplicate_of = near_duplicates.find_or_add(len(representatives), f"{item.title}\n{item.content}")
+                if duplicate_of is not None:
+                    representatives[duplicate_of].citations.append((item.source, item.url))
+                    continue
+                representatives.append(item)
+                
+                # 過去の実行で処理済みの記事は要約しない
+                if not self.article_index.filter_new([item]):
+                    continue
+                new_items.append(item)
+                if item.url in done:
+                    futures.append(executor.submit(done.get, item.url))
+                else:
+                    futures.append(executor.submit(self._summarize_and_checkpoint, run_id, item))
+            
+            print(f"収集したニュース数: {collected}")
+            print(f"フィルタリング後: {len(representatives)}")
+            print(f"未処理の記事: {len(new_items)}")
+            self.metrics.set_count('collected', collected)
+            self.metrics.set_count('filtered', len(representatives))
+            self.metrics.set_count('new', len(new_items))
+            print(f"▶ 残りの個別要約を待機中...")
+            
+            # 日付順（新しい順）に並べ替えて要約を回収
+            order = sorted(range(len(new_items)), key=lambda i: new_items[i].published, reverse=True)
+            news_items = [new_items[i] for i in order]
+            self._checkpoint_items(run_id, 'filtered', news_items)
+            individual_summaries = [futures[i].result() for i in order]
+        
+        if run_id is not None:
+            self.checkpoint.complete(run_id, 'summarized')
+        self._print_summary_cache_stats()
+        print(f"▶ 全体要約を生成中...")
+        with self.metrics.stage('summarize_overall'):
+            overall_summary = self.summarize_overall(individual_summaries)
+        return news_items, individual_summaries, overall_summary
+
+    def _start_run(self, resume_run_id: Optional[str] = None) -> Optional[str]:
+        """新しい実行を開始するか、中断した実行の再開位置を確認して実行IDを返す"""
+        if resume_run_id is None:
+            run_id = self._new_run_id()
+            self.checkpoint.start(run_id, {'batch_mode': self.batch_mode, 'streaming': self.streaming})
+            print(f"実行ID: {run_id}")
+            return run_id
+        
+        if resume_run_id == 'latest':
+            resume_run_id = self.checkpoint.latest_incomplete()
+            if resume_run_id is None:
+                print("再開できる実行がありません")
+                return None
+        stage = self.checkpoint.stage(resume_run_id)
+        if stage is None:
+            print(f"実行IDが見つかりません: {resume_run_id}")
+            return None
+        print(f"[RESUME] 実行ID {resume_run_id} を再開します（完了済みステージ: {stage}）")
+        return resume_run_id
+
+    def run_daily_collection(self, recipient_emails: List[str] = None, resume_run_id: Optional[str] = None,
+                             collected: Optional[List[NewsItem]] = None):
+        """日次のニュース収集・要約・配信
+        
+        各ステージの出力はチェックポイントに保存され、resume_run_id（または 'latest'）を渡すと
+        中断した実行を最後に完了したステージから再開する。collected を渡すと収集を省略する。
+        記事は全宛先への配信が済んでから処理済みにする（全体要約や配信に失敗した記事は次回も対象になる）。
+        """
         print(f"ニュース収集開始: {datetime.now()}")
+        self.metrics = RunMetrics()
+        run_id = self._start_run(resume_run_id)
+        self.last_run_id = run_id
+        if run_id is None:
+            return None
+        
+        if self.checkpoint.is_done(run_id, 'overall'):
+            # 全体要約まで完了済み：保存・配信だけを行う
+            filtered_news = self._load_checkpoint_items(run_id, 'filtered')
+            summaries = self.checkpoint.summaries(run_id)
+            individual_summaries = [summaries.get(item.url) for item in filtered_news]
+            summary = self.checkpoint.load(run_id, 'overall')
+        elif (self.streaming and not self.test_mode and not self.batch_mode and collected is None
+              and not self.checkpoint.is_done(run_id, 'filtered')):
+            # 収集しながら要約（ストリーミング）
+            filtered_news, individual_summaries, summary = self.run_streaming_pipeline(run_id)
+        else:
+            # ニュース収集
+            filtered_news = self._collect_all_news(run_id, collected)
+                 
+            # Claude で要約
+            # summary = self.summarize_with_claude(filtered_news)
+            individual_summaries, summary = self._summarize_news(filtered_news, run_id)
         
-        # ニュース収集
-        filtered_news = self._collect_all_news()
-             
-        # Claude で要約
-        # summary = self.summarize_with_claude(filtered_news)
-        summary = self.run_summarization_pipeline(filtered_news)
+        if summary == self.OVERALL_SUMMARY_ERROR:
+            # 全体要約に失敗した場合は保存・配信せず、再開できる状態で終了
+            print(f"全体要約に失敗したため中断しました。再開: python3 ai_news_collector.py --resume {run_id}")
+            return summary
+        if not self.checkpoint.is_done(run_id, 'overall'):
+            self.checkpoint.complete(run_id, 'overall', summary)
         
-        # 結果をファイルに保存
-        self._save_results(filtered_news, summary)
+        # 結果をアーカイブに保存
+        if not self.checkpoint.is_done(run_id, 'archived'):
+            self._save_results(filtered_news, summary, individual_summaries, run_id)
+            self.checkpoint.complete(run_id, 'archived')
+        if not self.test_mode:
+            self._print_usage()
         
-        # メール送信（設定されている場合）
-        if recipient_emails and len(recipient_emails) > 0:
+        # メール送信（設定されている場合）。再開時は送信済みの宛先を除く
+        delivered = set(self.checkpoint.delivered(run_id))
+        pending_recipients = [email for email in recipient_emails or [] if email not in delivered]
+        if delivered and recipient_emails:
+            print(f"[RESUME] 送信済みの宛先をスキップ: {len(recipient_emails) - len(pending_recipients)}件")
+        failed_recipients = []
+        if pending_recipients:
+            from email_handler import EmailHandler
             email_config = EmailHandler.get_email_config_from_env()
             email_handler = EmailHandler(email_config)
-            email_handler.send_email_summary(
-                summary, 
-                recipient_emails,
-                filtered_news
-            )
+            
+            def record_delivery(result):
+                if result.success:
+                    self.checkpoint.record_delivery(run_id, result.recipient)
+            
+            with self.metrics.stage('send_email'):
+                report = email_handler.send_email_summary(
+                    summary, 
+                    pending_recipients,
+                    filtered_news,
+                    on_result=record_delivery
+                )
+            if report is not None:
+                self.metrics.record_email(report.success_count, len(report.failed_recipients), report.elapsed)
+                failed_recipients = report.failed_recipients
+            # メール送信の計測値を含めてメトリクスを更新
+            self._save_metrics(run_id)
         
+        if failed_recipients:
+            print(f"送信に失敗した宛先があります。再送: python3 ai_news_collector.py --resume {run_id}")
+        else:
+            self._mark_processed(filtered_news, individual_summaries)
+            self.checkpoint.complete(run_id, 'delivered')
         return summary
 
+    def _poll_feeds(self, scheduler: FeedScheduler, urls: List[str], buffer: Dict[str, NewsItem],
+                    seen: Dict[str, datetime], hours_back: int):
+        """巡回時刻になったフィードを取得し、初めて見るAI関連の記事をバッファに追加
+
+        seen は対象期間内に一度でも見た記事（URL → 公開日時）。新着数と公開日時を
+        スケジューラに渡して、フィードごとの次回の巡回時刻を決める。
+        """
+        cutoff = self._cutoff_time(hours_back)
+        for url in [url for url, published in seen.items() if published <= cutoff]:
+            del seen[url]
+
+        new_count = 0
+        for result in self.feed_fetcher.fetch_all(urls, cutoff):
+            news_items = self._feed_to_news_items(result, hours_back)
+            if not result.ok:
+                scheduler.record_failure(result.url, time.time())
+                continue
+            new_items = [item for item in news_items if item.url not in seen]
+            for item in new_items:
+                seen[item.url] = item.published
+                if self.keyword_matcher.matches(item.title, item.content):
+                    buffer[item.url] = item
+            scheduler.record_success(result.url, time.time(), len(new_items),
+                                     [item.published for item in news_items])
+            new_count += len(new_items)
+        print(f"巡回: {len(urls)}フィード, 新着 {new_count}件, 蓄積 {len(buffer)}件")
+
+    def _run_digest(self, buffer: Dict[str, NewsItem], recipient_emails: Optional[List[str]], hours_back: int,
+                    resume_run_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """バッファの記事とNewsAPIの記事でダイジェストを作成・配信し、バッファを整理
+
+        配信まで済んだ記事（処理済みになった記事）と対象期間を過ぎた記事はバッファから除き、
+        重要度で選ばれなかった記事は次回の候補として残す。全体要約や配信に失敗した記事は
+        処理済みにならないためバッファに残る。resume_run_id を渡すと、失敗したダイジェストを
+        チェックポイントから再開する（送信済みの宛先には再送しない）。
+        戻り値は (全宛先への配信まで完了したか, 完了しなかった場合に再開する実行ID)。
+        """
+        self.last_run_id = None
+        try:
+            if resume_run_id is not None:
+                self.run_daily_collection(recipient_emails, resume_run_id=resume_run_id)
+            else:
+                cutoff = self._cutoff_time(hours_back)
+                # パイプラインが一致キーワードや出典を書き込むため、バッファの記事は複製して渡す
+                news_items = [replace(item, matched_keywords=[], citations=[])
+                              for item in buffer.values() if item.published > cutoff]
+                news_items += self.collect_news_api(hours_back)
+                self.run_daily_collection(recipient_emails, collected=news_items)
+        except Exception as e:
+            print(f"[ERROR] ダイジェストの作成に失敗: {e}")
+
+        cutoff = self._cutoff_time(hours_back)
+        remaining = self.article_index.filter_new([item for item in buffer.values() if item.published > cutoff])
+        print(f"ダイジェスト後のバッファ: {len(remaining)}件（次回に持ち越し）")
+        buffer.clear()
+        buffer.update((item.url, item) for item in remaining)
+        run_id = self.last_run_id or resume_run_id
+        if run_id is not None and self.checkpoint.is_done(run_id, 'delivered'):
+            return True, None
+        return False, run_id
+
+    def run_daemon(self, recipient_emails: List[str] = None, digest_times: Optional[str] = None,
+                   hours_back: int = 24, stop: Optional[threading.Event] = None,
+                   max_digests: Optional[int] = None) -> int:
+        """常駐モード：フィードをそれぞれの更新頻度に合わせて巡回し、指定時刻にダイジェストを配信
+
+        プロセス・HTTP接続・各キャッシュを保ったまま動作し、新着記事は巡回のたびにバッファへ溜める。
+        全体要約や配信に失敗したダイジェストは、次の指定時刻まで DAEMON_DIGEST_RETRY_INTERVAL ごとに
+        チェックポイントから再開する。stop がセットされるか max_digests 回配信すると終了し、配信した回数を返す。
+        """
+        stop = stop or threading.Event()
+        times = parse_digest_times(digest_times or self.DAEMON_DIGEST_TIMES)
+        scheduler = FeedScheduler(self.rss_feeds, time.time(),
+                                  self.DAEMON_MIN_POLL_INTERVAL, self.DAEMON_MAX_POLL_INTERVAL)
+        buffer: Dict[str, NewsItem] = {}
+        seen: Dict[str, datetime] = {}
+        scheduled_digest = next_digest_time(times, datetime.now())
+        next_digest = scheduled_digest
+        print(f"常駐モード開始: フィード {len(scheduler.schedules)}件, 次回のダイジェスト {next_digest}")
+
+        digests = 0
+        # 配信まで完了しなかったダイジェストの実行ID（実行が始まる前に失敗した場合はNoneでバッファから作り直す）
+        failed_run: Optional[str] = None
+        while not stop.is_set():
+            due = scheduler.due(time.time())
+            if due:
+                try:
+                    self._poll_feeds(scheduler, due, buffer, seen, hours_back)
+                except Exception as e:
+                    print(f"[ERROR] フィードの巡回に失敗: {e}")
+            now = datetime.now()
+            if now >= next_digest:
+                # 指定時刻になったら失敗したダイジェストは諦め、未処理の記事を含めて新しく作成する
+                scheduled = now >= scheduled_digest
+                delivered, failed_run = self._run_digest(buffer, recipient_emails, hours_back,
+                                                         None if scheduled else failed_run)
+                if delivered:
+                    digests += 1
+                    if max_digests is not None and digests >= max_digests:
+                        break
+                if scheduled:
+                    scheduled_digest = next_digest_time(times, datetime.now())
+                next_digest = scheduled_digest
+                if delivered:
+                    print(f"次回のダイジェスト: {next_digest}")
+                else:
+                    next_digest = min(scheduled_digest,
+                                      datetime.now() + timedelta(seconds=self.DAEMON_DIGEST_RETRY_INTERVAL))
+                    print(f"ダイジェストの配信が完了しませんでした。再試行: {next_digest}")
+
+            next_poll = scheduler.next_poll_time()
+            wait = min(self.DAEMON_MAX_SLEEP, (next_digest - datetime.now()).total_seconds())
+            if next_poll is not None:
+                wait = min(wait, next_poll - time.time())
+            stop.wait(max(0.0, wait))
+        print(f"常駐モード終了: ダイジェスト {digests}回")
+        return digests
+
+    def _collect_for_profiles(self, profiles: List[TopicProfile],
+                              hours_back: int = 24) -> List[Tuple[Optional[str], List[NewsItem]]]:
+        """全プロファイルのフィードとNewsAPIキーワードの和集合を1回ずつ取得し、(取得元, 記事) を返す"""
+        if self.test_mode:
+            print("[TEST MODE] テストデータを使用しています")
+            test_items, _ = self.load_test_data()
+            return [(None, test_items)]
+
+        feeds = [url for profile in profiles for url in profile.feeds]
+        keywords = list(dict.fromkeys(keyword for profile in profiles for keyword in profile.news_api_keywords))
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="collect") as executor:
+            api_future = executor.submit(self.collect_news_api, hours_back, keywords) if keywords else None
+            sources = list(self.collect_rss_by_feed(feeds, hours_back).items())
+            if api_future is not None:
+                sources.append((NEWS_API_SOURCE, api_future.result()))
+        return sources
+
+    def _filter_for_profiles(self, sources: List[Tuple[Optional[str], List[NewsItem]]],
+                             matcher: ProfileMatcher) -> List[Tuple[NewsItem, Dict[str, List[str]]]]:
+        """全プロファイルのフィルタを1回の走査で評価し、重複除去した記事と対象プロファイルを返す
+
+        戻り値は (記事, {プロファイル名: 一致キーワード}) の日付順（新しい順）のリスト。
+        同じタイトルや近似重複の記事は1件にまとめ、対象プロファイルは統合する。
+        """
+        candidates: List[NewsItem] = []
+        memberships: List[Dict[str, List[str]]] = []
+        title_index: Dict[str, int] = {}
+        for source, news_items in sources:
+            for item in news_items:
+                matches = matcher.match(source, item.title, item.content)
+                if not matches:
+                    continue
+                if item.title in title_index:
+                    # 別フィードの同じ記事：対象プロファイルだけを追加
+                    self._merge_memberships(memberships[title_index[item.title]], matches)
+                    continue
+                title_index[item.title] = len(candidates)
+                candidates.append(item)
+                memberships.append(matches)
+
+        merged = []
+        for representative, group in self._near_duplicate_groups(candidates):
+            combined: Dict[str, List[str]] = {}
+            for i in group:
+                self._merge_memberships(combined, memberships[i])
+            representative.matched_keywords = list(dict.fromkeys(
+                keyword for keywords in combined.values() for keyword in keywords
+            ))
+            merged.append((representative, combined))
+        return sorted(merged, key=lambda pair: pair[0].published, reverse=True)
+
+    @staticmethod
+    def _merge_memberships(target: Dict[str, List[str]], matches: Dict[str, List[str]]):
+        for name, keywords in matches.items():
+            existing = target.setdefault(name, [])
+            existing.extend(keyword for keyword in keywords if keyword not in existing)
+
+    def _select_for_profiles(self, profiles: List[TopicProfile],
+                             filtered: List[Tuple[NewsItem, Dict[str, List[str]]]]
+                             ) -> List[Tuple[NewsItem, Dict[str, List[str]]]]:
+        """プロファイルごとに、そのプロファイルのキーワードでの重要度が高い記事だけを残す
+
+        どのプロファイルにも選ばれなかった記事は除外する（日付順は保つ）。
+        """
+        selected: Dict[int, Set[str]] = {}
+        for profile in profiles:
+            items = [item for item, matches in filtered if profile.name in matches]
+            kept = self._select_for_summary(items, self._create_ranker(profile.filter_keywords), profile.top_k)
+            for item in kept:
+                selected.setdefault(id(item), set()).add(profile.name)
+        return [
+            (item, {name: keywords for name, keywords in matches.items() if name in selected[id(item)]})
+            for item, matches in filtered if id(item) in selected
+        ]
+
+    def _summarize_for_profiles(self, profiles: List[TopicProfile], news_items: List[NewsItem],
+                                memberships: List[Dict[str, List[str]]]) -> Dict[Optional[str], Dict[str, str]]:
+        """記事×個別要約プロンプトの組み合わせごとに1回だけ要約し、{プロンプト: {URL: 要約}} を返す
+
+        同じプロンプトを使うプロファイル同士は要約を共有する（Noneは既定のプロンプト）。
+        """
+        profile_by_name = {profile.name: profile for profile in profiles}
+        by_prompt: Dict[Optional[str], List[NewsItem]] = {}
+        for item, matches in zip(news_items, memberships):
+            for instructions in dict.fromkeys(profile_by_name[name].summary_instructions for name in matches):
+                by_prompt.setdefault(instructions, []).append(item)
+
+        pairs = [(instructions, item) for instructions, items in by_prompt.items() for item in items]
+        print(f"▶ 個別要約中... 記事数: {len(news_items)}, プロンプト数: {len(by_prompt)}, 要約数: {len(pairs)}")
+        with self.metrics.stage('summarize_individual'):
+            if self.batch_mode and not self.test_mode:
+                results = [
+                    summary
+                    for instructions, items in by_prompt.items()
+                    for summary in self.summarize_all_in_batch(items, instructions)
+                ]
+            else:
+                results = self._map_parallel(
+                    lambda pair: self.summarize_single_news(pair[1], instructions=pair[0]), pairs
+                )
+
+        summaries: Dict[Optional[str], Dict[str, str]] = {instructions: {} for instructions in by_prompt}
+        for (instructions, item), summary in zip(pairs, results):
+            summaries[instructions][item.url] = summary
+        self.metrics.set_count('summaries', len(pairs))
+        return summaries
+
+    def run_profile_collection(self, profiles: List[TopicProfile]) -> Dict[str, str]:
+        """複数のトピックプロファイルの収集・要約・配信を1回の実行で行う
+
+        フィードの取得・解析、フィルタ、重複除去、処理済み判定は全プロファイルで1回ずつ行い、
+        個別要約は同じプロンプトのプロファイル間で共有する。プロファイルごとに行うのは
+        全体要約・アーカイブへの保存・メール送信だけ。戻り値は {プロファイル名: 全体要約}。
+        """
+        print(f"ニュース収集開始: {datetime.now()} （プロファイル: {', '.join(p.name for p in profiles)}）")
+        self.metrics = RunMetrics()
+        run_id = self._new_run_id()
+        profiles = [replace(profile, feeds=profile.feeds or self.rss_feeds) for profile in profiles]
+        matcher = ProfileMatcher(profiles)
+
+        sources = self._collect_for_profiles(profiles)
+        collected = sum(len(news_items) for _, news_items in sources)
+        print(f"収集したニュース数: {collected}")
+        with self.metrics.stage('filter_and_deduplicate'):
+            filtered = self._filter_for_profiles(sources, matcher)
+        print(f"フィルタリング後: {len(filtered)}")
+        self.metrics.set_count('filtered', len(filtered))
+
+        # 過去の実行で処理済みの記事を除外
+        if self.article_index is not None:
+            new_items = {id(item) for item in self.article_index.filter_new([item for item, _ in filtered])}
+            filtered = [(item, matches) for item, matches in filtered if id(item) in new_items]
+        print(f"未処理の記事: {len(filtered)}")
+        self.metrics.set_count('collected', collected)
+        self.metrics.set_count('new', len(filtered))
+
+        filtered = self._select_for_profiles(profiles, filtered)
+        self.metrics.set_count('selected', len(filtered))
+
+        news_items = [item for item, _ in filtered]
+        memberships = [matches for _, matches in filtered]
+        summaries = self._summarize_for_profiles(profiles, news_items, memberships)
+        self._print_summary_cache_stats()
+
+        # プロファイルごとの記事（一致キーワードはプロファイルのものに差し替え）と個別要約
+        profile_items: Dict[str, List[NewsItem]] = {profile.name: [] for profile in profiles}
+        for item, matches in filtered:
+            for name, keywords in matches.items():
+                profile_items[name].append(replace(item, matched_keywords=keywords))
+        for profile in profiles:
+            self.metrics.set_count(f"profile:{profile.name}", len(profile_items[profile.name]))
+
+        def overall(profile: TopicProfile) -> str:
+            items = profile_items[profile.name]
+            if not items:
+                return f"今日は{profile.title or profile.name}の新しいニュースはありませんでした。"
+            prompt_summaries = summaries[profile.summary_instructions]
+            return self.summarize_overall([prompt_summaries[item.url] for item in items],
+                                          profile.overall_instructions)
+
+        print(f"▶ 全体要約を生成中... プロファイル数: {len(profiles)}")
+        with self.metrics.stage('summarize_overall'):
+            overall_summaries = dict(zip((profile.name for profile in profiles),
+                                         self._map_parallel(overall, profiles)))
+
+        # 全体要約に失敗したプロファイルは保存せず、その記事も処理済みにしない（次回再試行）
+        failed_profiles = {name for name, summary in overall_summaries.items() if summary == self.OVERALL_SUMMARY_ERROR}
+        if failed_profiles:
+            print(f"全体要約に失敗したプロファイル: {', '.join(sorted(failed_profiles))}（次回再試行します）")
+        for profile in profiles:
+            if profile.name in failed_profiles:
+                continue
+            items = profile_items[profile.name]
+            self._save_results(items, overall_summaries[profile.name],
+                               [summaries[profile.summary_instructions][item.url] for item in items],
+                               f"{run_id}_{profile.name}")
+        if not self.test_mode:
+            self._print_usage()
+            undelivered = self._send_profile_emails(profiles, profile_items, overall_summaries, run_id)
+            if undelivered:
+                print(f"送信に失敗した宛先があるプロファイル: {', '.join(sorted(undelivered))}（記事は次回再試行します）")
+            failed_profiles |= undelivered
+
+        # 対象プロファイルのすべてで個別要約・全体要約・配信に成功した記事だけを処理済みにする
+        # （プロファイル実行は再開できないため、失敗したプロファイルの記事は次回の実行で再び対象にする）
+        profile_by_name = {profile.name: profile for profile in profiles}
+        if self.article_index is not None:
+            self.article_index.mark_processed(
+                item for item, matches in filtered
+                if not failed_profiles.intersection(matches)
+                and not any(summaries[profile_by_name[name].summary_instructions][item.url]
+                            .startswith(self.SUMMARY_ERROR_PREFIX) for name in matches)
+            )
+        return overall_summaries
+
+    def _send_profile_emails(self, profiles: List[TopicProfile], profile_items: Dict[str, List[NewsItem]],
+                             overall_summaries: Dict[str, str], run_id: str) -> Set[str]:
+        """プロファイルごとの宛先に、そのプロファイルの要約を送信し、送信に失敗した宛先があるプロファイル名を返す"""
+        targets = [profile for profile in profiles if profile.recipients]
+        if not targets:
+            return set()
+        from email_handler import EmailHandler
+        email_handler = EmailHandler(EmailHandler.get_email_config_from_env())
+        sent = failed = 0
+        elapsed = 0.0
+        undelivered = set()
+        with self.metrics.stage('send_email'):
+            for profile in targets:
+                if overall_summaries[profile.name] == self.OVERALL_SUMMARY_ERROR:
+                    print(f"全体要約に失敗したため送信しません: {profile.name}")
+                    continue
+                report = email_handler.send_email_summary(
+                    overall_summaries[profile.name],
+                    profile.recipients,
+                    profile_items[profile.name],
+                    title=profile.title
+                )
+                if report is not None:
+                    sent += report.success_count
+                    failed += len(report.failed_recipients)
+                    elapsed += report.elapsed
+                    if report.failed_recipients:
+                        undelivered.add(profile.name)
+        self.metrics.record_email(sent, failed, elapsed)
+        for profile in profiles:
+            self._save_metrics(f"{run_id}_{profile.name}")
+        return undelivered
+
 
 
 # 使用例
@@ -415,6 +1470,10 @@ def main():
     
     # テストモードの判定（環境変数またはコマンドライン引数）
     test_mode = os.getenv("TEST_MODE", "false").lower() == "true" or "--test" in sys.argv
+    # バッチモード（Message Batches APIで個別要約を一括処理）
+    batch_mode = os.getenv("BATCH_MODE", "false").lower() == "true" or "--batch" in sys.argv
+    # ストリーミングモード（収集と個別要約を並行して実行）
+    streaming = os.getenv("STREAMING", "false").lower() == "true" or "--stream" in sys.argv
     
     if test_mode:
         print("=== テストモードで実行中 ===")
@@ -425,19 +1484,63 @@ def main():
         if not ANTHROPIC_API_KEY:
             print("エラー: ANTHROPIC_API_KEYが設定されていません")
             return
-        collector = AINewsCollector(ANTHROPIC_API_KEY, test_mode=False)
-    
+        collector = AINewsCollector(ANTHROPIC_API_KEY, test_mode=False, batch_mode=batch_mode,
+                                    streaming=streaming)
+
+    # トピックプロファイル（--profiles <path> または PROFILES_PATH）。宛先は各プロファイルの設定を使う
+    profiles_path = os.getenv("PROFILES_PATH")
+    if "--profiles" in sys.argv:
+        index = sys.argv.index("--profiles") + 1
+        profiles_path = sys.argv[index] if index < len(sys.argv) else None
+    if profiles_path:
+        if "--resume" in sys.argv or "--daemon" in sys.argv:
+            print("エラー: --resume と --daemon はプロファイル実行では使用できません")
+            return
+        profiles = load_profiles(profiles_path)
+        summaries = collector.run_profile_collection(profiles)
+        for profile in profiles:
+            print(f"\n=== {profile.title or profile.name} ===")
+            print(summaries[profile.name])
+        return
+
     # メールアドレスの取得・パース（テストモードでは無効）
     recipient_emails = None
     if not test_mode:
         # RECIPIENT_EMAILS (複数対応) または RECIPIENT_EMAIL (後方互換性) から取得
         email_env = os.getenv('RECIPIENT_EMAILS') or os.getenv('RECIPIENT_EMAIL')
+        from email_handler import EmailHandler
         recipient_emails = EmailHandler.parse_recipient_emails(email_env)
         if recipient_emails:
             print(f"メール送信対象: {len(recipient_emails)}件 - {', '.join(recipient_emails)}")
     
+    # 常駐モード（--daemon）。ダイジェスト時刻は --digest-at 07:00,19:00 または DIGEST_TIMES
+    if "--daemon" in sys.argv:
+        if test_mode or "--resume" in sys.argv:
+            print("エラー: --daemon はテストモード・--resume と同時には使用できません")
+            return
+        digest_times = os.getenv("DIGEST_TIMES")
+        if "--digest-at" in sys.argv:
+            index = sys.argv.index("--digest-at") + 1
+            digest_times = sys.argv[index] if index < len(sys.argv) else None
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        try:
+            collector.run_daemon(recipient_emails, digest_times, stop=stop)
+        except KeyboardInterrupt:
+            print("常駐モードを停止しました")
+        return
+
+    # 中断した実行の再開（--resume <run-id>、IDを省略すると最新の未完了の実行）
+    resume_run_id = None
+    if "--resume" in sys.argv:
+        index = sys.argv.index("--resume") + 1
+        has_id = index < len(sys.argv) and not sys.argv[index].startswith("--")
+        resume_run_id = sys.argv[index] if has_id else "latest"
+    
     # ニュース収集・要約実行
-    summary = collector.run_daily_collection(recipient_emails)
+    summary = collector.run_daily_collection(recipient_emails, resume_run_id)
+    if summary is None:
+        return
     
     print("\n=== 今日のAIニュース要約 ===")
     print(summary)
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+class ArticleIndex:
+    """処理済み記事の永続インデックス（正規化URLとコンテンツハッシュで判定）"""
+
+    DEFAULT_RETENTION_DAYS = 30
+    TRACKING_PARAM_PREFIXES = ('utm_', 'mc_')
+    TRACKING_PARAMS = {'fbclid', 'gclid', 'ref'}
+    SQLITE_MAX_VARIABLES = 500
+
+    def __init__(self, db_path: str, retention_days: int = DEFAULT_RETENTION_DAYS):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen_articles (
+                url_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                title TEXT,
+                first_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_seen_content_hash ON seen_articles(content_hash);
+            CREATE INDEX IF NOT EXISTS idx_seen_first_seen ON seen_articles(first_seen);
+        """)
+        self.prune()
+
+    @classmethod
+    def normalize_url(cls, url: str) -> str:
+        """スキーム・ホストの小文字化、フラグメントとトラッキング用パラメータの除去"""
+        parts = urlsplit((url or '').strip())
+        query = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith(cls.TRACKING_PARAM_PREFIXES)
+            and key.lower() not in cls.TRACKING_PARAMS
+        ]
+        path = parts.path.rstrip('/') or '/'
+        return urlunsplit((
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            path,
+            urlencode(sorted(query)),
+            ''
+        ))
+
+    @staticmethod
+    def content_hash(title: str, content: str) -> str:
+        """空白と大文字小文字の揺れを吸収したタイトル＋本文のハッシュ"""
+        normalized = ' '.join(f"{title}\n{content}".lower().split())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _keys(self, item) -> Tuple[str, str]:
+        return self.normalize_url(item.url), self.content_hash(item.title, item.content)
+
+    def _existing(self, column: str, values: List[str]) -> Set[str]:
+        """指定カラムに既に存在する値をまとめて検索"""
+        found = set()
+        for i in range(0, len(values), self.SQLITE_MAX_VARIABLES):
+            chunk = values[i:i + self.SQLITE_MAX_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT {column} FROM seen_articles WHERE {column} IN ({placeholders})",
+                chunk
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    def filter_new(self, items: Iterable) -> List:
+        """未処理の記事だけを返す（URLまたは内容が一致すれば処理済みとみなす）"""
+        items = list(items)
+        keys = [self._keys(item) for item in items]
+        with self._lock:
+            seen_urls = self._existing('url_key', list({url for url, _ in keys}))
+            seen_hashes = self._existing('content_hash', list({h for _, h in keys}))
+        return [
+            item for item, (url_key, digest) in zip(items, keys)
+            if url_key not in seen_urls and digest not in seen_hashes
+        ]
+
+    def mark_processed(self, items: Iterable):
+        """記事を処理済みとして登録"""
+        now = time.time()
+        rows = [(*self._keys(item), item.title, now) for item in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_articles (url_key, content_hash, title, first_seen) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def prune(self):
+        """保持期間を過ぎたエントリを削除"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM seen_articles WHERE first_seen < ?", (cutoff,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
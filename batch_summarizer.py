@@ -0,0 +1,90 @@
+import abc
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class BatchResult:
+    """1要求分の結果"""
+    text: Optional[str] = None  # 要約テキスト（失敗した要求はNone）
+    usage: Any = None  # 成功した要求のトークン使用量（Message.usage と同じ属性を持つ）
+
+
+class BatchBackend(abc.ABC):
+    """一括要約ジョブのインターフェース（テスト用のローカル実装に差し替え可能）"""
+
+    @abc.abstractmethod
+    def submit(self, requests: List[dict]) -> str:
+        """[{'custom_id': ..., 'params': {...}}] を投入してジョブIDを返す"""
+
+    @abc.abstractmethod
+    def is_done(self, batch_id: str) -> bool:
+        """ジョブが終了したか"""
+
+    @abc.abstractmethod
+    def results(self, batch_id: str) -> Dict[str, BatchResult]:
+        """custom_id → 結果"""
+
+    def cancel(self, batch_id: str):
+        """ジョブを取り消す（取り消せないバックエンドは何もしない）"""
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API による実装"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests: List[dict]) -> str:
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def is_done(self, batch_id: str) -> bool:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == "ended"
+
+    def results(self, batch_id: str) -> Dict[str, BatchResult]:
+        results = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                message = entry.result.message
+                results[entry.custom_id] = BatchResult(message.content[0].text.strip(), message.usage)
+            else:
+                results[entry.custom_id] = BatchResult()
+        return results
+
+    def cancel(self, batch_id: str):
+        self.client.messages.batches.cancel(batch_id)
+
+
+class BatchSummarizer:
+    """要約リクエストを一括投入し、完了までポーリングして結果を回収する"""
+
+    DEFAULT_POLL_INTERVAL = 30  # seconds
+    DEFAULT_TIMEOUT = 3600  # seconds
+
+    def __init__(self, backend: BatchBackend, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def run(self, requests: List[dict]) -> Dict[str, BatchResult]:
+        """要求ごとの結果を返す（タイムアウト時はジョブを取り消し、全件失敗として返す）"""
+        if not requests:
+            return {}
+        batch_id = self.backend.submit(requests)
+        print(f"▶ バッチ投入: {batch_id} ({len(requests)}件)")
+        deadline = time.monotonic() + self.timeout
+        while not self.backend.is_done(batch_id):
+            if time.monotonic() > deadline:
+                print(f"[ERROR] バッチが{self.timeout}秒以内に完了しませんでした: {batch_id}")
+                try:
+                    self.backend.cancel(batch_id)
+                except Exception as e:
+                    print(f"[ERROR] バッチ取り消し失敗: {e}")
+                return {request['custom_id']: BatchResult() for request in requests}
+            time.sleep(self.poll_interval)
+        results = self.backend.results(batch_id)
+        return {request['custom_id']: results.get(request['custom_id']) or BatchResult() for request in requests}
@@ -0,0 +1,1022 @@
+"""オフラインのエンドツーエンドベンチマーク
+
+合成したRSS/Atomフィード・NewsAPIレスポンスをローカルHTTPサーバーから配信し、
+Claude APIは遅延とトークン数を再現する偽クライアント、メールはローカルのSMTPシンクに
+差し替えて AINewsCollector.run_daily_collection を実行する。
+ステージごとの所要時間とスループットを出力し、保存済みのベースラインより遅ければ失敗する。
+
+    python3 benchmark.py --articles 1000
+    python3 benchmark.py --articles 1000 --save-baseline
+    python3 benchmark.py --articles 100000 --feeds 50 --claude-latency 0
+    python3 benchmark.py --articles 1000 --profiles 10
+    python3 benchmark.py --startup
+    python3 benchmark.py --parser --parser-entries 20000
+    python3 benchmark.py --ranking --ranking-items 50000
+    python3 benchmark.py --scheduler --scheduler-feeds 50
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from ai_news_collector import AINewsCollector, NewsItem
+from email_handler import EmailHandler
+from feed_fetcher import FeedFetcher
+from feed_parser import StreamingFeedParser
+from feed_scheduler import FeedScheduler
+from keyword_matcher import KeywordMatcher
+from news_api_client import NewsAPIClient
+from profiles import TopicProfile
+from prompt_budget import estimate_tokens, strip_markup
+from rate_limiter import AdaptiveRateLimiter
+from relevance_ranker import RelevanceRanker
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(REPO_DIR, "benchmark_baseline.json")
+UNLIMITED_RATE = 1e12  # ローカルサーバー・偽クライアント向けの実質無制限レート（/分）
+
+# 起動時間の予算: テストモード（メール送信なし）の起動で読み込んではいけないモジュールと所要時間の上限
+STARTUP_BUDGET_SECONDS = 0.5
+STARTUP_FORBIDDEN_MODULES = ('anthropic', 'httpx', 'requests', 'feedparser', 'jinja2', 'markdown2', 'smtplib')
+STARTUP_REPEAT = 5
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import ai_news_collector
+ai_news_collector.AINewsCollector("", test_mode=True)
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': [m for m in sys.argv[1:] if m in sys.modules]}))
+"""
+
+# フィード解析の比較: 新しい順に並んだ長期アーカイブ型フィード（PARSER_INTERVAL_MINUTES 間隔）
+PARSER_ENTRIES = 10000
+PARSER_INTERVAL_MINUTES = 30
+PARSER_HOURS_BACK = 24
+PARSER_REPEAT = 3
+# 重要度ランキングの計測: 合成記事（フィルタ前の全件）から個別要約の対象を選ぶ
+RANKING_ITEMS = 50000
+RANKING_TOKEN_BUDGET = 30000
+RANKING_REPEAT = 3
+# キーワード照合の計測: 合成記事（フィルタ前の全件）に AI_FILTER_KEYWORDS を照合
+KEYWORD_ITEMS = 100000
+KEYWORD_REPEAT = 3
+# フィード巡回方式の比較: 公開間隔の異なるフィードを SCHEDULER_HOURS 時間シミュレーション
+SCHEDULER_FEEDS = 50
+SCHEDULER_HOURS = 72
+SCHEDULER_WINDOW_HOURS = 24  # フィードに載っている期間（hours_back と同じ）
+SCHEDULER_FIXED_INTERVAL = 30 * 60  # seconds
+SCHEDULER_MIN_GAP = 10 * 60  # 最も頻繁なフィードの平均公開間隔（秒）
+SCHEDULER_MAX_GAP = 2 * 86400  # 最もまれなフィードの平均公開間隔（秒）
+SCHEDULER_FAILING_SHARE = 0.1  # 常に取得に失敗するフィードの割合
+
+# 合成記事の材料
+TOPICS = [
+    "OpenAI", "Google AI", "Microsoft AI", "NVIDIA", "large language model", "machine learning",
+    "deep learning", "computer vision", "generative AI", "autonomous driving", "neural network",
+]
+OFF_TOPICS = ["smartphone", "electric vehicle", "semiconductor supply", "cloud pricing", "retail earnings"]
+VERBS = ["announces", "releases", "unveils", "expands", "delays", "acquires", "benchmarks", "open-sources"]
+NOUNS = ["platform", "model", "chip", "partnership", "research lab", "developer toolkit", "data center"]
+WORDS = (
+    "analysts customers pricing regulators investors revenue quarter growth margin training inference "
+    "latency throughput accuracy dataset benchmark cluster capacity contract startup enterprise cloud "
+    "edge device robotics healthcare finance logistics security privacy policy europe japan india "
+    "partners developers researchers release preview license funding valuation acquisition hiring "
+    "supply demand shortage roadmap launch update integration adoption productivity automation"
+).split()
+
+
+class SyntheticCorpus:
+    """再現可能な合成記事の集合（AI関連・無関係・近似重複を混ぜる）"""
+
+    def __init__(self, articles: int, feeds: int, news_api_share: float = 0.1,
+                 relevant_ratio: float = 0.6, duplicate_ratio: float = 0.1, seed: int = 1):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.items: List[Dict] = []
+        for i in range(articles):
+            if self.items and rng.random() < duplicate_ratio:
+                # 別ソースからの同一ニュース（タイトルの一部だけ変える）
+                original = rng.choice(self.items)
+                title = original['title'].replace(" ", "  ", 1) + " - report"
+                content = original['content']
+            else:
+                topic = rng.choice(TOPICS) if rng.random() < relevant_ratio else rng.choice(OFF_TOPICS)
+                title = f"{topic} {rng.choice(VERBS)} new {rng.choice(NOUNS)} #{i}"
+                body = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 160)))
+                content = f"<p>{escape(title)}.</p><p>{body}.</p>"
+            self.items.append({
+                'title': title,
+                'url': f"https://bench.example/{i}",
+                'published': now - timedelta(minutes=rng.randint(1, 23 * 60)),
+                'content': content,
+                'source': f"Bench Source {i % 17}"
+            })
+        split = int(articles * (1 - news_api_share))
+        self.feed_items = [self.items[i:split:feeds] for i in range(feeds)]
+        self.news_api_items = self.items[split:]
+
+    @staticmethod
+    def render_rss(index: int, items: List[Dict]) -> bytes:
+        entries = ''.join(
+            f"<item><title>{escape(item['title'])}</title><link>{item['url']}</link>"
+            f"<pubDate>{format_datetime(item['published'])}</pubDate>"
+            f"<description>{escape(item['content'])}</description></item>"
+            for item in items
+        )
+        return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+                f'<title>Bench Feed {index}</title><link>https://bench.example/</link>'
+                f'{entries}</channel></rss>').encode('utf-8')
+
+    @staticmethod
+    def render_atom(index: int, items: List[Dict]) -> bytes:
+        entries = ''.join(
+            f"<entry><title>{escape(item['title'])}</title><link href=\"{item['url']}\"/>"
+            f"<id>{item['url']}</id><updated>{item['published'].isoformat()}</updated>"
+            f"<summary type=\"html\">{escape(item['content'])}</summary></entry>"
+            for item in items
+        )
+        return (f'<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+                f'<title>Bench Atom {index}</title><id>urn:bench:{index}</id>'
+                f'{entries}</feed>').encode('utf-8')
+
+    def render_feed(self, index: int) -> bytes:
+        # 偶数番はRSS 2.0、奇数番はAtom
+        render = self.render_rss if index % 2 == 0 else self.render_atom
+        return render(index, self.feed_items[index])
+
+    def news_api_page(self, page: int, page_size: int) -> Dict:
+        batch = self.news_api_items[(page - 1) * page_size:page * page_size]
+        return {
+            'status': 'ok',
+            'totalResults': len(self.news_api_items),
+            'articles': [
+                {
+                    'title': item['title'],
+                    'url': item['url'],
+                    'publishedAt': item['published'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'description': item['content'],
+                    'source': {'name': item['source']}
+                }
+                for item in batch
+            ]
+        }
+
+
+class _LocalHTTPServer(ThreadingHTTPServer):
+    # 既定の listen バックログ（5）では並列取得の接続が溢れ、SYN再送で1秒待たされる
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class BenchmarkHTTPServer:
+    """合成フィード（/feeds/<n>.xml）とNewsAPI（/v2/everything）を配信するローカルサーバー"""
+
+    def __init__(self, corpus: SyntheticCorpus):
+        self.corpus = corpus
+        self.bodies = {
+            f"/feeds/{i}.xml": corpus.render_feed(i) for i in range(len(corpus.feed_items))
+        }
+        self.etags = {path: hashlib.sha1(body).hexdigest() for path, body in self.bodies.items()}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server = _LocalHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def feed_urls(self) -> List[str]:
+        return [self.base_url + path for path in self.bodies]
+
+    def _handler_class(self):
+        bench = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b'', content_type: str = 'application/xml',
+                      headers: Dict[str, str] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                with bench._lock:
+                    bench.requests += 1
+                parsed = urlparse(self.path)
+                if parsed.path == '/v2/everything':
+                    params = parse_qs(parsed.query)
+                    page = int(params.get('page', ['1'])[0])
+                    page_size = int(params.get('pageSize', ['100'])[0])
+                    body = json.dumps(bench.corpus.news_api_page(page, page_size)).encode('utf-8')
+                    self._send(200, body, 'application/json')
+                elif parsed.path in bench.bodies:
+                    etag = f'"{bench.etags[parsed.path]}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        self._send(304, headers={'ETag': etag})
+                    else:
+                        self._send(200, bench.bodies[parsed.path], headers={'ETag': etag})
+                else:
+                    self._send(404, b'not found', 'text/plain')
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SMTPSink:
+    """受信したメールを数えるだけのローカルSMTPサーバー（STARTTLS・認証なし、bare LF は拒否）"""
+
+    def __init__(self):
+        self.messages = 0
+        self.recipients = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def _handler_class(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write(line.encode('ascii') + b'\r\n')
+
+            def handle(self):
+                self.reply('220 bench ESMTP')
+                recipients = 0
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode('ascii', 'replace').strip().upper()
+                    if command.startswith(('EHLO', 'HELO')):
+                        self.reply('250 bench')
+                    elif command.startswith('RCPT'):
+                        recipients += 1
+                        self.reply('250 OK')
+                    elif command.startswith('DATA'):
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        # 厳格なMTAと同じく、CRLFで終わらない行（bare LF）を含むメールは拒否する
+                        bare_lf = False
+                        while True:
+                            data_line = self.rfile.readline()
+                            if data_line in (b'.\r\n', b''):
+                                break
+                            if data_line.endswith(b'\n') and not data_line.endswith(b'\r\n'):
+                                bare_lf = True
+                        with sink._lock:
+                            if bare_lf:
+                                sink.rejected += 1
+                            else:
+                                sink.messages += 1
+                                sink.recipients += recipients
+                        recipients = 0
+                        self.reply('554 5.6.0 bare LF in message' if bare_lf else '250 OK')
+                    elif command.startswith('QUIT'):
+                        self.reply('221 Bye')
+                        return
+                    elif command.startswith('RSET'):
+                        recipients = 0
+                        self.reply('250 OK')
+                    else:
+                        # MAIL / NOOP など
+                        self.reply('250 OK')
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeAnthropicClient:
+    """messages.create だけを持つ偽のAnthropicクライアント
+
+    1回あたり latency 秒 + 出力トークンあたり per_output_token 秒だけ待ち、
+    入力トークンは概算値、system ブロックのキャッシュは2回目以降を読込として計上する。
+    """
+
+    OUTPUT_TEXT = "- 要点: ベンチマーク用の要約です。\n- 影響: 市場への影響は限定的。"
+
+    def __init__(self, latency: float = 0.0, per_output_token: float = 0.0):
+        self.latency = latency
+        self.per_output_token = per_output_token
+        self.calls = 0
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+        self.messages = types.SimpleNamespace(create=self.create)
+
+    def create(self, **kwargs):
+        input_tokens = AINewsCollector._estimate_input_tokens(kwargs)
+        cached = sum(
+            estimate_tokens(block.get('text', '')) for block in kwargs.get('system') or []
+            if isinstance(block, dict) and block.get('cache_control')
+        )
+        prefix = json.dumps(kwargs.get('system'), sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            self.calls += 1
+            cache_hit = prefix in self._cached_prefixes
+            self._cached_prefixes.add(prefix)
+        output_tokens = estimate_tokens(self.OUTPUT_TEXT)
+        time.sleep(self.latency + self.per_output_token * output_tokens)
+        usage = types.SimpleNamespace(
+            input_tokens=input_tokens - cached,
+            output_tokens=output_tokens,
+            cache_creation_input_tokens=0 if cache_hit else cached,
+            cache_read_input_tokens=cached if cache_hit else 0
+        )
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text=self.OUTPUT_TEXT)], usage=usage)
+
+
+def _stage_throughput(metrics: Dict) -> Dict[str, Dict[str, float]]:
+    """ステージごとの所要時間と処理件数/秒"""
+    counts = metrics['counts']
+    items_per_stage = {
+        'collect_rss': counts.get('collected', 0),
+        'collect_news_api': counts.get('collected', 0),
+        'filter_and_deduplicate': counts.get('collected', 0),
+        'collect_and_summarize': counts.get('collected', 0),
+        'rank': counts.get('new', 0),
+        'summarize_individual': counts.get('selected', counts.get('new', 0)),
+        'send_email': metrics['email'].get('sent', 0),
+    }
+    report = {}
+    for stage, seconds in metrics['stages'].items():
+        items = items_per_stage.get(stage, 0)
+        report[stage] = {
+            'seconds': round(seconds, 4),
+            'items': items,
+            'items_per_second': round(items / seconds, 1) if seconds > 0 else 0.0
+        }
+    return report
+
+
+def benchmark_profiles(count: int, recipient_emails: List[str]) -> List[TopicProfile]:
+    """合成記事のトピックを3つずつずらして割り当てたプロファイル（宛先は順に振り分ける）"""
+    return [
+        TopicProfile(
+            name=f"profile{i}",
+            filter_keywords=[TOPICS[(i + offset) % len(TOPICS)] for offset in range(3)],
+            news_api_keywords=["artificial intelligence"],
+            recipients=recipient_emails[i::count]
+        )
+        for i in range(count)
+    ]
+
+
+def run_benchmark(articles: int, feeds: int, claude_latency: float, recipients: int,
+                  streaming: bool = False, warm: bool = True, seed: int = 1, profiles: int = 0) -> Dict:
+    """合成データでパイプラインを実行し、cold（初回）と warm（2回目）の計測値を返す
+
+    profiles を指定すると、同じフィードを共有するプロファイルで run_profile_collection を実行する。
+    """
+    corpus = SyntheticCorpus(articles, feeds, seed=seed)
+    http_server = BenchmarkHTTPServer(corpus)
+    smtp_sink = SMTPSink()
+    http_server.start()
+    smtp_sink.start()
+
+    # テンプレートは作業ディレクトリからの相対パスで読まれるため絶対パスにする
+    original_template_dir = EmailHandler.TEMPLATE_DIR
+    EmailHandler.TEMPLATE_DIR = os.path.join(REPO_DIR, original_template_dir)
+    env = {
+        'SMTP_SERVER': '127.0.0.1',
+        'SMTP_PORT': str(smtp_sink.port),
+        'SMTP_STARTTLS': 'false',
+        'EMAIL_ADDRESS': 'bench@example.com',
+        'EMAIL_PASSWORD': '',
+    }
+    original_env = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    original_cwd = os.getcwd()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="ai_news_bench_") as work_dir:
+            os.chdir(work_dir)
+            for phase in (['cold', 'warm'] if warm else ['cold']):
+                collector = AINewsCollector("benchmark", streaming=streaming)
+                fake_client = FakeAnthropicClient(latency=claude_latency)
+                collector.client = fake_client
+                # 偽クライアントなのでAPIのレート制限は掛けない
+                collector.rate_limiter = AdaptiveRateLimiter(UNLIMITED_RATE, UNLIMITED_RATE)
+                collector.rss_feeds = http_server.feed_urls
+                collector.news_api_key = "benchmark"
+                collector.news_api_client = NewsAPIClient(
+                    "benchmark",
+                    base_url=f"{http_server.base_url}/v2/everything",
+                    page_size=collector.NEWS_API_PAGE_SIZE,
+                    max_pages=max(1, -(-len(corpus.news_api_items) // collector.NEWS_API_PAGE_SIZE)),
+                    requests_per_minute=UNLIMITED_RATE
+                )
+                # NewsAPIのクエリ数を1つにまとめ、キーワード数に依存しない件数にする
+                collector.NEWS_API_KEYWORDS = ["artificial intelligence"]
+
+                recipient_emails = [f"reader{i}@example.com" for i in range(recipients)]
+                http_requests = http_server.requests
+                start = time.monotonic()
+                if profiles:
+                    collector.run_profile_collection(benchmark_profiles(profiles, recipient_emails))
+                else:
+                    collector.run_daily_collection(recipient_emails)
+                total = time.monotonic() - start
+
+                metrics = collector.metrics.to_dict()
+                results[phase] = {
+                    'total_seconds': round(total, 4),
+                    'stages': _stage_throughput(metrics),
+                    'counts': metrics['counts'],
+                    'claude_calls': fake_client.calls,
+                    'http_requests': http_server.requests - http_requests,
+                    'claude': metrics['claude'],
+                    'caches': metrics['caches'],
+                    'feed_bytes_total': metrics['feed_bytes_total'],
+                    'email': metrics['email'],
+                }
+                collector.article_index.close()
+                collector.archive.close()
+            os.chdir(original_cwd)
+    finally:
+        os.chdir(original_cwd)
+        EmailHandler.TEMPLATE_DIR = original_template_dir
+        for name, value in original_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        http_server.stop()
+        smtp_sink.stop()
+
+    config = {
+        'articles': articles,
+        'feeds': feeds,
+        'claude_latency': claude_latency,
+        'recipients': recipients,
+        'streaming': streaming,
+        'seed': seed,
+    }
+    if profiles:
+        config['profiles'] = profiles
+    return {
+        'config': config,
+        'python': sys.version.split()[0],
+        'results': results,
+        'smtp_messages': smtp_sink.messages,
+        'smtp_rejected': smtp_sink.rejected,
+    }
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, tolerance: float,
+                          min_seconds: float) -> List[str]:
+    """ベースラインより tolerance 以上遅くなった項目を返す（min_seconds 未満の差は誤差として無視）"""
+    regressions = []
+    for phase, result in report['results'].items():
+        base = baseline['results'].get(phase)
+        if not base:
+            continue
+        pairs = [('total', base['total_seconds'], result['total_seconds'])]
+        pairs += [
+            (stage, base['stages'][stage]['seconds'], stats['seconds'])
+            for stage, stats in result['stages'].items() if stage in base['stages']
+        ]
+        for name, before, after in pairs:
+            if after > before * (1 + tolerance) and after - before > min_seconds:
+                regressions.append(f"{phase}/{name}: {before:.3f}s → {after:.3f}s (+{after / before - 1:.0%})"
+                                   if before > 0 else f"{phase}/{name}: {before:.3f}s → {after:.3f}s")
+    return regressions
+
+
+def _run_python(args: List[str], cwd: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True,
+                          text=True, check=True)
+
+
+def _parse_importtime(stderr: str, top: int = 10) -> List[Dict]:
+    """-X importtime の出力から、直接importされたモジュールを累積時間の大きい順に返す"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            modules.append({'module': name.strip(), 'depth': depth,
+                            'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return sorted(modules, key=lambda m: m['cumulative_ms'], reverse=True)[:top]
+
+
+def measure_startup(repeat: int = STARTUP_REPEAT) -> Dict:
+    """テストモードの起動（import＋コレクター生成）の所要時間と、読み込まれた重い依存を計測"""
+    with tempfile.TemporaryDirectory(prefix="ai_news_startup_") as work_dir:
+        runs = [
+            json.loads(_run_python(['-c', STARTUP_SCRIPT, *STARTUP_FORBIDDEN_MODULES], work_dir).stdout)
+            for _ in range(repeat)
+        ]
+        importtime = _run_python(['-X', 'importtime', '-c', 'import ai_news_collector'], work_dir)
+    return {
+        'seconds': min(run['seconds'] for run in runs),
+        'forbidden_modules': sorted({module for run in runs for module in run['modules']}),
+        'imports': _parse_importtime(importtime.stderr)
+    }
+
+
+def check_startup(budget: float = STARTUP_BUDGET_SECONDS) -> int:
+    report = measure_startup()
+    print(f"=== 起動時間（テストモード, {STARTUP_REPEAT}回の最小値）: {report['seconds'] * 1000:.0f}ms "
+          f"(予算 {budget * 1000:.0f}ms) ===")
+    print("import時間の内訳（累積の大きい順）:")
+    for module in report['imports']:
+        indent = '  ' * module['depth']
+        print(f"  {indent}{module['module']:<30} {module['cumulative_ms']:>8.1f}ms")
+    failed = False
+    if report['forbidden_modules']:
+        print(f"起動時に重い依存が読み込まれています: {', '.join(report['forbidden_modules'])}")
+        failed = True
+    if report['seconds'] > budget:
+        print(f"起動時間が予算を超えています: {report['seconds'] * 1000:.0f}ms > {budget * 1000:.0f}ms")
+        failed = True
+    if not failed:
+        print("起動時間: 予算内")
+    return 1 if failed else 0
+
+
+def archive_feed(entries: int, atom: bool, seed: int = 1) -> bytes:
+    """新しい順に entries 件を並べたアーカイブ型フィード（RSS 2.0 または Atom）"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    items = []
+    for i in range(entries):
+        title = f"{rng.choice(TOPICS)} {rng.choice(VERBS)} new {rng.choice(NOUNS)} #{i}"
+        body = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 160)))
+        items.append({
+            'title': title,
+            'url': f"https://bench.example/archive/{i}",
+            'published': now - timedelta(minutes=PARSER_INTERVAL_MINUTES * i),
+            'content': f"<p>{escape(title)}.</p><p>{body}.</p>"
+        })
+    render = SyntheticCorpus.render_atom if atom else SyntheticCorpus.render_rss
+    return render(0, items)
+
+
+def _parse_with_feedparser(data: bytes, cutoff: datetime) -> int:
+    """変更前の処理: feedparser で全体を解析してから期間外の記事を捨てる"""
+    import feedparser
+    feed = feedparser.parse(data)
+    kept = 0
+    for entry in feed.entries:
+        date_struct = entry.get('published_parsed') or entry.get('updated_parsed')
+        if datetime(*date_struct[:6]) > cutoff:
+            kept += 1
+    return kept
+
+
+def _parse_streaming(data: bytes, cutoff: datetime) -> int:
+    """FeedFetcher と同じチャンク単位で逐次解析し、締め切りに達したら打ち切る"""
+    parser = StreamingFeedParser(cutoff)
+    for offset in range(0, len(data), FeedFetcher.CHUNK_SIZE):
+        if parser.feed(data[offset:offset + FeedFetcher.CHUNK_SIZE]):
+            break
+    return len(parser.close().entries)
+
+
+def _parse_streaming_full(data: bytes, cutoff: datetime) -> int:
+    """打ち切りなしで最後まで逐次解析（解析器そのものの差を見るための比較用）"""
+    parser = StreamingFeedParser()
+    for offset in range(0, len(data), FeedFetcher.CHUNK_SIZE):
+        parser.feed(data[offset:offset + FeedFetcher.CHUNK_SIZE])
+    return sum(1 for entry in parser.close().entries if entry.published > cutoff)
+
+
+def measure_parser(entries: int = PARSER_ENTRIES, hours_back: int = PARSER_HOURS_BACK,
+                   repeat: int = PARSER_REPEAT) -> Dict:
+    """RSS/Atom それぞれで、解析方式ごとのCPU時間（最小値）とピークメモリを計測"""
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=hours_back)
+    results = {}
+    for feed_format in ('rss', 'atom'):
+        data = archive_feed(entries, atom=feed_format == 'atom')
+        for name, parse in (('feedparser', _parse_with_feedparser), ('streaming_full', _parse_streaming_full),
+                            ('streaming', _parse_streaming)):
+            cpu_times = []
+            for _ in range(repeat):
+                start = time.process_time()
+                kept = parse(data, cutoff)
+                cpu_times.append(time.process_time() - start)
+            # tracemalloc は処理を遅くするため、CPU時間とは別に1回だけ計測
+            tracemalloc.start()
+            parse(data, cutoff)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[f"{feed_format}/{name}"] = {
+                'feed_bytes': len(data),
+                'entries_kept': kept,
+                'cpu_seconds': min(cpu_times),
+                'peak_bytes': peak
+            }
+    return {'config': {'entries': entries, 'hours_back': hours_back}, 'results': results}
+
+
+def print_parser_report(report: Dict):
+    config = report['config']
+    print(f"=== フィード解析: {config['entries']}件のアーカイブ型フィード / 直近{config['hours_back']}時間 ===")
+    for name, result in report['results'].items():
+        print(f"  {name:<20} CPU {result['cpu_seconds'] * 1000:>9.1f}ms  ピークメモリ "
+              f"{result['peak_bytes'] / 1024 / 1024:>8.2f}MB  抽出 {result['entries_kept']}件 "
+              f"(フィード {result['feed_bytes'] / 1024 / 1024:.1f}MB)")
+    for feed_format in ('rss', 'atom'):
+        before = report['results'][f"{feed_format}/feedparser"]
+        after = report['results'][f"{feed_format}/streaming"]
+        print(f"  {feed_format}: CPU時間 {before['cpu_seconds'] / max(after['cpu_seconds'], 1e-9):.0f}倍速, "
+              f"ピークメモリ {before['peak_bytes'] / max(after['peak_bytes'], 1):.0f}分の1")
+
+
+def ranking_items(count: int, seed: int = 1) -> List[NewsItem]:
+    """合成記事を収集後と同じ形（本文はテキスト化、日付はUTCのnaive）の NewsItem にする"""
+    corpus = SyntheticCorpus(count, feeds=1, seed=seed)
+    rng = random.Random(seed)
+    items = []
+    for data in corpus.items:
+        item = NewsItem(
+            title=data['title'],
+            url=data['url'],
+            published=data['published'].replace(tzinfo=None),
+            content=strip_markup(data['content']),
+            source=data['source']
+        )
+        # 一部の記事は近似重複の統合で他ソースの出典を持つ
+        item.citations = [(f"Bench Source {j}", f"{item.url}#{j}") for j in range(rng.choice((0, 0, 0, 1, 3)))]
+        items.append(item)
+    return items
+
+
+def measure_ranking(count: int = RANKING_ITEMS, top_k: int = AINewsCollector.SUMMARY_TOP_K,
+                    token_budget: int = RANKING_TOKEN_BUDGET, repeat: int = RANKING_REPEAT) -> Dict:
+    """コレクターと同じ設定の RelevanceRanker で、スコア計算と選択の所要時間（最小値）を計測"""
+    items = ranking_items(count)
+    ranker = RelevanceRanker(AINewsCollector.AI_FILTER_KEYWORDS, AINewsCollector.SOURCE_WEIGHTS,
+                             AINewsCollector.RECENCY_HALF_LIFE_HOURS)
+    cost = lambda item: estimate_tokens(item.title) + estimate_tokens(item.content)
+    runs = (
+        ('relevance', lambda: ranker.relevance(items)),
+        ('scores', lambda: ranker.scores(items)),
+        ('select_top_k', lambda: ranker.select(items, top_k)),
+        ('select_token_budget', lambda: ranker.select(items, None, token_budget, cost)),
+    )
+    results = {}
+    for name, run in runs:
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = run()
+            seconds.append(time.perf_counter() - start)
+        results[name] = {
+            'seconds': min(seconds),
+            'items_per_second': round(count / min(seconds), 1),
+            'selected': len(output) if name.startswith('select') else None
+        }
+    return {
+        'config': {'items': count, 'top_k': top_k, 'token_budget': token_budget,
+                   'keywords': len(AINewsCollector.AI_FILTER_KEYWORDS),
+                   'text_bytes': sum(len(item.title) + len(item.content) for item in items)},
+        'results': results
+    }
+
+
+def print_ranking_report(report: Dict):
+    config = report['config']
+    print(f"=== 重要度ランキング: {config['items']}記事 / キーワード {config['keywords']}件 / "
+          f"本文 {config['text_bytes'] / 1024 / 1024:.1f}MB ===")
+    for name, result in report['results'].items():
+        selected = f"  選択 {result['selected']}件" if result['selected'] is not None else ""
+        print(f"  {name:<20} {result['seconds'] * 1000:>9.1f}ms {result['items_per_second']:>12,.1f}件/秒{selected}")
+
+
+def legacy_matched_keywords(keywords: List[str], title: str, content: str) -> List[str]:
+    """KeywordMatcher 導入前の照合（キーワードごとにタイトルと本文を小文字化して部分文字列検索）"""
+    return [keyword for keyword in keywords
+            if keyword.lower() in title.lower() or keyword.lower() in content.lower()]
+
+
+def measure_keywords(count: int = KEYWORD_ITEMS, repeat: int = KEYWORD_REPEAT) -> Dict:
+    """AI_FILTER_KEYWORDS の照合を、導入前の部分文字列検索と KeywordMatcher で比較（所要時間は最小値）
+
+    filter_and_deduplicate と同じく、記事ごとに一致したキーワードの一覧を求める。
+    """
+    items = ranking_items(count)
+    keywords = AINewsCollector.AI_FILTER_KEYWORDS
+    matcher = KeywordMatcher(keywords)
+    runs = (
+        ('legacy_substring', lambda: [legacy_matched_keywords(keywords, item.title, item.content) for item in items]),
+        ('keyword_matcher', lambda: [matcher.matched_keywords(item.title, item.content) for item in items]),
+    )
+    results = {}
+    outputs = {}
+    for name, run in runs:
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[name] = run()
+            seconds.append(time.perf_counter() - start)
+        results[name] = {
+            'seconds': min(seconds),
+            'items_per_second': round(count / min(seconds), 1),
+            'matched_items': sum(1 for matched in outputs[name] if matched)
+        }
+    # 部分文字列検索だけが一致した記事と、その一致を含んでいた単語（多い順）
+    legacy_only = 0
+    words = Counter()
+    for item, before, after in zip(items, outputs['legacy_substring'], outputs['keyword_matcher']):
+        if before and not after:
+            legacy_only += 1
+            text = f"{item.title}\n{item.content}".lower()
+            for keyword in before:
+                words.update(re.findall(rf"[a-z0-9]*{re.escape(keyword.lower())}[a-z0-9]*", text))
+    return {
+        'config': {'items': count, 'keywords': len(keywords),
+                   'text_bytes': sum(len(item.title) + len(item.content) for item in items)},
+        'results': results,
+        'speedup': results['legacy_substring']['seconds'] / max(results['keyword_matcher']['seconds'], 1e-9),
+        'legacy_only_items': legacy_only,
+        'legacy_only_words': dict(words.most_common(10))
+    }
+
+
+def print_keywords_report(report: Dict):
+    config = report['config']
+    print(f"=== キーワード照合: {config['items']}記事 / キーワード {config['keywords']}件 / "
+          f"本文 {config['text_bytes'] / 1024 / 1024:.1f}MB ===")
+    for name, result in report['results'].items():
+        print(f"  {name:<20} {result['seconds'] * 1000:>9.1f}ms {result['items_per_second']:>12,.1f}件/秒"
+              f"  一致 {result['matched_items']}件")
+    print(f"  {report['speedup']:.1f}倍速, 部分文字列検索だけが一致した記事 {report['legacy_only_items']}件")
+    if report['legacy_only_words']:
+        print("  その一致を含む単語: " + ', '.join(f"{word} {count}件" for word, count in report['legacy_only_words'].items()))
+
+
+def simulated_feeds(count: int, horizon: float, seed: int = 1) -> Dict[str, Dict]:
+    """平均公開間隔が対数一様に分布するフィード（記事はポアソン過程で公開、開始前の1期間分を含む）"""
+    rng = random.Random(seed)
+    window = SCHEDULER_WINDOW_HOURS * 3600
+    feeds = {}
+    for i in range(count):
+        mean_gap = math.exp(rng.uniform(math.log(SCHEDULER_MIN_GAP), math.log(SCHEDULER_MAX_GAP)))
+        posts = []
+        t = -window + rng.expovariate(1 / mean_gap)
+        while t < horizon:
+            posts.append(t)
+            t += rng.expovariate(1 / mean_gap)
+        feeds[f"https://bench.example/sim/{i}"] = {
+            'posts': posts,
+            'failing': rng.random() < SCHEDULER_FAILING_SHARE
+        }
+    return feeds
+
+
+def _simulate_polling(feeds: Dict[str, Dict], horizon: float, strategy: str, seed: int = 1) -> Dict:
+    """巡回方式ごとのリクエスト数と、公開から取得までの遅延"""
+    window = SCHEDULER_WINDOW_HOURS * 3600
+    base = datetime(2026, 1, 1)
+    last_poll = {url: -window for url in feeds}
+    delays = []
+    stats = {'requests': 0, 'empty_polls': 0, 'failed_polls': 0}
+
+    def poll(url: str, t: float) -> Optional[List[float]]:
+        """時刻 t の巡回で新たに取得した記事の公開時刻（失敗時はNone）"""
+        stats['requests'] += 1
+        feed = feeds[url]
+        if feed['failing']:
+            stats['failed_polls'] += 1
+            return None
+        new_posts = [p for p in feed['posts'] if last_poll[url] < p <= t]
+        last_poll[url] = t
+        if not new_posts:
+            stats['empty_polls'] += 1
+        # 遅延は、どの方式でも期間内に取得できる記事（最後の1期間より前の公開）だけで比べる
+        delays.extend(t - p for p in new_posts if 0 <= p < horizon - window)
+        return new_posts
+
+    if strategy == 'adaptive':
+        scheduler = FeedScheduler(feeds, 0.0, seed=seed)
+        while True:
+            t = scheduler.next_poll_time()
+            if t is None or t >= horizon:
+                break
+            for url in scheduler.due(t):
+                new_posts = poll(url, t)
+                if new_posts is None:
+                    scheduler.record_failure(url, t)
+                    continue
+                published = [base + timedelta(seconds=p) for p in feeds[url]['posts'] if t - window < p <= t]
+                scheduler.record_success(url, t, len(new_posts), published)
+    else:
+        interval = 86400 if strategy == 'daily' else SCHEDULER_FIXED_INTERVAL
+        t = 0.0
+        while t < horizon:
+            for url in feeds:
+                poll(url, t)
+            t += interval
+
+    delays.sort()
+    return {
+        **stats,
+        'articles': len(delays),
+        'mean_delay_minutes': round(sum(delays) / len(delays) / 60, 1) if delays else 0.0,
+        'p95_delay_minutes': round(delays[int(len(delays) * 0.95)] / 60, 1) if delays else 0.0,
+    }
+
+
+def measure_scheduler(feed_count: int = SCHEDULER_FEEDS, hours: int = SCHEDULER_HOURS, seed: int = 1) -> Dict:
+    """1日1回の全取得（cron）・固定間隔の全取得・FeedScheduler による適応的な巡回を比較"""
+    horizon = hours * 3600
+    feeds = simulated_feeds(feed_count, horizon, seed)
+    results = {
+        strategy: _simulate_polling(feeds, horizon, strategy, seed)
+        for strategy in ('daily', 'fixed', 'adaptive')
+    }
+    return {
+        'config': {'feeds': feed_count, 'hours': hours, 'fixed_interval_minutes': SCHEDULER_FIXED_INTERVAL / 60,
+                   'failing_feeds': sum(1 for feed in feeds.values() if feed['failing']),
+                   'seed': seed},
+        'results': results
+    }
+
+
+def print_scheduler_report(report: Dict):
+    config = report['config']
+    print(f"=== フィード巡回: {config['feeds']}フィード（常に失敗 {config['failing_feeds']}件） / "
+          f"{config['hours']}時間 / 固定間隔 {config['fixed_interval_minutes']:.0f}分 ===")
+    for name, result in report['results'].items():
+        print(f"  {name:<10} リクエスト {result['requests']:>6}回 (新着なし {result['empty_polls']}回, "
+              f"失敗 {result['failed_polls']}回)  遅延 平均 {result['mean_delay_minutes']:>7.1f}分 / "
+              f"p95 {result['p95_delay_minutes']:>7.1f}分  記事 {result['articles']}件")
+    fixed = report['results']['fixed']
+    adaptive = report['results']['adaptive']
+    print(f"  adaptive / fixed: リクエスト {adaptive['requests'] / max(fixed['requests'], 1):.0%}, "
+          f"平均遅延 {adaptive['mean_delay_minutes'] / max(fixed['mean_delay_minutes'], 1e-9):.1f}倍")
+
+
+def print_report(report: Dict):
+    config = report['config']
+    profiles = f" / プロファイル {config['profiles']}件" if config.get('profiles') else ""
+    print(f"\n=== ベンチマーク結果: {config['articles']}記事 / {config['feeds']}フィード / "
+          f"Claude遅延 {config['claude_latency']}秒 / 宛先 {config['recipients']}件{profiles} ===")
+    for phase, result in report['results'].items():
+        counts = result['counts']
+        print(f"\n[{phase}] 合計 {result['total_seconds']:.3f}秒 - 収集 {counts.get('collected', 0)}件, "
+              f"フィルタ後 {counts.get('filtered', 0)}件, 未処理 {counts.get('new', 0)}件, "
+              f"要約対象 {counts.get('selected', 0)}件, "
+              f"Claude呼び出し {result['claude_calls']}回, HTTPリクエスト {result['http_requests']}回, "
+              f"フィード転送量 {result['feed_bytes_total']:,}バイト")
+        for stage, stats in result['stages'].items():
+            print(f"  {stage:<24} {stats['seconds']:>9.3f}秒 {stats['items_per_second']:>12,.1f}件/秒")
+        for name, stats in result['caches'].items():
+            print(f"  キャッシュ {name}: ヒット率 {stats.get('hit_rate', 0.0):.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI News Collector のオフラインベンチマーク")
+    parser.add_argument('--articles', type=int, default=1000, help="合成記事数（10〜100000）")
+    parser.add_argument('--feeds', type=int, default=20, help="合成フィード数")
+    parser.add_argument('--claude-latency', type=float, default=0.02, help="偽Claude APIの1回あたりの遅延（秒）")
+    parser.add_argument('--recipients', type=int, default=20, help="メール宛先数")
+    parser.add_argument('--stream', action='store_true', help="ストリーミングパイプラインで実行")
+    parser.add_argument('--profiles', type=int, default=0, help="フィードを共有するトピックプロファイル数（0で単一トピック）")
+    parser.add_argument('--no-warm', action='store_true', help="2回目（キャッシュあり）の実行を省略")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="ベースラインJSONのパス")
+    parser.add_argument('--save-baseline', action='store_true', help="今回の結果をベースラインとして保存")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="許容する遅延の割合（0.2 = 20%%）")
+    parser.add_argument('--min-seconds', type=float, default=0.1, help="これ未満の差は誤差として無視（秒）")
+    parser.add_argument('--output', help="結果JSONの保存先")
+    parser.add_argument('--startup', action='store_true', help="起動時間と読み込まれる依存だけを検査")
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_SECONDS, help="起動時間の上限（秒）")
+    parser.add_argument('--parser', action='store_true', help="アーカイブ型フィードの解析方式だけを比較")
+    parser.add_argument('--parser-entries', type=int, default=PARSER_ENTRIES, help="アーカイブ型フィードの記事数")
+    parser.add_argument('--ranking', action='store_true', help="重要度ランキングの所要時間だけを計測")
+    parser.add_argument('--ranking-items', type=int, default=RANKING_ITEMS, help="ランキングする記事数")
+    parser.add_argument('--keywords', action='store_true', help="キーワード照合の所要時間だけを比較")
+    parser.add_argument('--keyword-items', type=int, default=KEYWORD_ITEMS, help="照合する記事数")
+    parser.add_argument('--scheduler', action='store_true', help="フィード巡回方式をシミュレーションで比較")
+    parser.add_argument('--scheduler-feeds', type=int, default=SCHEDULER_FEEDS, help="シミュレーションするフィード数")
+    args = parser.parse_args()
+
+    if args.startup:
+        return check_startup(args.startup_budget)
+
+    if args.parser:
+        report = measure_parser(args.parser_entries)
+        print_parser_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return 0
+
+    if args.ranking:
+        report = measure_ranking(args.ranking_items)
+        print_ranking_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return 0
+
+    if args.keywords:
+        report = measure_keywords(args.keyword_items)
+        print_keywords_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return 0
+
+    if args.scheduler:
+        report = measure_scheduler(args.scheduler_feeds, seed=args.seed)
+        print_scheduler_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return 0
+
+    report = run_benchmark(
+        articles=args.articles,
+        feeds=args.feeds,
+        claude_latency=args.claude_latency,
+        recipients=args.recipients,
+        streaming=args.stream,
+        warm=not args.no_warm,
+        seed=args.seed,
+        profiles=args.profiles
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nベースラインを保存しました: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nベースラインがありません（--save-baseline で作成）: {args.baseline}")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('config') != report['config']:
+        print(f"\nベンチマーク設定がベースラインと異なるため比較できません: {baseline.get('config')}")
+        return 2
+    regressions = compare_with_baseline(report, baseline, args.tolerance, args.min_seconds)
+    if regressions:
+        print("\n性能の劣化を検出しました:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nベースラインとの比較: 劣化なし")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,15 @@
-import markdown2
 import smtplib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email import policy
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.utils import formatdate, make_msgid
 from datetime import datetime
-from typing import List, Dict
-from jinja2 import Environment, FileSystemLoader
-from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -15,18 +18,157 @@ class EmailConfig:
     smtp_port: int
     sender_email: str
     sender_password: str
+    max_connections: int = 4  # 並列SMTP接続数
+    bcc_batch_size: int = 0  # 0より大きい場合はBCCでまとめて送信
+    use_starttls: bool = True
+
+
+@dataclass
+class DeliveryResult:
+    recipient: str
+    success: bool
+    attempts: int = 0
+    error: Optional[str] = None
+    refused: Dict[str, str] = field(default_factory=dict)  # BCC送信で一部だけ拒否された宛先と理由
+
+
+class SMTPFatalError(Exception):
+    """宛先によらず送信できない状態（認証失敗・サーバーに接続できない）"""
+
+
+@dataclass
+class DeliveryReport:
+    results: List[DeliveryResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def success_count(self) -> int:
+        return sum(1 for result in self.results if result.success)
+
+    @property
+    def failed_recipients(self) -> List[str]:
+        return [result.recipient for result in self.results if not result.success]
+
+
+class SMTPConnectionPool:
+    """スレッドごとにSMTP接続を保持し、切断時は再接続する"""
+
+    # 一度も接続できないまま、この回数だけ接続に失敗したらサーバーに届かないとみなす
+    MAX_INITIAL_CONNECT_FAILURES = 3
+
+    def __init__(self, config: EmailConfig):
+        self.config = config
+        self.fatal_error: Optional[str] = None
+        self._connected = False  # 一度でも接続・認証に成功したか
+        self._connect_failures = 0
+        self._local = threading.local()
+        self._connections: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port, timeout=30)
+        try:
+            if self.config.use_starttls:
+                server.starttls()
+            if self.config.sender_password:
+                server.login(self.config.sender_email, self.config.sender_password)
+        except BaseException:
+            # STARTTLS・認証に失敗した接続は開いたまま残さない
+            try:
+                server.close()
+            except Exception:
+                pass
+            raise
+        with self._lock:
+            self._connections.append(server)
+            self._connected = True
+        return server
+
+    def get(self) -> smtplib.SMTP:
+        """現在のスレッドの接続
+
+        認証に失敗した場合と、一度も接続できないまま MAX_INITIAL_CONNECT_FAILURES 回失敗した場合は
+        宛先を変えても結果は同じなので、以降は全スレッドで SMTPFatalError にして送信全体を中止する。
+        それ以外の接続エラー（再接続の失敗や一時的なタイムアウト）はそのまま送出し、再試行に任せる。
+        """
+        if self.fatal_error is not None:
+            raise SMTPFatalError(self.fatal_error)
+        server = getattr(self._local, 'server', None)
+        if server is None:
+            try:
+                server = self._connect()
+            except smtplib.SMTPAuthenticationError as e:
+                self.fatal_error = f"SMTP認証エラー: {e}"
+                raise SMTPFatalError(self.fatal_error) from e
+            except (smtplib.SMTPException, OSError) as e:
+                with self._lock:
+                    self._connect_failures += 1
+                    unreachable = not self._connected and self._connect_failures >= self.MAX_INITIAL_CONNECT_FAILURES
+                if unreachable:
+                    self.fatal_error = f"SMTPサーバーに接続できません: {e}"
+                    raise SMTPFatalError(self.fatal_error) from e
+                raise
+            self._local.server = server
+        return server
+
+    def discard(self):
+        """現在のスレッドの接続を破棄（次回のget()で再接続）"""
+        server = getattr(self._local, 'server', None)
+        self._local.server = None
+        if server is not None:
+            with self._lock:
+                if server in self._connections:
+                    self._connections.remove(server)
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for server in connections:
+            try:
+                server.quit()
+            except Exception:
+                try:
+                    server.close()
+                except Exception:
+                    pass
 
 
 class EmailHandler:
+    TEMPLATE_DIR = 'templates'
+    TEMPLATE_NAME = 'email_template.html'
+    MAX_SEND_ATTEMPTS = 3
+    RETRY_DELAY = 1  # seconds
+
+    _template_cache: Dict[str, object] = {}
+    _template_lock = threading.Lock()
+
     def __init__(self, config: EmailConfig = None):
         self.config = config
-    
-    def _create_html_content(self, summary: str, news_items: List, max_items: int = 20) -> str:
+
+    @classmethod
+    def _get_template(cls):
+        """Jinjaテンプレートを初回のみ読み込み、以降は再利用（jinja2もメール作成時に読み込む）"""
+        from jinja2 import Environment, FileSystemLoader
+        key = os.path.abspath(os.path.join(cls.TEMPLATE_DIR, cls.TEMPLATE_NAME))
+        with cls._template_lock:
+            template = cls._template_cache.get(key)
+            if template is None:
+                env = Environment(loader=FileSystemLoader(cls.TEMPLATE_DIR))
+                template = env.get_template(cls.TEMPLATE_NAME)
+                cls._template_cache[key] = template
+        return template
+
+    def _create_html_content(self, summary: str, news_items: List, max_items: int = 20,
+                             title: Optional[str] = None) -> str:
         """HTMLメールのコンテンツを生成"""
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('email_template.html')
+        template = self._get_template()
 
         # Markdown要約をHTMLに変換
+        import markdown2
         summary_html = markdown2.markdown(summary)
 
         # テンプレートに渡すデータ
@@ -34,60 +176,140 @@ class EmailHandler:
             date=datetime.now().strftime('%Y-%m-%d'),
             generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             news_items=news_items[:max_items],
-            summary_html=summary_html
+            summary_html=summary_html,
+            title=title
         )
 
-    def send_email_summary(self, summary: str, recipient_emails: List[str], 
-                          news_items: List, config: EmailConfig = None):
-        """テンプレートを使って複数の宛先にHTMLメールを送信"""
+    @staticmethod
+    def _encode_message(html_content: str, sender_email: str, title: Optional[str] = None) -> bytes:
+        """宛先以外のヘッダーと本文を一度だけMIMEエンコード
+
+        sendmail は bytes の改行を変換しないため、SMTP ポリシーで行末を CRLF にしておく。
+        """
+        msg = MIMEMultipart(policy=policy.SMTP)
+        msg['From'] = sender_email
+        msg['Subject'] = f"🤖 {title or 'AI News Summary'} - {datetime.now().strftime('%Y-%m-%d')}"
+        msg['Date'] = formatdate(localtime=True)
+        msg['Message-ID'] = make_msgid()
+        msg.attach(MIMEText(html_content, 'html', 'utf-8', policy=policy.SMTP))
+        return msg.as_bytes()
+
+    def _send_with_retry(self, pool: SMTPConnectionPool, sender: str, envelope_recipients: List[str],
+                         to_header: str, encoded_message: bytes) -> DeliveryResult:
+        """1通を送信（接続切れ・一時エラーは再接続して再試行）
+
+        一部の宛先だけが拒否された場合は成功とし、拒否された宛先を refused に入れる。
+        再接続の失敗も1回の試行として数えて再試行し、SMTPFatalError（認証失敗・サーバーに届かない）は再試行しない。
+        """
+        message = f"To: {to_header}\r\n".encode('utf-8') + encoded_message
+        error = None
+        for attempt in range(1, self.MAX_SEND_ATTEMPTS + 1):
+            try:
+                refused = pool.get().sendmail(sender, envelope_recipients, message)
+                return DeliveryResult(to_header, True, attempt, refused={
+                    recipient: f"{code} {reason!r}" for recipient, (code, reason) in refused.items()
+                })
+            except SMTPFatalError as e:
+                return DeliveryResult(to_header, False, attempt, str(e))
+            except smtplib.SMTPRecipientsRefused as e:
+                return DeliveryResult(to_header, False, attempt, str(e.recipients))
+            except smtplib.SMTPResponseException as e:
+                error = f"{e.smtp_code} {e.smtp_error!r}"
+                if e.smtp_code < 400 or e.smtp_code >= 500:
+                    # 恒久的エラーは再試行しない
+                    return DeliveryResult(to_header, False, attempt, error)
+                pool.discard()
+            except (smtplib.SMTPException, OSError) as e:
+                # 接続切れなど：接続を作り直して再試行
+                error = str(e)
+                pool.discard()
+            if attempt < self.MAX_SEND_ATTEMPTS:
+                time.sleep(self.RETRY_DELAY * attempt)
+        return DeliveryResult(to_header, False, self.MAX_SEND_ATTEMPTS, error)
+
+    def send_email_summary(self, summary: str, recipient_emails: List[str],
+                          news_items: List, config: EmailConfig = None,
+                          on_result: Callable[[DeliveryResult], None] = None,
+                          title: Optional[str] = None) -> Optional[DeliveryReport]:
+        """テンプレートを使って複数の宛先にHTMLメールを送信（本文は一度だけ生成し、複数接続で並列送信）
+        
+        on_result を渡すと、宛先ごとの送信結果が確定するたびに呼び出す（送信スレッドから呼ばれる）。
+        title はトピックプロファイルの件名・見出し（省略時はAIニュース要約）。
+        """
         # 設定の優先順位: 引数 > インスタンス変数
         email_config = config or self.config
-        
+
         if not email_config:
             raise ValueError("EmailConfigが設定されていません")
-            
+
         if not recipient_emails:
             print("送信先メールアドレスが指定されていません")
-            return
-            
+            return None
+
+        start = time.monotonic()
+        report = DeliveryReport()
         try:
-            html_content = self._create_html_content(summary, news_items)
-
-            # SMTP接続を一度だけ確立
-            server = smtplib.SMTP(email_config.smtp_server, email_config.smtp_port)
-            server.starttls()
-            server.login(email_config.sender_email, email_config.sender_password)
-            
-            success_count = 0
-            failed_recipients = []
-            
-            # 各受信者に個別にメール送信
-            for recipient_email in recipient_emails:
-                try:
-                    # メール構築
-                    msg = MIMEMultipart()
-                    msg['From'] = email_config.sender_email
-                    msg['To'] = recipient_email
-                    msg['Subject'] = f"🤖 AI News Summary - {datetime.now().strftime('%Y-%m-%d')}"
-                    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
-
-                    # 個別送信
-                    server.send_message(msg)
-                    success_count += 1
-                    print(f"メール送信成功: {recipient_email}")
-                    
-                except Exception as e:
-                    failed_recipients.append(recipient_email)
-                    print(f"メール送信失敗 ({recipient_email}): {e}")
-            
-            server.quit()
-            
-            print(f"メール送信完了: 成功 {success_count}件, 失敗 {len(failed_recipients)}件")
-            if failed_recipients:
-                print(f"送信失敗した宛先: {', '.join(failed_recipients)}")
-            
+            html_content = self._create_html_content(summary, news_items, title=title)
+            encoded_message = self._encode_message(html_content, email_config.sender_email, title)
         except Exception as e:
-            print(f"メール送信エラー (SMTP接続): {e}")
+            print(f"メール作成エラー: {e}")
+            report.results = [DeliveryResult(recipient, False, 0, str(e)) for recipient in recipient_emails]
+            return report
+
+        # 送信単位の作成: BCCバッチ or 宛先ごと
+        if email_config.bcc_batch_size > 0:
+            size = email_config.bcc_batch_size
+            jobs = [
+                (recipient_emails[i:i + size], "undisclosed-recipients:;")
+                for i in range(0, len(recipient_emails), size)
+            ]
+        else:
+            jobs = [([recipient], recipient) for recipient in recipient_emails]
+
+        pool = SMTPConnectionPool(email_config)
+        workers = max(1, min(email_config.max_connections, len(jobs)))
+
+        def deliver(job) -> List[DeliveryResult]:
+            envelope_recipients, to_header = job
+            result = self._send_with_retry(
+                pool, email_config.sender_email, envelope_recipients, to_header, encoded_message
+            )
+            # BCC送信で拒否された宛先だけを失敗にする（再送時に受信済みの宛先へ重複送信しないため）
+            results = [
+                DeliveryResult(recipient, False, result.attempts, f"拒否された宛先: {result.refused[recipient]}")
+                if recipient in result.refused else
+                DeliveryResult(recipient, result.success, result.attempts, result.error)
+                for recipient in envelope_recipients
+            ]
+            if on_result:
+                for recipient_result in results:
+                    try:
+                        on_result(recipient_result)
+                    except Exception as e:
+                        print(f"送信結果の記録エラー ({recipient_result.recipient}): {e}")
+            return results
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp") as executor:
+                for results in executor.map(deliver, jobs):
+                    report.results.extend(results)
+        finally:
+            pool.close_all()
+        report.elapsed = time.monotonic() - start
+        if pool.fatal_error is not None:
+            print(f"メール送信を中止しました: {pool.fatal_error}")
+
+        for result in report.results:
+            if result.success:
+                print(f"メール送信成功: {result.recipient}")
+            else:
+                print(f"メール送信失敗 ({result.recipient}): {result.error}")
+
+        print(f"メール送信完了: 成功 {report.success_count}件, 失敗 {len(report.failed_recipients)}件 "
+              f"({report.elapsed:.1f}秒)")
+        if report.failed_recipients:
+            print(f"送信失敗した宛先: {', '.join(report.failed_recipients)}")
+        return report
 
     @staticmethod
     def get_email_config_from_env() -> EmailConfig:
@@ -96,7 +318,10 @@ class EmailHandler:
             smtp_server=os.getenv('SMTP_SERVER'),
             smtp_port=int(os.getenv('SMTP_PORT', '587')),
             sender_email=os.getenv('EMAIL_ADDRESS'),
-            sender_password=os.getenv('EMAIL_PASSWORD')
+            sender_password=os.getenv('EMAIL_PASSWORD'),
+            max_connections=int(os.getenv('SMTP_MAX_CONNECTIONS', '4')),
+            bcc_batch_size=int(os.getenv('EMAIL_BCC_BATCH_SIZE', '0')),
+            use_starttls=os.getenv('SMTP_STARTTLS', 'true').lower() == 'true'
         )
 
     @staticmethod
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import pickle
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from feed_parser import ParsedFeed
+
+
+@dataclass
+class CachedFeed:
+    url: str
+    etag: Optional[str]
+    modified: Optional[str]
+    feed: ParsedFeed
+
+
+class FeedCache:
+    """ETag / Last-Modified を保持し、条件付きGETで未更新フィードを再利用する"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._memory: Dict[str, CachedFeed] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pickle")
+
+    def get(self, url: str) -> Optional[CachedFeed]:
+        """キャッシュ済みのフィードを取得（メモリ → ディスクの順）"""
+        with self._lock:
+            if url in self._memory:
+                return self._memory[url]
+        try:
+            with open(self._path(url), 'rb') as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"フィードキャッシュの読み込みエラー ({url}): {e}")
+            return None
+        if not isinstance(cached.feed, ParsedFeed):
+            # 旧形式（feedparserの解析結果）は使わず、取得し直して上書きする
+            return None
+        with self._lock:
+            self._memory[url] = cached
+        return cached
+
+    def put(self, url: str, etag: Optional[str], modified: Optional[str],
+            feed: ParsedFeed):
+        """検証子が得られたフィードを保存（一時ファイル経由で置き換え）"""
+        if not etag and not modified:
+            return
+        cached = CachedFeed(url=url, etag=etag, modified=modified, feed=feed)
+        with self._lock:
+            self._memory[url] = cached
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(url)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"フィードキャッシュの書き込みエラー ({url}): {e}")
+
+    @staticmethod
+    def conditional_headers(cached: Optional[CachedFeed]) -> Dict[str, str]:
+        """条件付きGET用のリクエストヘッダーを作成"""
+        headers = {}
+        if cached is None:
+            return headers
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.modified:
+            headers['If-Modified-Since'] = cached.modified
+        return headers
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, float]:
+        """ヒット/ミスの集計"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
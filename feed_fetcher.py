@@ -0,0 +1,163 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Iterator, List, Optional
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from feed_cache import FeedCache
+from feed_parser import FeedFormatError, ParsedFeed, StreamingFeedParser, parse_with_feedparser
+
+
+@dataclass
+class FeedResult:
+    url: str
+    feed: Optional[ParsedFeed] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    bytes_downloaded: int = 0
+    not_modified: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.feed is not None and self.error is None
+
+
+class FeedFetcher:
+    """複数のRSSフィードを並列に取得・解析する
+
+    ダウンロードしながら StreamingFeedParser で逐次解析し、締め切りより古い記事に達した
+    時点で接続を閉じる。ストリーミング解析できないフィードは全体を読んで feedparser で解析する。
+    """
+
+    DEFAULT_MAX_WORKERS = 16
+    DEFAULT_CONNECT_TIMEOUT = 5  # seconds
+    DEFAULT_READ_TIMEOUT = 15  # seconds
+    MAX_FEED_BYTES = 10 * 1024 * 1024
+    CHUNK_SIZE = 64 * 1024  # 1回の読み込みの上限（届いた分だけ返すため、少しずつ届く場合はもっと小さい）
+    USER_AGENT = "ai_news_collector (+https://github.com/HayatoFunahashi/ai_news)"
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 session: requests.Session = None,
+                 cache: FeedCache = None):
+        self.max_workers = max(1, max_workers)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.cache = cache
+        self.session = session or self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        """ワーカー数に合わせた接続プール付きのセッションを作成"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = self.USER_AGENT
+        return session
+
+    def _download(self, url: str, headers: dict = None,
+                  parser: StreamingFeedParser = None) -> requests.Response:
+        """フィードをダウンロード（読み込み全体にも締め切りを設ける）
+        
+        ソケットから届いた分だけを読み（read1）、受信のたびに締め切りを確認する。
+        チャンクが埋まるまで待たないため、少しずつ送り続けるサーバーでも締め切りで打ち切れる。
+        parser を渡すとチャンクごとに解析し、解析が打ち切られたら残りは読まない。
+        """
+        deadline = time.monotonic() + self.connect_timeout + self.read_timeout
+        response = self.session.get(
+            url,
+            headers=headers,
+            timeout=(self.connect_timeout, self.read_timeout),
+            stream=True
+        )
+        try:
+            response.raise_for_status()
+            if response.status_code == 304:
+                return response
+            chunks = []
+            size = 0
+            while True:
+                try:
+                    chunk = response.raw.read1(self.CHUNK_SIZE, decode_content=True)
+                except (urllib3.exceptions.HTTPError, OSError) as e:
+                    raise requests.exceptions.ConnectionError(f"読み込みに失敗しました: {e}") from e
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.MAX_FEED_BYTES:
+                    raise ValueError(f"フィードサイズが上限を超えました ({size} bytes)")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"読み込みが{self.read_timeout}秒以内に完了しませんでした")
+                if parser is not None and parser.feed(chunk):
+                    break
+            response._content = b''.join(chunks)
+            return response
+        finally:
+            response.close()
+
+    def fetch_one(self, url: str, cutoff: Optional[datetime] = None) -> FeedResult:
+        """1フィードを取得・解析（例外はFeedResultに閉じ込める）
+        
+        cutoff（UTCのnaive datetime）以前の記事は結果に含めない。
+        """
+        start = time.monotonic()
+        try:
+            cached = self.cache.get(url) if self.cache else None
+            if cached is not None and cached.feed.cutoff is not None \
+                    and (cutoff is None or cutoff < cached.feed.cutoff):
+                # キャッシュには今回より新しい締め切りで絞り込んだ記事しかないため取得し直す
+                cached = None
+            parser = StreamingFeedParser(cutoff)
+            response = self._download(url, FeedCache.conditional_headers(cached), parser)
+            
+            # 未更新ならダウンロード・解析を省略してキャッシュを再利用
+            if response.status_code == 304 and cached is not None:
+                self.cache.record_hit()
+                return FeedResult(
+                    url=url,
+                    feed=cached.feed,
+                    elapsed=time.monotonic() - start,
+                    not_modified=True
+                )
+            
+            headers = {key.lower(): value for key, value in response.headers.items()}
+            try:
+                feed = parser.close()
+            except FeedFormatError:
+                feed = parse_with_feedparser(response.content, headers, cutoff)
+            if self.cache:
+                self.cache.record_miss()
+                self.cache.put(url, headers.get('etag'), headers.get('last-modified'), feed)
+            return FeedResult(
+                url=url,
+                feed=feed,
+                elapsed=time.monotonic() - start,
+                bytes_downloaded=len(response.content)
+            )
+        except Exception as e:
+            return FeedResult(url=url, error=str(e), elapsed=time.monotonic() - start)
+
+    def fetch_all(self, urls: List[str], cutoff: Optional[datetime] = None) -> List[FeedResult]:
+        """全フィードを並列に取得（結果は入力順）"""
+        if not urls:
+            return []
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed") as executor:
+            return list(executor.map(partial(self.fetch_one, cutoff=cutoff), urls))
+
+    def iter_fetch(self, urls: List[str], cutoff: Optional[datetime] = None) -> Iterator[FeedResult]:
+        """取得が完了したフィードから順に返す（ストリーミング処理用）"""
+        if not urls:
+            return
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed") as executor:
+            futures = [executor.submit(self.fetch_one, url, cutoff) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
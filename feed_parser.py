@@ -0,0 +1,209 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from xml.etree import ElementTree
+
+
+class FeedFormatError(ValueError):
+    """ストリーミング解析できないフィード（壊れたXML・RSS/Atom以外）"""
+
+
+@dataclass
+class FeedEntry:
+    title: str
+    link: str
+    published: Optional[datetime]  # UTCのnaive datetime（日付がなければNone）
+    summary: str
+
+
+@dataclass
+class ParsedFeed:
+    title: str
+    entries: List[FeedEntry] = field(default_factory=list)
+    cutoff: Optional[datetime] = None  # これ以前の記事は含まれていない
+    truncated: bool = False  # 締め切りより古い記事に達して読み込みを打ち切ったか
+    parser: str = "stream"
+
+
+def parse_feed_date(text: Optional[str]) -> Optional[datetime]:
+    """RFC 822（RSS）/ ISO 8601（Atom）の日付をUTCのnaive datetimeに変換
+
+    タイムゾーンのない日付はUTCとみなす。解析できなければNone。
+    """
+    text = (text or '').strip()
+    if not text:
+        return None
+    try:
+        value = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        try:
+            value = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _text(element) -> str:
+    return ''.join(element.itertext()).strip()
+
+
+class StreamingFeedParser:
+    """RSS 2.0 / RSS 1.0 / Atom を逐次解析し、NewsItem に必要な項目だけを取り出す
+
+    ダウンロードしたチャンクを feed() に渡すと、読み終えた記事から順に要素を破棄する。
+    新しい順に並んだフィードで締め切り（cutoff）より古い記事が EARLY_STOP_AFTER 件続いたら
+    done になり、残りは読まずに打ち切れる。途中で一度でも日付が逆順になったフィードは打ち切らない。
+    """
+
+    EARLY_STOP_AFTER = 5
+    ROOT_ELEMENTS = ('rss', 'feed', 'RDF')
+    ENTRY_ELEMENTS = ('item', 'entry')
+    FEED_ELEMENTS = ('channel', 'feed')
+    DATE_ELEMENTS = ('pubDate', 'published', 'date', 'issued')
+    UPDATED_ELEMENTS = ('updated', 'modified')
+    SUMMARY_ELEMENTS = ('description', 'summary')
+    CONTENT_ELEMENTS = ('encoded', 'content')
+
+    def __init__(self, cutoff: Optional[datetime] = None):
+        self.cutoff = cutoff
+        self.done = False
+        self.error: Optional[str] = None
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._stack: List = []
+        self._title: Optional[str] = None
+        self._entries: List[FeedEntry] = []
+        self._previous: Optional[datetime] = None
+        self._sorted = True
+        self._old_in_row = 0
+
+    def feed(self, data: bytes) -> bool:
+        """チャンクを解析し、これ以上読む必要がなくなったらTrueを返す
+
+        解析に失敗した場合は error を設定し、以降のチャンクは無視する。
+        """
+        if self.done or self.error is not None:
+            return self.done
+        try:
+            self._parser.feed(data)
+            self._handle_events()
+        except (ElementTree.ParseError, FeedFormatError) as e:
+            self.error = str(e)
+        return self.done
+
+    def close(self) -> ParsedFeed:
+        """解析結果を返す（解析できなかった場合は FeedFormatError）"""
+        if self.error is None and not self.done:
+            try:
+                self._parser.close()
+                self._handle_events()
+            except (ElementTree.ParseError, FeedFormatError) as e:
+                self.error = str(e)
+        if self.error is not None:
+            raise FeedFormatError(self.error)
+        return ParsedFeed(title=self._title or 'Unknown', entries=self._entries,
+                          cutoff=self.cutoff, truncated=self.done)
+
+    def _handle_events(self):
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if not self._stack and _local_name(element.tag) not in self.ROOT_ELEMENTS:
+                    raise FeedFormatError(f"RSS/Atomではありません: <{_local_name(element.tag)}>")
+                self._stack.append(element)
+                continue
+            self._stack.pop()
+            name = _local_name(element.tag)
+            parent = _local_name(self._stack[-1].tag) if self._stack else None
+            if name in self.ENTRY_ELEMENTS:
+                self._add_entry(element)
+                # 読み終えた記事は木から外してメモリを解放
+                element.clear()
+                if self._stack:
+                    self._stack[-1].remove(element)
+                if self.done:
+                    return
+            elif name == 'title' and parent in self.FEED_ELEMENTS and self._title is None:
+                self._title = _text(element)
+
+    def _add_entry(self, element):
+        fields: Dict[str, str] = {}
+        link = None
+        guid = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == 'link':
+                href = child.get('href')
+                if href is None:
+                    link = link or _text(child)
+                elif child.get('rel', 'alternate') == 'alternate' and link is None:
+                    link = href
+            elif name == 'guid' and child.get('isPermaLink', 'true') != 'false':
+                guid = _text(child)
+            elif not fields.get(name):
+                fields[name] = _text(child)
+
+        published = self._first_date(fields, self.DATE_ELEMENTS) or self._first_date(fields, self.UPDATED_ELEMENTS)
+        if published is not None:
+            self._track_order(published)
+            if self.cutoff is not None and published <= self.cutoff:
+                return
+
+        summary = next((fields[name] for name in self.SUMMARY_ELEMENTS + self.CONTENT_ELEMENTS
+                        if fields.get(name)), '')
+        self._entries.append(FeedEntry(
+            title=fields.get('title', ''),
+            link=link or (guid if guid and guid.startswith('http') else ''),
+            published=published,
+            summary=summary
+        ))
+
+    @staticmethod
+    def _first_date(fields: Dict[str, str], names) -> Optional[datetime]:
+        for name in names:
+            if fields.get(name):
+                value = parse_feed_date(fields[name])
+                if value is not None:
+                    return value
+        return None
+
+    def _track_order(self, published: datetime):
+        """新しい順に並んでいる限り、締め切りより古い記事が続いたら打ち切る"""
+        if self._previous is not None and published > self._previous:
+            self._sorted = False
+        self._previous = published
+        if self.cutoff is None:
+            return
+        self._old_in_row = self._old_in_row + 1 if published <= self.cutoff else 0
+        if self._sorted and self._old_in_row >= self.EARLY_STOP_AFTER:
+            self.done = True
+
+
+def parse_with_feedparser(data: bytes, headers: Optional[Dict[str, str]] = None,
+                          cutoff: Optional[datetime] = None) -> ParsedFeed:
+    """feedparser で全体を解析（壊れたフィード向けのフォールバック）"""
+    import feedparser
+
+    parsed = feedparser.parse(data, response_headers=headers or {})
+    if parsed.bozo and not parsed.entries:
+        raise ValueError(f"フィードを解析できません: {parsed.get('bozo_exception')}")
+    entries = []
+    for entry in parsed.entries:
+        # *_parsed はUTCに正規化済み
+        date_struct = entry.get('published_parsed') or entry.get('updated_parsed')
+        published = datetime(*date_struct[:6]) if date_struct else None
+        if cutoff is not None and published is not None and published <= cutoff:
+            continue
+        entries.append(FeedEntry(
+            title=entry.get('title', ''),
+            link=entry.get('link', ''),
+            published=published,
+            summary=entry.get('summary', entry.get('description', ''))
+        ))
+    return ParsedFeed(title=parsed.feed.get('title', 'Unknown'), entries=entries,
+                      cutoff=cutoff, parser="feedparser")
@@ -0,0 +1,122 @@
+import math
+import random
+import statistics
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+
+@dataclass
+class FeedSchedule:
+    url: str
+    interval: float  # 現在の巡回間隔（秒）
+    next_poll: float  # 次に巡回する時刻（time.time() と同じ基準の秒）
+    failures: int = 0  # 連続失敗回数
+    polls: int = 0
+    new_items: int = 0
+
+
+class FeedScheduler:
+    """フィードごとの巡回間隔を、そのフィードの更新頻度から適応的に決める
+
+    - 取得に成功した: 対象期間内の記事の公開間隔（中央値）g から sqrt(g × REFERENCE_INTERVAL) にする。
+      公開間隔に比例させるより頻繁なフィードを相対的に多く巡回し、記事あたりの取得遅延を小さくできる
+      （REFERENCE_INTERVAL ごとに更新されるフィードはちょうどその間隔で巡回する）
+    - 記事が少なく公開間隔が分からず、新着もなかった（304を含む）: 間隔を IDLE_BACKOFF 倍に延ばす
+    - 取得に失敗した: 間隔は変えず、FAILURE_BACKOFF の連続失敗回数乗だけ次回を遅らせる
+
+    間隔は [min_interval, max_interval] に収め、巡回が同じ時刻に集中しないよう
+    JITTER の割合だけ揺らす。時刻はすべて呼び出し側が渡す（シミュレーションでも使えるように）。
+    """
+
+    DEFAULT_MIN_INTERVAL = 5 * 60  # seconds
+    DEFAULT_MAX_INTERVAL = 6 * 3600  # seconds
+    INITIAL_INTERVAL = 30 * 60  # seconds
+    REFERENCE_INTERVAL = 20 * 60  # seconds
+    IDLE_BACKOFF = 1.5
+    FAILURE_BACKOFF = 2.0
+    JITTER = 0.1
+
+    def __init__(self, feeds: Iterable[str], now: float,
+                 min_interval: float = DEFAULT_MIN_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_INTERVAL,
+                 seed: Optional[int] = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._random = random.Random(seed)
+        # 起動直後に全フィードを1回巡回し、その結果から間隔を決める
+        self.schedules: Dict[str, FeedSchedule] = {
+            url: FeedSchedule(url=url, interval=self._clamp(self.INITIAL_INTERVAL), next_poll=now)
+            for url in dict.fromkeys(feeds)
+        }
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + self._random.uniform(-self.JITTER, self.JITTER))
+
+    def due(self, now: float) -> List[str]:
+        """巡回時刻を過ぎたフィード"""
+        return [url for url, schedule in self.schedules.items() if schedule.next_poll <= now]
+
+    def next_poll_time(self) -> Optional[float]:
+        """最も早い次回巡回時刻（フィードがなければNone）"""
+        return min((schedule.next_poll for schedule in self.schedules.values()), default=None)
+
+    @staticmethod
+    def publish_interval(published: Iterable[datetime]) -> Optional[float]:
+        """記事の公開間隔の中央値（秒、日時が2種類未満ならNone）"""
+        times = sorted(set(published))
+        if len(times) < 2:
+            return None
+        return statistics.median((later - earlier).total_seconds() for earlier, later in zip(times, times[1:]))
+
+    def record_success(self, url: str, now: float, new_items: int, published: Iterable[datetime] = ()):
+        """巡回に成功した（published はフィードにある対象期間内の記事の公開日時）"""
+        schedule = self.schedules[url]
+        schedule.failures = 0
+        schedule.polls += 1
+        schedule.new_items += new_items
+        observed = self.publish_interval(published)
+        if observed is not None:
+            schedule.interval = self._clamp(math.sqrt(observed * self.REFERENCE_INTERVAL))
+        elif not new_items:
+            schedule.interval = self._clamp(schedule.interval * self.IDLE_BACKOFF)
+        schedule.next_poll = now + self._jittered(schedule.interval)
+
+    def record_failure(self, url: str, now: float):
+        """巡回に失敗した（連続失敗回数に応じて指数的に待つ）"""
+        schedule = self.schedules[url]
+        schedule.failures += 1
+        schedule.polls += 1
+        delay = min(self.max_interval, schedule.interval * self.FAILURE_BACKOFF ** schedule.failures)
+        schedule.next_poll = now + self._jittered(delay)
+
+
+def parse_digest_times(text: str) -> List[time]:
+    """"07:00,19:00" 形式のダイジェスト作成時刻を解析（昇順、重複は除く）"""
+    times = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            hour, minute = part.split(':')
+            times.add(time(int(hour), int(minute)))
+        except ValueError:
+            raise ValueError(f"ダイジェスト時刻は HH:MM 形式で指定してください: {part}")
+    if not times:
+        raise ValueError("ダイジェスト時刻が指定されていません")
+    return sorted(times)
+
+
+def next_digest_time(times: List[time], now: datetime) -> datetime:
+    """now より後で最も近いダイジェスト作成日時（times と now は同じタイムゾーンのnaive）"""
+    for days in (0, 1):
+        day = now.date() + timedelta(days=days)
+        for digest_time in times:
+            candidate = datetime.combine(day, digest_time)
+            if candidate > now:
+                return candidate
+    raise ValueError("ダイジェスト時刻が指定されていません")
@@ -0,0 +1,82 @@
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordMatcher:
+    """キーワード照合器
+
+    文書の小文字化は1回だけ行い、部分文字列検索で候補を絞ってから、
+    キーワードごとに事前コンパイルした正規表現で語境界を確認する。
+    前は常に英数字でないことを求め、"said" の中の "ai" のような単語の一部への一致は除外する。
+    後ろは、最後の語が SHORT_WORD_LENGTH 文字以下のキーワード（AI・LLM・GPU など）だけ
+    複数形（s/es）に続く語境界を求め（"aim" や "air" は除外）、それより長いキーワードは
+    複数形・派生語・複合語（"neural networks"・"autonomously"・"chipmaker"）にも一致させる。
+    """
+
+    SHORT_WORD_LENGTH = 3
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._needles: List[Tuple[str, re.Pattern, str]] = [
+            (
+                keyword.lower(),
+                self._compile(keyword.lower()),
+                keyword
+            )
+            for keyword in self.keywords if keyword
+        ]
+
+    @classmethod
+    def _compile(cls, needle: str) -> re.Pattern:
+        """語境界付きのパターンを作成
+
+        先頭の語境界チェックをリテラルの後ろに置くことで、正規表現エンジンの
+        リテラル接頭辞による高速スキャンが効くようにしている。
+        """
+        literal = re.escape(needle)
+        last_word = needle.rsplit(' ', 1)[-1]
+        suffix = r"(?:s|es)?(?![a-z0-9])" if len(last_word) <= cls.SHORT_WORD_LENGTH else ""
+        return re.compile(rf"{literal}(?<![a-z0-9]{literal}){suffix}")
+
+    @staticmethod
+    def _prepare(texts: Tuple[str, ...]) -> str:
+        # 改行で連結し、タイトルと本文をまたぐ一致を防ぐ
+        return '\n'.join(text for text in texts if text).lower()
+
+    def matches(self, *texts: str) -> bool:
+        """いずれかのキーワードを含むか（最初の一致で打ち切り）"""
+        text = self._prepare(texts)
+        # 部分文字列が無ければ正規表現は使わない（関数呼び出しを避けるため内包表記で展開）
+        return any(needle in text and pattern.search(text) for needle, pattern, _ in self._needles)
+
+    def count_columns(self, texts: List[str]) -> List[Dict[int, int]]:
+        """複数文書でのキーワードごとの出現回数を疎な列（{文書の添字: 回数}）で返す
+
+        全文書を小文字化して改行で連結し、キーワードごとに1回だけ走査してから、
+        一致位置を二分探索で文書に割り当てる（語境界は matches と同じ）。
+        """
+        lowered = [text.lower() if text else '' for text in texts]
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + 1
+        corpus = '\n'.join(lowered)
+        columns = []
+        for needle, pattern, _ in self._needles:
+            column: Dict[int, int] = {}
+            if needle in corpus:
+                for match in pattern.finditer(corpus):
+                    index = bisect_right(starts, match.start()) - 1
+                    column[index] = column.get(index, 0) + 1
+            columns.append(column)
+        return columns
+
+    def matched_keywords(self, *texts: str) -> List[str]:
+        """一致したキーワードをキーワード定義順で返す"""
+        text = self._prepare(texts)
+        return [
+            keyword for needle, pattern, keyword in self._needles
+            if needle in text and pattern.search(text)
+        ]
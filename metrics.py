@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class RunMetrics:
+    """1回の実行の計測値（ステージ時間・フィード・Claude呼び出し・キャッシュ・メール）"""
+
+    PROMETHEUS_PREFIX = "ai_news"
+    TOKEN_TYPES = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.feeds: List[Dict] = []
+        self.claude: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'requests': 0, 'errors': 0, 'latency_seconds': 0.0,
+                     **{token_type: 0 for token_type in self.TOKEN_TYPES}}
+        )
+        self.caches: Dict[str, Dict[str, float]] = {}
+        self.email: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """with文で囲んだ区間の経過時間をステージ時間として記録（同名は加算）"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def set_count(self, name: str, value: int):
+        with self._lock:
+            self.counts[name] = value
+
+    def record_feed(self, url: str, latency: float, bytes_downloaded: int, ok: bool,
+                    not_modified: bool = False):
+        with self._lock:
+            self.feeds.append({
+                'url': url,
+                'latency_seconds': round(latency, 4),
+                'bytes': bytes_downloaded,
+                'ok': ok,
+                'not_modified': not_modified
+            })
+
+    def record_claude_call(self, label: str, latency: float, usage=None, error: bool = False):
+        with self._lock:
+            entry = self.claude[label]
+            entry['requests'] += 1
+            entry['latency_seconds'] += latency
+            if error:
+                entry['errors'] += 1
+            for token_type in self.TOKEN_TYPES:
+                entry[token_type] += getattr(usage, token_type, None) or 0
+
+    def set_cache_stats(self, name: str, stats: Dict[str, float]):
+        with self._lock:
+            self.caches[name] = dict(stats)
+
+    def record_email(self, sent: int, failed: int, elapsed: float):
+        with self._lock:
+            self.email = {
+                'sent': sent,
+                'failed': failed,
+                'elapsed_seconds': round(elapsed, 4),
+                'per_second': round(sent / elapsed, 2) if elapsed > 0 else 0.0
+            }
+
+    def claude_totals(self) -> Dict[str, float]:
+        """ラベルをまたいだClaude呼び出しの合計"""
+        with self._lock:
+            totals = defaultdict(float)
+            for entry in self.claude.values():
+                for key, value in entry.items():
+                    totals[key] += value
+            return dict(totals)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'stages': {name: round(value, 4) for name, value in self.stages.items()},
+                'counts': dict(self.counts),
+                'feeds': list(self.feeds),
+                'feed_bytes_total': sum(feed['bytes'] for feed in self.feeds),
+                'claude': {label: dict(entry) for label, entry in self.claude.items()},
+                'caches': dict(self.caches),
+                'email': dict(self.email)
+            }
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def to_prometheus(self) -> str:
+        """node_exporter の textfile collector 形式で出力"""
+        data = self.to_dict()
+        prefix = self.PROMETHEUS_PREFIX
+        lines: List[str] = []
+
+        def metric(name: str, help_text: str, samples: List[tuple], metric_type: str = "gauge"):
+            if not samples:
+                return
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{self._escape(val)}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+        metric("run_timestamp_seconds", "Run start time (unix seconds)", [({}, data['started_at'])])
+        metric("stage_seconds", "Wall time per pipeline stage",
+               [({'stage': name}, value) for name, value in data['stages'].items()])
+        metric("items", "Item counts at pipeline checkpoints",
+               [({'stage': name}, value) for name, value in data['counts'].items()])
+        metric("feed_latency_seconds", "Fetch latency per feed",
+               [({'feed': feed['url']}, feed['latency_seconds']) for feed in data['feeds']])
+        metric("feed_up", "Whether the feed was fetched successfully",
+               [({'feed': feed['url']}, int(feed['ok'])) for feed in data['feeds']])
+        # 以下は実行ごとに数え直す値のため、単調増加の counter ではなく gauge とし、_total は付けない
+        metric("feed_bytes", "Bytes downloaded from feeds in the run", [({}, data['feed_bytes_total'])])
+        metric("claude_requests", "Claude API requests in the run",
+               [({'call': label}, entry['requests']) for label, entry in data['claude'].items()])
+        metric("claude_errors", "Claude API requests that failed in the run",
+               [({'call': label}, entry['errors']) for label, entry in data['claude'].items()])
+        metric("claude_latency_seconds", "Summed Claude API latency in the run",
+               [({'call': label}, round(entry['latency_seconds'], 4)) for label, entry in data['claude'].items()])
+        metric("claude_tokens", "Claude API tokens in the run",
+               [({'call': label, 'type': token_type}, entry[token_type])
+                for label, entry in data['claude'].items() for token_type in self.TOKEN_TYPES])
+        metric("cache_hit_ratio", "Cache hit ratio",
+               [({'cache': name}, round(stats.get('hit_rate', 0.0), 4)) for name, stats in data['caches'].items()])
+        if data['email']:
+            metric("emails_sent", "Emails delivered in the run", [({}, data['email']['sent'])])
+            metric("emails_failed", "Emails that failed in the run", [({}, data['email']['failed'])])
+            metric("emails_per_second", "Email delivery throughput", [({}, data['email']['per_second'])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        if prometheus_path:
+            # textfile collector が書きかけのファイルを読まないよう、一時ファイルから置き換える
+            tmp_path = f"{prometheus_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, prometheus_path)
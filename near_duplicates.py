@@ -0,0 +1,140 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Sequence, Set
+
+
+class NearDuplicateClusterer:
+    """MinHash + LSH による近似重複記事のクラスタリング
+
+    各記事のシングル（英数字は単語、日本語などの分かち書きしない文字は1文字を1トークンとした
+    n-gram）からMinHash署名を作り、バンド分割したLSHバケットで
+    候補ペアだけを比較するため、記事数に対してほぼ線形に処理できる。
+    署名はワンパーミュテーション・ハッシング（ハッシュ値をビンに振り分けて
+    ビンごとの最小値を取り、空きビンは隣のビンから補完する）で作るため、
+    シングル数に比例するコストで済む。トークンが1つもない記事は署名を作らず、どの記事とも統合しない。
+    """
+
+    # ひらがな・カタカナ・CJK統合漢字・ハングル・半角カナ
+    CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff66-\uff9f'
+    TOKEN_PATTERN = re.compile(rf'[{CJK_CHARS}]|(?:(?![{CJK_CHARS}])[^\W_])+')
+    ASCII_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')  # ASCIIのみの文書では TOKEN_PATTERN と同じ結果で高速
+    EMPTY_BIN = 1 << 64
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3,
+                 threshold: float = 0.5, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm は bands で割り切れる必要があります")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self._salt = seed.to_bytes(8, 'little')
+
+    def _shingles(self, text: str) -> Set[int]:
+        """トークンn-gramを64bitハッシュに変換（トークンがなければ空集合）"""
+        text = text.lower()
+        pattern = self.ASCII_TOKEN_PATTERN if text.isascii() else self.TOKEN_PATTERN
+        tokens = pattern.findall(text)
+        if not tokens:
+            return set()
+        size = min(self.shingle_size, len(tokens))
+        return {
+            int.from_bytes(
+                hashlib.blake2b(
+                    ' '.join(tokens[i:i + size]).encode('utf-8'), digest_size=8, salt=self._salt
+                ).digest(),
+                'little'
+            )
+            for i in range(len(tokens) - size + 1)
+        }
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """MinHash署名（シングルがなければNone）"""
+        shingles = self._shingles(text)
+        if not shingles:
+            return None
+        bins = [self.EMPTY_BIN] * self.num_perm
+        for shingle in shingles:
+            index, value = shingle % self.num_perm, shingle // self.num_perm
+            if value < bins[index]:
+                bins[index] = value
+        
+        # 空きビンは右隣の埋まったビンの値で補完（距離ごとにずらして偶然の一致を避ける）
+        signature = list(bins)
+        for index in range(self.num_perm):
+            if bins[index] != self.EMPTY_BIN:
+                continue
+            for distance in range(1, self.num_perm):
+                neighbor = bins[(index + distance) % self.num_perm]
+                if neighbor != self.EMPTY_BIN:
+                    signature[index] = neighbor + distance * self.EMPTY_BIN
+                    break
+        return signature
+
+    @staticmethod
+    def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """署名から推定したJaccard係数"""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+    def cluster(self, texts: List[str]) -> List[List[int]]:
+        """近似重複のグループ（入力インデックスのリスト）を返す。重複の無い記事は単独のグループになる"""
+        signatures = [self.signature(text) for text in texts]
+        parent = list(range(len(texts)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(self.bands):
+            buckets: Dict[tuple, List[int]] = defaultdict(list)
+            start = band * self.rows
+            for i, sig in enumerate(signatures):
+                if sig is not None:
+                    buckets[tuple(sig[start:start + self.rows])].append(i)
+            for members in buckets.values():
+                first = members[0]
+                for other in members[1:]:
+                    root_a, root_b = find(first), find(other)
+                    if root_a == root_b:
+                        continue
+                    if self.similarity(signatures[first], signatures[other]) >= self.threshold:
+                        parent[root_b] = root_a
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(texts)):
+            groups[find(i)].append(i)
+        return list(groups.values())
+
+
+class IncrementalNearDuplicateIndex:
+    """記事を1件ずつ追加しながら近似重複を判定するLSHインデックス（ストリーミング処理用）"""
+
+    def __init__(self, clusterer: NearDuplicateClusterer):
+        self.clusterer = clusterer
+        self._signatures: Dict[Hashable, List[int]] = {}
+        self._buckets: List[Dict[tuple, List[Hashable]]] = [
+            defaultdict(list) for _ in range(clusterer.bands)
+        ]
+
+    def find_or_add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """既存の近似重複があればそのキーを返し、無ければ登録してNoneを返す（署名がない記事は登録しない）"""
+        signature = self.clusterer.signature(text)
+        if signature is None:
+            return None
+        rows = self.clusterer.rows
+        band_keys = [
+            tuple(signature[band * rows:(band + 1) * rows])
+            for band in range(self.clusterer.bands)
+        ]
+        for buckets, band_key in zip(self._buckets, band_keys):
+            for candidate in buckets.get(band_key, ()):
+                if self.clusterer.similarity(signature, self._signatures[candidate]) >= self.clusterer.threshold:
+                    return candidate
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets[band_key].append(key)
+        return None
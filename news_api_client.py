@@ -0,0 +1,127 @@
+import time
+from typing import Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import TokenBucket
+
+
+class NewsAPIClient:
+    """NewsAPI /v2/everything のクライアント（接続プール・OR結合クエリ・ページング対応）"""
+
+    BASE_URL = "https://newsapi.org/v2/everything"
+    MAX_QUERY_LENGTH = 500  # NewsAPIのqパラメータ上限
+    DEFAULT_REQUESTS_PER_MINUTE = 60
+    DEFAULT_TIMEOUT = (5, 15)  # (connect, read) seconds
+    MAX_RETRIES = 2
+
+    def __init__(self, api_key: str, base_url: str = BASE_URL, page_size: int = 100,
+                 max_pages: int = 1, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 session: requests.Session = None, timeout=DEFAULT_TIMEOUT):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.limiter = TokenBucket(requests_per_minute, capacity=max(1, requests_per_minute / 6))
+        self.session = session or self._create_session()
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @classmethod
+    def build_queries(cls, keywords: List[str], max_length: int = MAX_QUERY_LENGTH) -> List[str]:
+        """キーワードを "a" OR "b" 形式でまとめ、上限長ごとに分割"""
+        queries = []
+        current = ""
+        for keyword in keywords:
+            term = f'"{keyword}"' if ' ' in keyword else keyword
+            candidate = f"{current} OR {term}" if current else term
+            if current and len(candidate) > max_length:
+                queries.append(current)
+                candidate = term
+            current = candidate
+        if current:
+            queries.append(current)
+        return queries
+
+    @staticmethod
+    def _header_float(response: requests.Response, name: str):
+        try:
+            return float(response.headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _respect_quota(self, response: requests.Response):
+        """クォータ系ヘッダーを見て、残りが無ければリセットまで待機"""
+        remaining = self._header_float(response, 'X-RateLimit-Remaining')
+        reset = self._header_float(response, 'X-RateLimit-Reset')
+        if remaining is not None and remaining <= 0 and reset:
+            # epoch秒か残り秒数のどちらでも受け付ける
+            wait = reset - time.time() if reset > 1e9 else reset
+            if wait > 0:
+                print(f"NewsAPIのクォータ待ち: {wait:.0f}秒")
+                time.sleep(wait)
+
+    def _get(self, params: Dict) -> Dict:
+        """レート制限・429再試行付きのGET"""
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.limiter.acquire()
+            response = self.session.get(
+                self.base_url,
+                params=params,
+                headers={'X-Api-Key': self.api_key},
+                timeout=self.timeout
+            )
+            if response.status_code == 429 and attempt < self.MAX_RETRIES:
+                wait = self._header_float(response, 'Retry-After')
+                if wait is None:
+                    wait = 2 ** attempt
+                print(f"NewsAPIレート制限: {wait:.0f}秒後に再試行")
+                time.sleep(wait)
+                continue
+            self._respect_quota(response)
+            data = response.json()
+            if data.get('status') != 'ok':
+                raise RuntimeError(f"NewsAPI error: {data.get('code')} {data.get('message')}")
+            return data
+        raise RuntimeError("NewsAPI: 再試行回数を超えました")
+
+    def search(self, query: str, from_date: str) -> List[Dict]:
+        """1クエリ分の記事をページングしながら取得"""
+        articles = []
+        for page in range(1, self.max_pages + 1):
+            data = self._get({
+                'q': query,
+                'from': from_date,
+                'sortBy': 'publishedAt',
+                'language': 'en',
+                'pageSize': self.page_size,
+                'page': page
+            })
+            batch = data.get('articles', [])
+            articles.extend(batch)
+            if len(batch) < self.page_size or len(articles) >= data.get('totalResults', 0):
+                break
+        return articles
+
+    def search_keywords(self, keywords: List[str], from_date: str) -> List[Dict]:
+        """全キーワードを検索し、URLで重複を除いた記事を返す"""
+        seen_urls = set()
+        articles = []
+        for query in self.build_queries(keywords):
+            try:
+                for article in self.search(query, from_date):
+                    url = article.get('url')
+                    if url and url not in seen_urls:
+                        seen_urls.add(url)
+                        articles.append(article)
+            except Exception as e:
+                print(f"Error collecting news for query '{query}': {e}")
+        return articles
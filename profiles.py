@@ -0,0 +1,87 @@
+import json
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional
+
+from keyword_matcher import KeywordMatcher
+
+NEWS_API_SOURCE = "newsapi"  # NewsAPI から取得した記事の取得元
+
+
+@dataclass
+class TopicProfile:
+    """1トピック分の設定（フィルタキーワード・プロンプト・フィード・宛先）
+
+    feeds を省略するとコレクターの既定フィードを使い、news_api_keywords が空のプロファイルには
+    NewsAPI の記事を配らない。プロンプトを省略するとコレクターの既定の指示を使う。
+    """
+    name: str
+    filter_keywords: List[str]
+    news_api_keywords: List[str] = field(default_factory=list)
+    feeds: List[str] = field(default_factory=list)
+    recipients: List[str] = field(default_factory=list)
+    title: Optional[str] = None  # メールの件名・見出し
+    summary_instructions: Optional[str] = None  # 個別要約の固定指示
+    overall_instructions: Optional[str] = None  # 全体要約の固定指示
+    top_k: Optional[int] = None  # 個別要約に回す記事数の上限（省略時はコレクターの既定値）
+
+
+def load_profiles(path: str) -> List[TopicProfile]:
+    """{"profiles": [...]} 形式のJSONからプロファイルを読み込む"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    known = {item.name for item in fields(TopicProfile)}
+    profiles = []
+    for entry in data.get('profiles', []):
+        unknown = set(entry) - known
+        if unknown:
+            raise ValueError(f"プロファイル {entry.get('name')} に不明な項目があります: {', '.join(sorted(unknown))}")
+        profile = TopicProfile(**entry)
+        if not profile.filter_keywords:
+            raise ValueError(f"プロファイル {profile.name} の filter_keywords が空です")
+        profiles.append(profile)
+    names = [profile.name for profile in profiles]
+    if len(set(names)) != len(names):
+        raise ValueError(f"プロファイル名が重複しています: {', '.join(names)}")
+    if not profiles:
+        raise ValueError(f"プロファイルが定義されていません: {path}")
+    return profiles
+
+
+class ProfileMatcher:
+    """全プロファイルのフィルタを1回の走査で評価する
+
+    全プロファイルのキーワードをまとめた KeywordMatcher で記事を1回だけ走査し、
+    一致したキーワードと取得元をもとに各プロファイルへ振り分ける。
+    """
+
+    def __init__(self, profiles: List[TopicProfile]):
+        self.profiles = profiles
+        self._matcher = KeywordMatcher(
+            keyword for profile in profiles for keyword in profile.filter_keywords
+        )
+        self._keywords = {profile.name: set(profile.filter_keywords) for profile in profiles}
+        self._feeds = {profile.name: set(profile.feeds) for profile in profiles}
+
+    def _accepts(self, profile: TopicProfile, source: Optional[str]) -> bool:
+        if source is None:
+            return True
+        if source == NEWS_API_SOURCE:
+            return bool(profile.news_api_keywords)
+        return source in self._feeds[profile.name]
+
+    def match(self, source: Optional[str], *texts: str) -> Dict[str, List[str]]:
+        """記事が対象となるプロファイル名と、そのプロファイルで一致したキーワード
+
+        source はフィードURL（NewsAPI は NEWS_API_SOURCE、取得元で絞らない場合はNone）。
+        """
+        matched = self._matcher.matched_keywords(*texts)
+        if not matched:
+            return {}
+        result = {}
+        for profile in self.profiles:
+            if not self._accepts(profile, source):
+                continue
+            keywords = [keyword for keyword in matched if keyword in self._keywords[profile.name]]
+            if keywords:
+                result[profile.name] = keywords
+        return result
@@ -0,0 +1,110 @@
+import html
+import re
+from html.parser import HTMLParser
+from typing import List
+
+
+class _TextExtractor(HTMLParser):
+    """HTMLから本文テキストだけを取り出す（script/style等は捨てる）"""
+
+    SKIP_TAGS = {'script', 'style', 'noscript', 'iframe', 'svg', 'figure'}
+    BLOCK_TAGS = {'p', 'br', 'div', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'tr'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+# RSSでよく付加される定型文
+BOILERPLATE_PATTERNS = [
+    re.compile(r'The post .{1,300}? appeared first on .{1,200}?\.?\s*$', re.IGNORECASE | re.DOTALL),
+    # 行頭か文末の直後から始まる、本文末尾の短い誘導文だけを消す（文中の "can read more about" は残す）
+    re.compile(r'(?:^|(?<=[\n.!?…\]):]))[ \t]*(?:Continue reading|Read more|Read the full (?:story|article))\b'
+               r'[^\n]{0,80}\s*$', re.IGNORECASE),
+    re.compile(r'\[(?:…|\.\.\.|&#8230;)\]'),
+]
+WHITESPACE = re.compile(r'[ \t\r\f\v]+')
+BLANK_LINES = re.compile(r'\n\s*\n+')
+
+
+def strip_markup(text: str) -> str:
+    """HTMLタグ・エンティティ・定型文を除去し、空白を整える"""
+    if not text:
+        return ''
+    if '<' in text:
+        extractor = _TextExtractor()
+        try:
+            extractor.feed(text)
+            extractor.close()
+            text = ''.join(extractor.parts)
+        except Exception:
+            text = re.sub(r'<[^>]+>', ' ', text)
+    text = html.unescape(text)
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub('', text)
+    text = WHITESPACE.sub(' ', text)
+    text = BLANK_LINES.sub('\n', text)
+    return '\n'.join(line.strip() for line in text.split('\n')).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（英数字は約4文字で1トークン、日本語などは1文字1トークン）"""
+    if not text:
+        return 0
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """トークン予算に収まるよう末尾を切り詰める（可能なら文・単語の区切りで切る）"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # 二分探索で予算に収まる最長の接頭辞を求める
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    boundary = max(cut.rfind('. '), cut.rfind('。'), cut.rfind('\n'))
+    if boundary < len(cut) * 0.6:
+        boundary = cut.rfind(' ')
+    if boundary >= len(cut) * 0.6:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + ' …'
+
+
+def pack_into_chunks(texts: List[str], max_tokens: int) -> List[List[str]]:
+    """テキストを順番を保ったまま、各グループがトークン予算に収まるように分割"""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """1分あたりの補充量で制御するトークンバケット"""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.capacity = capacity or rate_per_minute
+        self._rate_per_sec = rate_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self._rate_per_sec * 60.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate_per_sec)
+        self._updated = now
+
+    def set_rate(self, rate_per_minute: float):
+        with self._lock:
+            self._refill()
+            self._rate_per_sec = rate_per_minute / 60.0
+
+    def acquire(self, amount: float = 1.0):
+        """必要量が貯まるまで待機して消費（容量を超える要求は容量に丸める）"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self._rate_per_sec
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter:
+    """リクエスト数・トークン数の2つのバケットを持ち、429/過負荷時に送信レートを下げる"""
+
+    DECREASE_FACTOR = 0.5
+    RECOVERY_FACTOR = 1.05
+    MIN_FRACTION = 0.1
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.max_requests_per_minute = requests_per_minute
+        self.max_tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._fraction = 1.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _apply_fraction(self):
+        self.requests.set_rate(self.max_requests_per_minute * self._fraction)
+        self.tokens.set_rate(self.max_tokens_per_minute * self._fraction)
+
+    def acquire(self, estimated_tokens: int = 0):
+        """送信前に呼び出し、レート制限内に収まるまで待機"""
+        with self._lock:
+            pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+        self.requests.acquire(1)
+        if estimated_tokens:
+            self.tokens.acquire(estimated_tokens)
+
+    def on_success(self):
+        """成功時は少しずつ本来のレートへ戻す"""
+        with self._lock:
+            if self._fraction >= 1.0:
+                return
+            self._fraction = min(1.0, self._fraction * self.RECOVERY_FACTOR)
+            self._apply_fraction()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """429/過負荷を受けたらレートを下げ、retry-after の間は全体の送信を止める"""
+        with self._lock:
+            self._fraction = max(self.MIN_FRACTION, self._fraction * self.DECREASE_FACTOR)
+            self._apply_fraction()
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
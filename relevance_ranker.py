@@ -0,0 +1,99 @@
+import math
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from keyword_matcher import KeywordMatcher
+
+
+class RelevanceRanker:
+    """記事を重要度スコアで並べ替え、個別要約に回す記事を選ぶ
+
+    スコア = (1 + キーワードのTF-IDF) × ソース重み × 新しさ × (1 + log(クラスタサイズ))
+
+    - TF-IDF: キーワードごとの出現回数（タイトルは TITLE_WEIGHT 倍）を 1 + log(tf) で抑え、
+      一括で渡した記事集合の中での出現記事数から求めた IDF を掛けて合計する
+    - 新しさ: 公開からの経過時間に対する半減期 half_life_hours の指数減衰
+    - クラスタサイズ: 近似重複として統合された他ソースの数（citations）+ 1
+
+    出現回数は全記事を連結した文書をキーワードごとに1回だけ走査して疎な列として求め、
+    IDF・重み付けは列ごとにまとめて計算する（一致しない記事は計算しない）。
+    """
+
+    TITLE_WEIGHT = 2
+
+    def __init__(self, keywords: Iterable[str], source_weights: Optional[Dict[str, float]] = None,
+                 half_life_hours: float = 12.0, default_source_weight: float = 1.0):
+        self.matcher = KeywordMatcher(keywords)
+        self.source_weights = source_weights or {}
+        self.half_life_hours = half_life_hours
+        self.default_source_weight = default_source_weight
+
+    def _term_columns(self, items: List) -> List[Dict[int, float]]:
+        """キーワードごとの疎な列 {記事の添字: 出現回数}（タイトルは TITLE_WEIGHT 倍）"""
+        title_columns = self.matcher.count_columns([item.title for item in items])
+        content_columns = self.matcher.count_columns([item.content for item in items])
+        columns = []
+        for title_column, content_column in zip(title_columns, content_columns):
+            column = dict(content_column)
+            for index, count in title_column.items():
+                column[index] = column.get(index, 0) + count * self.TITLE_WEIGHT
+            columns.append(column)
+        return columns
+
+    def relevance(self, items: List) -> List[float]:
+        """キーワードに対するTF-IDFの合計（IDFは渡された記事集合から計算）"""
+        total = len(items)
+        relevance = [0.0] * total
+        for column in self._term_columns(items):
+            if not column:
+                continue
+            idf = math.log((1 + total) / (1 + len(column))) + 1
+            for index, tf in column.items():
+                relevance[index] += (1 + math.log(tf)) * idf
+        return relevance
+
+    def _log_weight(self, source: str) -> float:
+        weight = self.source_weights.get(source, self.default_source_weight)
+        return math.log(weight) if weight > 0 else float('-inf')
+
+    def scores(self, items: List, now: Optional[datetime] = None) -> List[float]:
+        """記事ごとの重要度スコアの対数（published はUTCのnaive datetime）
+
+        古い記事でも新しさの項がアンダーフローして同点にならないよう、積ではなく対数の和で計算する。
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        decay = math.log(2) / (self.half_life_hours * 3600)
+        return [
+            math.log1p(relevance)
+            + self._log_weight(item.source)
+            - decay * max(0.0, (now - item.published).total_seconds())
+            + math.log1p(math.log1p(len(item.citations)))
+            for item, relevance in zip(items, self.relevance(items))
+        ]
+
+    def rank(self, items: List, now: Optional[datetime] = None) -> List:
+        """スコアの高い順（同点は新しい順）"""
+        scores = self.scores(items, now)
+        order = sorted(range(len(items)), key=lambda i: (scores[i], items[i].published), reverse=True)
+        return [items[i] for i in order]
+
+    def select(self, items: List, top_k: Optional[int] = None, token_budget: Optional[int] = None,
+               cost: Optional[Callable[[object], int]] = None, now: Optional[datetime] = None) -> List:
+        """スコアの高い順に top_k 件まで、cost の合計が token_budget に収まる記事を選ぶ
+
+        予算に収まらない記事は飛ばして次の記事を試す。戻り値はスコアの高い順。
+        """
+        ranked = self.rank(items, now)
+        if top_k is not None:
+            ranked = ranked[:top_k]
+        if token_budget is None or cost is None:
+            return ranked
+        selected = []
+        used = 0
+        for item in ranked:
+            item_cost = cost(item)
+            if used + item_cost > token_budget:
+                continue
+            selected.append(item)
+            used += item_cost
+        return selected
@@ -0,0 +1,312 @@
+"""実行結果のアーカイブ（実行・記事・要約・メトリクスをSQLiteに追記保存）
+
+    python3 run_archive.py runs --since 2026-09-01
+    python3 run_archive.py export --keyword NVIDIA --since 2026-09-01 > nvidia.jsonl
+    python3 run_archive.py import ai_news_*.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+
+class RunArchive:
+    """追記専用の実行アーカイブ
+
+    本文・要約・メトリクスはzlib圧縮して保存し、日付・ソース・URL・キーワードには
+    インデックスを張るため、過去の全実行を読み込まずに検索・エクスポートできる。
+    """
+
+    COMPRESSION_LEVEL = 6
+    EXPORT_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                news_count INTEGER NOT NULL,
+                summary BLOB,
+                metrics BLOB
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL REFERENCES runs(run_id),
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                source TEXT,
+                published TEXT,
+                content BLOB,
+                summary BLOB,
+                citations TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published);
+            CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source, published);
+            CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url);
+            CREATE INDEX IF NOT EXISTS idx_articles_run ON articles(run_id);
+            CREATE TABLE IF NOT EXISTS article_keywords (
+                keyword TEXT NOT NULL,
+                published TEXT,
+                article_id INTEGER NOT NULL REFERENCES articles(id),
+                PRIMARY KEY (keyword, published, article_id)
+            ) WITHOUT ROWID;
+        """)
+
+    @classmethod
+    def _compress(cls, text: Optional[str]) -> Optional[bytes]:
+        if text is None:
+            return None
+        return zlib.compress(text.encode('utf-8'), cls.COMPRESSION_LEVEL)
+
+    @staticmethod
+    def _decompress(blob: Optional[bytes]) -> Optional[str]:
+        if blob is None:
+            return None
+        return zlib.decompress(blob).decode('utf-8')
+
+    @staticmethod
+    def format_time(value) -> Optional[str]:
+        """日時を並べ替え可能な文字列に揃える（タイムゾーン付きはUTCに変換）"""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def save_run(self, run_id: str, summary: str, news_items: List,
+                 individual_summaries: Optional[List[str]] = None, metrics: Optional[Dict] = None,
+                 created_at: Optional[datetime] = None):
+        """1回分の実行結果を1トランザクションで追記"""
+        individual_summaries = individual_summaries or [None] * len(news_items)
+        created = self.format_time(created_at or datetime.now())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, created_at, news_count, summary, metrics) VALUES (?, ?, ?, ?, ?)",
+                (run_id, created, len(news_items), self._compress(summary),
+                 self._compress(json.dumps(metrics, ensure_ascii=False)) if metrics is not None else None)
+            )
+            for item, item_summary in zip(news_items, individual_summaries):
+                published = self.format_time(item.published)
+                cursor = self._conn.execute(
+                    "INSERT INTO articles (run_id, url, title, source, published, content, summary, citations) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, item.url, item.title, item.source, published,
+                     self._compress(item.content), self._compress(item_summary),
+                     json.dumps([list(citation) for citation in item.citations], ensure_ascii=False))
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO article_keywords (keyword, published, article_id) VALUES (?, ?, ?)",
+                    [(keyword.lower(), published, cursor.lastrowid) for keyword in item.matched_keywords]
+                )
+
+    def update_metrics(self, run_id: str, metrics: Dict):
+        """メール送信後などに実行メトリクスを差し替える"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET metrics = ? WHERE run_id = ?",
+                (self._compress(json.dumps(metrics, ensure_ascii=False)), run_id)
+            )
+
+    def _run_row(self, row) -> Dict:
+        run_id, created_at, news_count, summary, metrics = row
+        metrics = self._decompress(metrics)
+        return {
+            'run_id': run_id,
+            'created_at': created_at,
+            'news_count': news_count,
+            'summary': self._decompress(summary),
+            'metrics': json.loads(metrics) if metrics else None
+        }
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, created_at, news_count, summary, metrics FROM runs WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+        return self._run_row(row) if row else None
+
+    def list_runs(self, since=None, until=None) -> List[Dict]:
+        """期間内の実行を新しい順に返す（要約・メトリクスは含めない）"""
+        clauses, params = self._range('created_at', since, until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT run_id, created_at, news_count FROM runs {where} ORDER BY created_at DESC",
+                params
+            ).fetchall()
+        return [{'run_id': run_id, 'created_at': created_at, 'news_count': count}
+                for run_id, created_at, count in rows]
+
+    def _range(self, column: str, since, until):
+        clauses, params = [], []
+        if since is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(self.format_time(since))
+        if until is not None:
+            clauses.append(f"{column} < ?")
+            params.append(self.format_time(until))
+        return clauses, params
+
+    def _article_query(self, since=None, until=None, source: str = None, url: str = None,
+                       keyword: str = None, run_id: str = None):
+        columns = "a.id, a.run_id, a.url, a.title, a.source, a.published, a.content, a.summary, a.citations"
+        if keyword:
+            # キーワード→期間の複合主キーで絞り込む
+            clauses, params = self._range('k.published', since, until)
+            clauses.insert(0, "k.keyword = ?")
+            params.insert(0, keyword.lower())
+            sql = f"SELECT {columns} FROM article_keywords k JOIN articles a ON a.id = k.article_id"
+        else:
+            clauses, params = self._range('a.published', since, until)
+            sql = f"SELECT {columns} FROM articles a"
+        for column, value in (('a.source', source), ('a.url', url), ('a.run_id', run_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if clauses:
+            sql += f" WHERE {' AND '.join(clauses)}"
+        return sql, params
+
+    def find_articles(self, since=None, until=None, source: str = None, url: str = None,
+                      keyword: str = None, run_id: str = None, limit: int = None) -> Iterator[Dict]:
+        """条件に合う記事を公開日の新しい順に逐次返す（キーワードは大文字小文字を区別しない）"""
+        sql, params = self._article_query(since, until, source, url, keyword, run_id)
+        order = "k.published" if keyword else "a.published"
+        sql += f" ORDER BY {order} DESC, a.id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        # 全件を一度に読み込まず、一定件数ずつ取り出す
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(self.EXPORT_BATCH_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                article_id, run_id_, url_, title, source_, published, content, summary, citations = row
+                yield {
+                    'run_id': run_id_,
+                    'url': url_,
+                    'title': title,
+                    'source': source_,
+                    'published': published,
+                    'content': self._decompress(content),
+                    'summary': self._decompress(summary),
+                    'citations': [
+                        {'source': source_name, 'url': citation_url}
+                        for source_name, citation_url in json.loads(citations or '[]')
+                    ]
+                }
+
+    def export_jsonl(self, out: TextIO, **filters) -> int:
+        """条件に合う記事を1行1記事のJSONで書き出し、件数を返す"""
+        count = 0
+        for article in self.find_articles(**filters):
+            out.write(json.dumps(article, ensure_ascii=False))
+            out.write('\n')
+            count += 1
+        return count
+
+    def import_legacy_files(self, paths: Iterable[str]) -> int:
+        """旧形式の ai_news_{timestamp}.json / ai_news_summary_{timestamp}.txt を取り込む"""
+        imported = 0
+        for path in paths:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                run_id = data['timestamp']
+                if self.get_run(run_id) is not None:
+                    continue
+                items = [
+                    _LegacyItem(
+                        title=item['title'],
+                        url=item['url'],
+                        published=item.get('published'),
+                        source=item.get('source'),
+                        citations=[(c['source'], c['url']) for c in item.get('citations', [])]
+                    )
+                    for item in data.get('news_items', [])
+                ]
+                self.save_run(run_id, data.get('summary', ''), items,
+                              created_at=datetime.strptime(run_id, '%Y%m%d_%H%M%S'))
+                imported += 1
+            except Exception as e:
+                print(f"取り込みエラー ({path}): {e}")
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _LegacyItem:
+    """旧形式のJSONから復元した記事（本文・キーワードは保存されていない）"""
+
+    def __init__(self, title: str, url: str, published, source: str, citations: list):
+        self.title = title
+        self.url = url
+        self.published = published
+        self.source = source
+        self.content = None
+        self.citations = citations
+        self.matched_keywords = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI News の実行アーカイブを検索・エクスポート")
+    parser.add_argument('--db', default="ai_news_archive.sqlite3", help="アーカイブのパス")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runs_parser = commands.add_parser('runs', help="実行の一覧")
+    export_parser = commands.add_parser('export', help="記事をJSONLで標準出力へ書き出し")
+    for sub in (runs_parser, export_parser):
+        sub.add_argument('--since', help="開始日時（ISO形式、例: 2026-09-01）")
+        sub.add_argument('--until', help="終了日時（この日時を含まない）")
+    export_parser.add_argument('--source')
+    export_parser.add_argument('--url')
+    export_parser.add_argument('--keyword')
+    export_parser.add_argument('--run-id')
+    export_parser.add_argument('--limit', type=int)
+    import_parser = commands.add_parser('import', help="旧形式のJSONファイルを取り込み")
+    import_parser.add_argument('paths', nargs='+')
+    args = parser.parse_args()
+
+    archive = RunArchive(args.db)
+    try:
+        if args.command == 'runs':
+            for run in archive.list_runs(args.since, args.until):
+                print(f"{run['run_id']}\t{run['created_at']}\t{run['news_count']}件")
+        elif args.command == 'export':
+            start = time.monotonic()
+            count = archive.export_jsonl(
+                sys.stdout, since=args.since, until=args.until, source=args.source,
+                url=args.url, keyword=args.keyword, run_id=args.run_id, limit=args.limit
+            )
+            print(f"{count}件をエクスポートしました ({time.monotonic() - start:.2f}秒)", file=sys.stderr)
+        elif args.command == 'import':
+            print(f"{archive.import_legacy_files(args.paths)}件の実行を取り込みました")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+
+class RunCheckpoint:
+    """実行途中の各ステージの出力を保存し、中断した実行を再開できるようにする
+
+    ステージは STAGES の順に進み、完了したステージのデータ（記事一覧・全体要約）と
+    記事ごとの個別要約・宛先ごとの配信結果は完了した時点で1件ずつ記録する。
+    """
+
+    STAGES = ('started', 'collected', 'filtered', 'summarized', 'overall', 'archived', 'delivered')
+    DEFAULT_RETENTION_DAYS = 7
+
+    def __init__(self, db_path: str, retention_days: int = DEFAULT_RETENTION_DAYS):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoint_runs (
+                run_id TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                options TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_checkpoint_runs_updated ON checkpoint_runs(updated_at);
+            CREATE TABLE IF NOT EXISTS checkpoint_data (
+                run_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (run_id, stage)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_summaries (
+                run_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_deliveries (
+                run_id TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                PRIMARY KEY (run_id, recipient)
+            );
+        """)
+        self.prune()
+
+    def start(self, run_id: str, options: Optional[Dict] = None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO checkpoint_runs (run_id, stage, options, created_at, updated_at) "
+                "VALUES (?, 'started', ?, ?, ?)",
+                (run_id, json.dumps(options or {}), now, now)
+            )
+
+    def stage(self, run_id: str) -> Optional[str]:
+        """最後に完了したステージ（記録がなければNone）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stage FROM checkpoint_runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, run_id: str, stage: str) -> bool:
+        """指定ステージまで完了済みか"""
+        current = self.stage(run_id)
+        return current is not None and self.STAGES.index(current) >= self.STAGES.index(stage)
+
+    def complete(self, run_id: str, stage: str, data=None):
+        """ステージの完了を記録（data はJSON化して圧縮保存）"""
+        with self._lock, self._conn:
+            if data is not None:
+                blob = zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoint_data (run_id, stage, data) VALUES (?, ?, ?)",
+                    (run_id, stage, blob)
+                )
+            self._conn.execute(
+                "UPDATE checkpoint_runs SET stage = ?, updated_at = ? WHERE run_id = ?",
+                (stage, time.time(), run_id)
+            )
+
+    def load(self, run_id: str, stage: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM checkpoint_data WHERE run_id = ? AND stage = ?", (run_id, stage)
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0]).decode('utf-8')) if row else None
+
+    def save_summary(self, run_id: str, url: str, summary: str):
+        """記事1件分の個別要約を記録（要約スレッドから呼ばれる）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_summaries (run_id, url, summary) VALUES (?, ?, ?)",
+                (run_id, url, summary)
+            )
+
+    def summaries(self, run_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, summary FROM checkpoint_summaries WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def record_delivery(self, run_id: str, recipient: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO checkpoint_deliveries (run_id, recipient) VALUES (?, ?)",
+                (run_id, recipient)
+            )
+
+    def delivered(self, run_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recipient FROM checkpoint_deliveries WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def latest_incomplete(self) -> Optional[str]:
+        """最後まで完了していない最新の実行ID"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id FROM checkpoint_runs WHERE stage != ? ORDER BY updated_at DESC LIMIT 1",
+                (self.STAGES[-1],)
+            ).fetchone()
+        return row[0] if row else None
+
+    def prune(self):
+        """保持期間を過ぎた実行の記録を削除"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock, self._conn:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT run_id FROM checkpoint_runs WHERE updated_at < ?", (cutoff,)
+            )]
+            for table in ('checkpoint_data', 'checkpoint_summaries', 'checkpoint_deliveries', 'checkpoint_runs'):
+                self._conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", [(run_id,) for run_id in expired])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class SummaryCache:
+    """記事要約の永続キャッシュ（モデル・プロンプト版・記事内容のハッシュをキーにする）"""
+
+    DEFAULT_TTL_DAYS = 14
+    DEFAULT_MAX_ENTRIES = 50000
+    EVICTION_BATCH_RATIO = 0.05  # 上限を超えたら上限のこの割合だけ余分に削除し、削除の頻度を下げる
+
+    def __init__(self, db_path: str, ttl_days: float = DEFAULT_TTL_DAYS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._count = 0  # 行数（起動時と evict() で数え直し、put() で増やす）
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used);
+            CREATE INDEX IF NOT EXISTS idx_summaries_created_at ON summaries(created_at);
+        """)
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, title: str, content: str, url: str) -> str:
+        """キャッシュキーを作成"""
+        payload = json.dumps([model, prompt_version, title, content, url], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """有効期限内の要約を取得"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, summary: str):
+        """要約を保存（上限を超えたら最近使われていない順にまとめて削除）"""
+        now = time.time()
+        with self._lock, self._conn:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO summaries (key, summary, created_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, summary, now, now)
+            ).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                self._conn.execute(
+                    "UPDATE summaries SET summary = ?, created_at = ?, last_used = ? WHERE key = ?",
+                    (summary, now, now, key)
+                )
+            if self._count > self.max_entries:
+                self._evict_over_capacity()
+
+    def _evict_over_capacity(self):
+        """上限を超えていれば、上限の EVICTION_BATCH_RATIO 分の余裕ができるまで削除（行数も数え直す）"""
+        self._count = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        if self._count > self.max_entries:
+            target = self.max_entries - int(self.max_entries * self.EVICTION_BATCH_RATIO)
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key IN "
+                "(SELECT key FROM summaries ORDER BY last_used ASC LIMIT ?)",
+                (self._count - target,)
+            )
+            self._count = target
+
+    def evict(self):
+        """期限切れおよび上限超過のエントリを削除"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            self._evict_over_capacity()
+
+    def stats(self) -> Dict[str, float]:
+        """ヒット率の集計"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,76 @@
+import types
+from datetime import datetime
+
+import pytest
+
+from ai_news_collector import AINewsCollector, NewsItem
+from batch_summarizer import BatchBackend, BatchResult, BatchSummarizer
+from rate_limiter import AdaptiveRateLimiter
+
+
+def usage(input_tokens: int, output_tokens: int):
+    return types.SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens,
+                                 cache_creation_input_tokens=0, cache_read_input_tokens=0)
+
+
+class LocalBatchBackend(BatchBackend):
+    """投入した要求をすぐに完了させる（fail に含まれる custom_id は失敗させる）"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.requests = {}
+
+    def submit(self, requests):
+        self.requests = {request['custom_id']: request for request in requests}
+        return "batch-1"
+
+    def is_done(self, batch_id):
+        return True
+
+    def results(self, batch_id):
+        return {custom_id: BatchResult() if custom_id in self.fail else BatchResult(f"要約 {custom_id}", usage(100, 20))
+                for custom_id in self.requests}
+
+
+class SyncMessages:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text="同期要約")], usage=usage(90, 10))
+
+
+def test_backend_must_implement_interface():
+    class Incomplete(BatchBackend):
+        def submit(self, requests):
+            return "batch"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_missing_results_are_failures():
+    backend = LocalBatchBackend()
+    backend.results = lambda batch_id: {}
+    results = BatchSummarizer(backend, poll_interval=0).run([{'custom_id': "item-0", 'params': {}}])
+    assert results == {"item-0": BatchResult()}
+
+
+def test_batch_usage_is_recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    collector = AINewsCollector("test-key", batch_mode=True)
+    collector.rate_limiter = AdaptiveRateLimiter(1e12, 1e12)
+    collector.client = types.SimpleNamespace(messages=SyncMessages())
+    collector.batch_backend = LocalBatchBackend(fail={"item-2"})
+    items = [NewsItem(title=f"AI news {i}", url=f"https://example.com/{i}", published=datetime(2026, 10, 17),
+                      content="machine learning", source="example") for i in range(3)]
+
+    summaries = collector.summarize_all_in_batch(items)
+
+    assert summaries == ["要約 item-0", "要約 item-1", "同期要約"]
+    batch = collector.metrics.claude["summarize_batch"]
+    assert (batch['requests'], batch['errors'], batch['input_tokens'], batch['output_tokens']) == (3, 1, 200, 40)
+    totals = collector.metrics.claude_totals()
+    # 失敗した記事の同期呼び出しも合計に含まれる
+    assert (totals['input_tokens'], totals['output_tokens']) == (290, 50)
@@ -0,0 +1,79 @@
+import types
+
+import anthropic
+import pytest
+
+import ai_news_collector
+from ai_news_collector import AINewsCollector
+from rate_limiter import AdaptiveRateLimiter
+
+# SDKの例外が参照する属性だけを持つリクエスト・レスポンス
+REQUEST = types.SimpleNamespace(method="POST", url="https://api.anthropic.com/v1/messages")
+
+
+def status_error(status: int) -> anthropic.APIStatusError:
+    response = types.SimpleNamespace(status_code=status, headers={}, request=REQUEST)
+    return anthropic.APIStatusError(f"status {status}", response=response, body=None)
+
+
+class FlakyMessages:
+    """指定したエラーを順に送出してから成功するメッセージAPI"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text="ok")], usage=None)
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ai_news_collector.time, 'sleep', lambda seconds: None)
+    collector = AINewsCollector("test-key")
+    collector.rate_limiter = AdaptiveRateLimiter(1e12, 1e12)
+    return collector
+
+
+def create(collector, errors):
+    messages = FlakyMessages(errors)
+    collector.client = types.SimpleNamespace(messages=messages)
+    response = collector._create_message(model="m", max_tokens=10,
+                                         messages=[{"role": "user", "content": "hi"}])
+    return response, messages
+
+
+@pytest.mark.parametrize("error", [
+    anthropic.APIConnectionError(request=REQUEST),
+    anthropic.APITimeoutError(request=REQUEST),
+    status_error(500),
+    status_error(502),
+    status_error(529),
+    status_error(429),
+])
+def test_transient_errors_are_retried(collector, error):
+    response, messages = create(collector, [error])
+
+    assert response.content[0].text == "ok"
+    assert messages.calls == 2
+
+
+@pytest.mark.parametrize("status", [400, 401, 404])
+def test_client_errors_are_not_retried(collector, status):
+    with pytest.raises(anthropic.APIStatusError):
+        create(collector, [status_error(status)])
+
+    assert collector.client.messages.calls == 1
+
+
+def test_gives_up_after_max_retries(collector):
+    errors = [status_error(500)] * (AINewsCollector.CLAUDE_MAX_RETRIES + 1)
+
+    with pytest.raises(anthropic.APIStatusError):
+        create(collector, errors)
+
+    assert collector.client.messages.calls == AINewsCollector.CLAUDE_MAX_RETRIES + 1
@@ -0,0 +1,175 @@
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+import email_handler
+from ai_news_collector import AINewsCollector, NewsItem
+from email_handler import DeliveryReport, DeliveryResult
+from profiles import TopicProfile
+from rate_limiter import AdaptiveRateLimiter
+
+
+def news(title: str) -> NewsItem:
+    return NewsItem(title=title, url=f"https://example.com/{title.replace(' ', '-')}",
+                    published=datetime.now() - timedelta(hours=1), content=title, source="example")
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    collector = AINewsCollector("test-key")
+    monkeypatch.setattr(collector, 'summarize_single_news', lambda item, **kwargs: f"要約: {item.title}")
+    monkeypatch.setattr(collector, '_print_usage', lambda: None)
+    return collector
+
+
+def test_profile_overall_failure_keeps_articles_unprocessed(collector, monkeypatch):
+    profiles = [TopicProfile(name="ok", filter_keywords=["robot"]),
+                TopicProfile(name="broken", filter_keywords=["chip"], overall_instructions="fail")]
+    items = [news("robot arm"), news("chip fab"), news("robot chip")]
+    monkeypatch.setattr(collector, '_collect_for_profiles', lambda profiles, hours_back=24: [(None, items)])
+
+    def overall(summaries, instructions=None):
+        return collector.OVERALL_SUMMARY_ERROR if instructions == "fail" else "全体要約"
+    monkeypatch.setattr(collector, 'summarize_overall', overall)
+
+    result = collector.run_profile_collection(profiles)
+
+    assert result == {"ok": "全体要約", "broken": collector.OVERALL_SUMMARY_ERROR}
+    # 全体要約に失敗したプロファイルの記事は次回も対象になる（両方に属する記事も含む）
+    assert [item.title for item in collector.article_index.filter_new(items)] == ["chip fab", "robot chip"]
+    runs = [run['run_id'] for run in collector.archive.list_runs()]
+    assert len(runs) == 1 and runs[0].endswith("_ok")
+
+
+class FakeEmailHandler:
+    """send_email_summary の結果を fail（全宛先）と refused（宛先ごと）に従って返すメール送信"""
+
+    fail = False
+    refused = set()
+    sent = []
+
+    def __init__(self, config):
+        pass
+
+    @staticmethod
+    def get_email_config_from_env():
+        return None
+
+    def send_email_summary(self, summary, recipient_emails, news_items, on_result=None, **kwargs):
+        results = [DeliveryResult(recipient, success=not self.fail and recipient not in self.refused)
+                   for recipient in recipient_emails]
+        for result in results:
+            if on_result is not None:
+                on_result(result)
+        if not self.fail:
+            FakeEmailHandler.sent.append((recipient_emails, [item.url for item in news_items]))
+        return DeliveryReport(results)
+
+
+def test_daemon_digest_keeps_buffer_until_delivered(collector, monkeypatch):
+    monkeypatch.setattr(email_handler, 'EmailHandler', FakeEmailHandler)
+    monkeypatch.setattr(FakeEmailHandler, 'sent', [])
+    monkeypatch.setattr(collector, 'collect_news_api', lambda hours_back=24, keywords=None: [])
+    overall = {'result': collector.OVERALL_SUMMARY_ERROR}
+    monkeypatch.setattr(collector, 'summarize_overall', lambda summaries, instructions=None: overall['result'])
+    items = [news("OpenAI model launch"), news("machine learning chip")]
+    buffer = {item.url: item for item in items}
+
+    # 全体要約に失敗: 配信せず、記事はバッファに残る
+    delivered, run_id = collector._run_digest(buffer, ["a@example.com"], 24)
+    assert not delivered and run_id is not None
+    assert set(buffer) == {item.url for item in items}
+
+    # 配信に失敗: 同じ実行を再開しても、記事はバッファに残る
+    overall['result'] = "全体要約"
+    monkeypatch.setattr(FakeEmailHandler, 'fail', True)
+    assert collector._run_digest(buffer, ["a@example.com"], 24, run_id) == (False, run_id)
+    assert set(buffer) == {item.url for item in items}
+
+    # 再開して配信できたら処理済みになり、バッファから除かれる
+    monkeypatch.setattr(FakeEmailHandler, 'fail', False)
+    assert collector._run_digest(buffer, ["a@example.com"], 24, run_id) == (True, None)
+    assert buffer == {}
+    assert collector.article_index.filter_new(items) == []
+    assert [sorted(urls) for _, urls in FakeEmailHandler.sent] == [sorted(item.url for item in items)]
+
+
+def test_profile_delivery_failure_keeps_articles_unprocessed(collector, monkeypatch):
+    monkeypatch.setattr(email_handler, 'EmailHandler', FakeEmailHandler)
+    monkeypatch.setattr(FakeEmailHandler, 'refused', {"chips@example.com"})
+    monkeypatch.setattr(collector, 'summarize_overall', lambda summaries, instructions=None: "全体要約")
+    profiles = [TopicProfile(name="robots", filter_keywords=["robot"], recipients=["robots@example.com"]),
+                TopicProfile(name="chips", filter_keywords=["chip"], recipients=["chips@example.com"])]
+    items = [news("robot arm"), news("chip fab"), news("robot chip")]
+    monkeypatch.setattr(collector, '_collect_for_profiles', lambda profiles, hours_back=24: [(None, items)])
+
+    collector.run_profile_collection(profiles)
+
+    # 配信に失敗したプロファイルの記事（両方に属する記事も含む）は次回も対象になる
+    assert [item.title for item in collector.article_index.filter_new(items)] == ["chip fab", "robot chip"]
+
+
+class ScriptedMessages:
+    """個別要約と全体要約の呼び出し回数を数え、fail_overall の間は全体要約を失敗させるメッセージAPI"""
+
+    def __init__(self, fail_overall=False):
+        self.fail_overall = fail_overall
+        self.single_calls = 0
+        self.overall_calls = 0
+
+    def create(self, **kwargs):
+        if kwargs['system'][0]['text'] == AINewsCollector.OVERALL_SUMMARY_INSTRUCTIONS.strip():
+            self.overall_calls += 1
+            if self.fail_overall:
+                raise RuntimeError("overloaded")
+            text = "全体要約"
+        else:
+            self.single_calls += 1
+            text = f"要約 {self.single_calls}"
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text=text)], usage=None)
+
+
+def scripted_collector(monkeypatch, fail_overall=False) -> AINewsCollector:
+    collector = AINewsCollector("test-key")
+    collector.rate_limiter = AdaptiveRateLimiter(1e12, 1e12)
+    collector.client = types.SimpleNamespace(messages=ScriptedMessages(fail_overall))
+    # 要約キャッシュではなくチェックポイントから要約を再利用することを確かめる
+    collector.summary_cache.close()
+    collector.summary_cache = None
+    monkeypatch.setattr(collector, '_print_usage', lambda: None)
+    return collector
+
+
+def test_resume_reuses_summaries_and_skips_delivered_recipients(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(email_handler, 'EmailHandler', FakeEmailHandler)
+    monkeypatch.setattr(FakeEmailHandler, 'sent', [])
+    recipients = ["a@example.com", "b@example.com"]
+    items = [news("OpenAI releases a reasoning model"), news("DeepMind AI robotics research"),
+             news("machine learning chip startup")]
+
+    # 個別要約の後に全体要約が失敗して中断
+    first = scripted_collector(monkeypatch, fail_overall=True)
+    assert first.run_daily_collection(recipients, collected=items) == first.OVERALL_SUMMARY_ERROR
+    assert (first.client.messages.single_calls, first.client.messages.overall_calls) == (len(items), 1)
+    run_id = first.last_run_id
+    assert FakeEmailHandler.sent == []
+
+    # 再開: 保存済みの個別要約を再利用し、全体要約だけを生成する。b への配信は失敗
+    monkeypatch.setattr(FakeEmailHandler, 'refused', {"b@example.com"})
+    second = scripted_collector(monkeypatch)
+    assert second.run_daily_collection(recipients, resume_run_id=run_id) == "全体要約"
+    assert (second.client.messages.single_calls, second.client.messages.overall_calls) == (0, 1)
+    assert [sent for sent, _ in FakeEmailHandler.sent] == [recipients]
+    assert len(second.article_index.filter_new(items)) == len(items)
+
+    # 再度再開: Claudeは呼ばず、送信済みの a には再送しない
+    monkeypatch.setattr(FakeEmailHandler, 'refused', set())
+    third = scripted_collector(monkeypatch)
+    assert third.run_daily_collection(recipients, resume_run_id=run_id) == "全体要約"
+    assert (third.client.messages.single_calls, third.client.messages.overall_calls) == (0, 0)
+    assert [sent for sent, _ in FakeEmailHandler.sent] == [recipients, ["b@example.com"]]
+    assert third.article_index.filter_new(items) == []
+    assert third.checkpoint.is_done(run_id, 'delivered')
@@ -0,0 +1,171 @@
+import os
+import smtplib
+
+import pytest
+
+import email_handler
+from benchmark import SMTPSink
+from email_handler import EmailConfig, EmailHandler
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def template_dir(monkeypatch):
+    monkeypatch.setattr(EmailHandler, 'TEMPLATE_DIR', os.path.join(REPO_DIR, 'templates'))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(email_handler.time, 'sleep', calls.append)
+    return calls
+
+
+class FakeSMTP:
+    """接続数を数え、login・sendmail の結果を差し替えられるSMTPクライアント"""
+
+    connections = 0
+    login_error = None
+    refused = {}
+    connect_errors = []  # 接続ごとに先頭から取り出して送出する例外（Noneは成功）
+    send_errors = []  # sendmail ごとに先頭から取り出して送出する例外（Noneは成功）
+    closed = 0
+
+    def __init__(self, host, port, timeout=None):
+        type(self).connections += 1
+        if self.connect_errors:
+            error = self.connect_errors.pop(0)
+            if error is not None:
+                raise error
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        if self.login_error is not None:
+            raise self.login_error
+
+    def sendmail(self, sender, recipients, message):
+        if self.send_errors:
+            error = self.send_errors.pop(0)
+            if error is not None:
+                raise error
+        return {recipient: reason for recipient, reason in self.refused.items() if recipient in recipients}
+
+    def quit(self):
+        pass
+
+    def close(self):
+        type(self).closed += 1
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    class SMTP(FakeSMTP):
+        connections = 0
+        login_error = None
+        refused = {}
+        connect_errors = []
+        send_errors = []
+        closed = 0
+
+    monkeypatch.setattr(email_handler.smtplib, 'SMTP', SMTP)
+    return SMTP
+
+
+def config(**kwargs) -> EmailConfig:
+    values = dict(smtp_server='127.0.0.1', smtp_port=25, sender_email='sender@example.com',
+                  sender_password='', use_starttls=False)
+    values.update(kwargs)
+    return EmailConfig(**values)
+
+
+def test_encoded_message_uses_crlf_line_endings():
+    message = EmailHandler._encode_message("<p>日本語の本文</p>\n" * 100, 'sender@example.com', 'テスト')
+
+    assert b'\r\n' in message
+    assert message.count(b'\n') == message.count(b'\r\n')
+
+
+def test_strict_smtp_server_accepts_messages():
+    sink = SMTPSink()
+    sink.start()
+    try:
+        recipients = [f"reader{i}@example.com" for i in range(3)]
+        report = EmailHandler(config(smtp_port=sink.port)).send_email_summary("# 要約", recipients, [])
+    finally:
+        sink.stop()
+
+    assert report.success_count == 3
+    assert sink.messages == 3
+    assert sink.rejected == 0
+
+
+def test_authentication_failure_aborts_whole_send(fake_smtp, sleeps):
+    fake_smtp.login_error = smtplib.SMTPAuthenticationError(535, b'bad credentials')
+    recipients = [f"reader{i}@example.com" for i in range(5)]
+
+    report = EmailHandler(config(sender_password='wrong', max_connections=1)).send_email_summary(
+        "# 要約", recipients, []
+    )
+
+    assert fake_smtp.connections == 1
+    assert fake_smtp.closed == 1  # 認証に失敗した接続は閉じる
+    assert report.failed_recipients == recipients
+    assert sleeps == []
+
+
+def test_unreachable_server_aborts_after_initial_failures(monkeypatch, sleeps):
+    attempts = []
+
+    def refuse_connection(host, port, timeout=None):
+        attempts.append(host)
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(email_handler.smtplib, 'SMTP', refuse_connection)
+    recipients = [f"reader{i}@example.com" for i in range(4)]
+
+    report = EmailHandler(config(max_connections=2)).send_email_summary("# 要約", recipients, [])
+
+    # 一度も接続できないまま MAX_INITIAL_CONNECT_FAILURES 回失敗したら、残りの宛先は試さない
+    assert len(attempts) == email_handler.SMTPConnectionPool.MAX_INITIAL_CONNECT_FAILURES
+    assert report.failed_recipients == recipients
+
+
+def test_transient_connect_failure_is_retried(fake_smtp, sleeps):
+    # 最初の接続がタイムアウトしても、次の試行で接続できれば全員に届く
+    fake_smtp.connect_errors = [TimeoutError("timed out")]
+    recipients = [f"reader{i}@example.com" for i in range(4)]
+
+    report = EmailHandler(config(max_connections=1)).send_email_summary("# 要約", recipients, [])
+
+    assert report.failed_recipients == []
+    assert report.success_count == 4
+
+
+def test_reconnect_failure_after_disconnect_does_not_abort(fake_smtp, sleeps):
+    # 送信中に切断され、再接続も1回失敗する（接続済みなので中止しない）
+    fake_smtp.send_errors = [None, smtplib.SMTPServerDisconnected("lost")]
+    fake_smtp.connect_errors = [None, ConnectionRefusedError("refused"), None]
+    recipients = [f"reader{i}@example.com" for i in range(4)]
+
+    report = EmailHandler(config(max_connections=1)).send_email_summary("# 要約", recipients, [])
+
+    assert report.failed_recipients == []
+    assert fake_smtp.connections == 3
+    assert len(sleeps) == 2
+
+
+def test_partial_refusal_in_bcc_batch_fails_only_refused_recipients(fake_smtp):
+    fake_smtp.refused = {'b@example.com': (550, b'no such user')}
+    recipients = ['a@example.com', 'b@example.com', 'c@example.com']
+    delivered = []
+
+    report = EmailHandler(config(bcc_batch_size=10)).send_email_summary(
+        "# 要約", recipients, [],
+        on_result=lambda result: result.success and delivered.append(result.recipient)
+    )
+
+    assert report.failed_recipients == ['b@example.com']
+    assert delivered == ['a@example.com', 'c@example.com']
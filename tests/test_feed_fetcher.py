@@ -0,0 +1,106 @@
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from feed_fetcher import FeedFetcher
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Example</title>
+<item><title>OpenAI releases a new model</title><link>https://example.com/a</link>
+<pubDate>Sat, 17 Oct 2026 07:00:00 GMT</pubDate><description>AI news</description></item>
+</channel></rss>
+"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """パスごとに正常・gzip圧縮・低速・停止・途中切断のフィードを返す"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        if self.path == '/slow':
+            # 1バイトずつ送り続ける（ソケットのタイムアウトには掛からない）
+            self.send_header('Content-Length', str(len(RSS) * 100))
+            self.end_headers()
+            try:
+                for byte in (RSS * 100)[:200]:
+                    self.wfile.write(bytes([byte]))
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except OSError:
+                pass
+        elif self.path == '/stall':
+            self.send_header('Content-Length', str(len(RSS)))
+            self.end_headers()
+            self.wfile.write(RSS[:50])
+            self.wfile.flush()
+            time.sleep(5)
+        elif self.path == '/broken':
+            # Content-Length より短いところで接続を切る
+            self.send_header('Content-Length', str(len(RSS) + 1000))
+            self.end_headers()
+            self.wfile.write(RSS[:100])
+            self.wfile.flush()
+            self.close_connection = True
+        elif self.path == '/gzip':
+            body = gzip.compress(RSS)
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_header('Content-Length', str(len(RSS)))
+            self.end_headers()
+            self.wfile.write(RSS)
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    return FeedFetcher(max_workers=4, connect_timeout=0.5, read_timeout=1)
+
+
+@pytest.mark.parametrize("path", ['/ok', '/gzip'])
+def test_ok_feed(server, fetcher, path):
+    result = fetcher.fetch_one(f"{server}{path}")
+    assert result.ok
+    assert [entry.title for entry in result.feed.entries] == ["OpenAI releases a new model"]
+
+
+def test_slow_drip_feed_hits_deadline(server, fetcher):
+    result = fetcher.fetch_one(f"{server}/slow")
+    assert not result.ok
+    # 締め切り（接続 0.5秒 + 読み込み 1秒）から大きく遅れずに打ち切る
+    assert result.elapsed < 2.5
+
+
+@pytest.mark.parametrize("path", ['/stall', '/broken'])
+def test_stalled_or_broken_feed_fails(server, fetcher, path):
+    result = fetcher.fetch_one(f"{server}{path}")
+    assert not result.ok and result.error
+    assert result.elapsed < 2.5
+
+
+def test_fetch_all_isolates_bad_feeds(server, fetcher):
+    paths = ['/ok', '/slow', '/stall', '/broken']
+    start = time.monotonic()
+    results = fetcher.fetch_all([f"{server}{path}" for path in paths])
+    assert [result.ok for result in results] == [True, False, False, False]
+    # 並列に取得するため、全体でも1フィード分の締め切り程度で終わる
+    assert time.monotonic() - start < 3
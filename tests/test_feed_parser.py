@@ -0,0 +1,122 @@
+import types
+from datetime import datetime
+
+import pytest
+
+from feed_fetcher import FeedFetcher
+from feed_parser import FeedFormatError, StreamingFeedParser, parse_feed_date, parse_with_feedparser
+
+
+def rss(items: str) -> bytes:
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Example</title>{items}</channel></rss>
+""".encode()
+
+
+def item(title: str, date=None) -> str:
+    pub_date = f"<pubDate>{date:%a, %d %b %Y %H:%M:%S} GMT</pubDate>" if date else ""
+    return f"<item><title>{title}</title><link>https://example.com/{title}</link>{pub_date}</item>"
+
+
+def parse(data: bytes, cutoff=None, chunk_size=64):
+    """チャンクに分けて流し込み、打ち切られるまでに渡したバイト数と結果を返す"""
+    parser = StreamingFeedParser(cutoff)
+    consumed = 0
+    for start in range(0, len(data), chunk_size):
+        consumed += len(data[start:start + chunk_size])
+        if parser.feed(data[start:start + chunk_size]):
+            break
+    return parser.close(), consumed
+
+
+CUTOFF = datetime(2026, 10, 17)
+
+
+@pytest.mark.parametrize("text", [
+    "Sat, 17 Oct 2026 09:00:00 +0900",
+    "Fri, 16 Oct 2026 19:00:00 -0500",
+    "2026-10-17T09:00:00+09:00",
+    "2026-10-17T00:00:00Z",
+    "2026-10-17T00:00:00",
+])
+def test_dates_are_normalised_to_naive_utc(text):
+    assert parse_feed_date(text) == datetime(2026, 10, 17)
+
+
+@pytest.mark.parametrize("text", [None, "", "not a date"])
+def test_unparseable_dates_are_none(text):
+    assert parse_feed_date(text) is None
+
+
+def test_sorted_feed_stops_after_old_entries():
+    new = [item(f"new{i}", datetime(2026, 10, 17, 12 - i)) for i in range(3)]
+    old = [item(f"old{i}", datetime(2026, 10, 16, 23 - i)) for i in range(20)]
+    data = rss(''.join(new + old))
+
+    feed, consumed = parse(data, CUTOFF)
+
+    assert [entry.title for entry in feed.entries] == ["new0", "new1", "new2"]
+    assert feed.truncated
+    # 締め切りより古い記事が EARLY_STOP_AFTER 件続いた時点で、残りは読まない
+    assert consumed < len(data)
+    assert StreamingFeedParser.EARLY_STOP_AFTER < len(old)
+
+
+def test_unsorted_feed_is_read_to_the_end():
+    old = [item(f"old{i}", datetime(2026, 10, 16, 12 - i)) for i in range(10)]
+    # 一度でも日付が逆順になったフィードは、古い記事が続いても打ち切らない
+    entries = [item("new0", datetime(2026, 10, 17, 1)), item("new1", datetime(2026, 10, 17, 5))]
+    data = rss(''.join(entries + old + [item("late", datetime(2026, 10, 17, 3))]))
+
+    feed, consumed = parse(data, CUTOFF)
+
+    assert [entry.title for entry in feed.entries] == ["new0", "new1", "late"]
+    assert not feed.truncated
+    assert consumed == len(data)
+
+
+def test_undated_entries_are_kept():
+    old = [item(f"old{i}", datetime(2026, 10, 16, 12 - i)) for i in range(3)]
+    data = rss(item("undated") + ''.join(old) + item("undated2"))
+
+    feed, _ = parse(data, CUTOFF)
+
+    assert [(entry.title, entry.published) for entry in feed.entries] == [("undated", None), ("undated2", None)]
+
+
+def test_atom_dates_with_offset():
+    data = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Atom</title>
+<entry><title>atom</title><link href="https://example.com/atom"/>
+<published>2026-10-17T18:00:00+09:00</published><summary>AI</summary></entry>
+</feed>
+"""
+    feed, _ = parse(data)
+    assert [(entry.link, entry.published) for entry in feed.entries] == \
+        [("https://example.com/atom", datetime(2026, 10, 17, 9))]
+
+
+UNDEFINED_ENTITY = rss(item("AI&nbsp;news", datetime(2026, 10, 17, 9)))
+
+
+def test_undefined_entity_is_format_error():
+    with pytest.raises(FeedFormatError):
+        parse(UNDEFINED_ENTITY)
+
+
+def test_fetcher_falls_back_to_feedparser(monkeypatch):
+    fetcher = FeedFetcher(max_workers=1)
+
+    def download(url, headers, parser):
+        parser.feed(UNDEFINED_ENTITY)
+        return types.SimpleNamespace(status_code=200, headers={'Content-Type': 'application/rss+xml'},
+                                     content=UNDEFINED_ENTITY)
+    monkeypatch.setattr(fetcher, '_download', download)
+
+    result = fetcher.fetch_one("https://example.com/feed", CUTOFF)
+
+    assert result.ok, result.error
+    assert result.feed.parser == "feedparser"
+    assert [(entry.title, entry.published) for entry in result.feed.entries] == \
+        [("AI\xa0news", datetime(2026, 10, 17, 9))]
+    assert parse_with_feedparser(UNDEFINED_ENTITY, cutoff=datetime(2026, 10, 18)).entries == []
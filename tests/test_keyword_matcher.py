@@ -0,0 +1,45 @@
+import pytest
+
+from ai_news_collector import AINewsCollector
+from keyword_matcher import KeywordMatcher
+
+matcher = KeywordMatcher(AINewsCollector.AI_FILTER_KEYWORDS)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("New LLMs beat benchmarks", ['LLM']),
+    ("Training neural networks faster", ['neural network']),
+    ("Open large language models", ['large language model']),
+    ("Autonomously driving cars", ['autonomous']),
+    ("Regulators weigh rules for AIs", ['AI']),
+    ("Generative AI startups raise funds", ['AI', 'generative AI']),
+    ("OpenAI's new model", ['OpenAI']),
+])
+def test_plural_and_derived_forms_match(text, expected):
+    assert matcher.matched_keywords(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "The CEO said revenue grew",  # said
+    "Retail earnings beat estimates",  # retail
+    "Airline aims to cut fuel costs",  # aim・air
+    "Officials maintain the policy",  # maintain
+])
+def test_in_word_matches_are_rejected(text):
+    assert matcher.matched_keywords(text) == []
+    assert not matcher.matches(text)
+
+
+def test_title_and_content_do_not_join():
+    # タイトル末尾と本文先頭をまたいで一致しない
+    assert KeywordMatcher(['open AI']).matched_keywords("Open", "AI news") == []
+
+
+def test_count_columns_agrees_with_matched_keywords():
+    texts = ["LLMs and more LLM news", "said nothing", "neural networks, neural network", ""]
+    columns = matcher.count_columns(texts)
+    for index, text in enumerate(texts):
+        matched = {keyword for keyword, column in zip(matcher.keywords, columns) if index in column}
+        assert matched == set(matcher.matched_keywords(text))
+    assert columns[matcher.keywords.index('LLM')] == {0: 2}
+
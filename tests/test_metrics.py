@@ -0,0 +1,28 @@
+import re
+import types
+
+from metrics import RunMetrics
+
+
+def test_prometheus_types_match_names():
+    metrics = RunMetrics()
+    with metrics.stage('collect_rss'):
+        pass
+    metrics.set_count('collected', 10)
+    metrics.record_feed("https://example.com/feed", 0.1, 1000, True)
+    usage = types.SimpleNamespace(input_tokens=100, output_tokens=20)
+    metrics.record_claude_call("summarize_single", 0.5, usage)
+    metrics.record_email(3, 1, 0.2)
+    metrics.set_cache_stats('summary', {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    text = metrics.to_prometheus()
+    types_by_name = dict(re.findall(r"^# TYPE (\S+) (\S+)$", text, re.MULTILINE))
+    assert "ai_news_claude_tokens" in types_by_name and "ai_news_emails_sent" in types_by_name
+    # 実行ごとに数え直す値は gauge で、_total は単調増加の counter にだけ付ける
+    for name, metric_type in types_by_name.items():
+        assert name.endswith("_total") == (metric_type == "counter"), name
+    # 全サンプルの名前が HELP/TYPE で宣言されている
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            assert re.match(r"[a-z_]+", line).group(0) in types_by_name, line
+    assert 'ai_news_claude_tokens{call="summarize_single",type="input_tokens"} 100' in text
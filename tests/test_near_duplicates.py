@@ -0,0 +1,39 @@
+from near_duplicates import IncrementalNearDuplicateIndex, NearDuplicateClusterer
+
+
+def test_unrelated_japanese_articles_are_not_merged():
+    texts = [
+        "OpenAIがGPT-5を発表、推論性能が大幅に向上",
+        "エヌビディアの決算が市場予想を上回る",
+        "ソニーがロボット事業を強化、新会社を設立",
+    ]
+
+    assert sorted(NearDuplicateClusterer().cluster(texts)) == [[0], [1], [2]]
+
+
+def test_japanese_near_duplicates_are_merged():
+    texts = [
+        "エヌビディアの決算が市場予想を上回る。データセンター向けGPUの売上高が前年同期比で大きく伸びた。",
+        "ソニーがロボット事業を強化、新会社を設立",
+        "【速報】エヌビディアの決算が市場予想を上回る。データセンター向けGPUの売上高が前年同期比で大きく伸びた。",
+    ]
+
+    assert sorted(NearDuplicateClusterer().cluster(texts)) == [[0, 2], [1]]
+
+
+def test_texts_without_tokens_are_never_clustered():
+    clusterer = NearDuplicateClusterer()
+    texts = ["", "!!!", "", "？！"]
+
+    assert clusterer.signature("") is None
+    assert sorted(clusterer.cluster(texts)) == [[0], [1], [2], [3]]
+
+    index = IncrementalNearDuplicateIndex(clusterer)
+    assert [index.find_or_add(i, text) for i, text in enumerate(texts)] == [None, None, None, None]
+
+
+def test_english_near_duplicates_are_merged():
+    body = "Nvidia unveils a new data center chip that promises faster training for large language models"
+    texts = [body, "Sony expands its robotics research lab in Tokyo", body + " - report"]
+
+    assert sorted(NearDuplicateClusterer().cluster(texts)) == [[0, 2], [1]]
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from profiles import NEWS_API_SOURCE, ProfileMatcher, load_profiles
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles.example.json")
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return ProfileMatcher(load_profiles(EXAMPLE_PATH))
+
+
+@pytest.mark.parametrize("text, profile", [
+    ("Chipmakers ramp up HBM supply", "semiconductors"),
+    ("New chips from the foundry", "semiconductors"),
+    ("Cloud providers buy more GPUs", "semiconductors"),
+    ("Robots learn to fold laundry", "robotics"),
+    ("Humanoids enter car factories", "robotics"),
+    ("Open large language models catch up", "ai"),
+    ("New LLMs beat benchmarks", "ai"),
+])
+def test_example_profiles_match_plural_and_derived_forms(matcher, text, profile):
+    assert profile in matcher.match(None, text)
+
+
+def test_example_profiles_ignore_in_word_matches(matcher):
+    assert matcher.match(None, "Retail chain said it will maintain prices") == {}
+
+
+def test_news_api_articles_only_go_to_profiles_with_keywords(matcher):
+    # news_api_keywords が空のロボティクスには NewsAPI の記事を配らない
+    assert set(matcher.match(NEWS_API_SOURCE, "Robots powered by AI chips")) == {"ai", "semiconductors"}
@@ -0,0 +1,29 @@
+import pytest
+
+from prompt_budget import strip_markup
+
+
+def test_read_more_mid_sentence_is_kept():
+    text = ('<p>OpenAI said developers can read more about the API in its docs. '
+            'The model costs $5 per million tokens and ships today.</p>')
+    assert strip_markup(text) == ('OpenAI said developers can read more about the API in its docs. '
+                                  'The model costs $5 per million tokens and ships today.')
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('<p>NVIDIA unveiled a new chip. [&#8230;]</p><p><a href="/x">Continue reading &#8594;</a></p>',
+     'NVIDIA unveiled a new chip.'),
+    ('<p>NVIDIA unveiled a new chip […] Read more</p>', 'NVIDIA unveiled a new chip'),
+    ('NVIDIA unveiled a new chip. Read the full story at Example News', 'NVIDIA unveiled a new chip.'),
+    ('<p>NVIDIA unveiled a new chip.</p>\n<p>READ MORE »</p>', 'NVIDIA unveiled a new chip.'),
+    ('<p>NVIDIA unveiled a new chip.</p><p>The post NVIDIA chip appeared first on Example.</p>',
+     'NVIDIA unveiled a new chip.'),
+])
+def test_trailing_boilerplate_is_removed(text, expected):
+    assert strip_markup(text) == expected
+
+
+def test_read_more_followed_by_long_text_is_kept():
+    # 末尾の短い誘導文ではない（後ろに本文が続く）
+    text = "Read more: the company also plans " + "a long rollout across many regions " * 5
+    assert strip_markup(text).startswith("Read more: the company also plans")
@@ -0,0 +1,51 @@
+import types
+from datetime import datetime
+
+from ai_news_collector import AINewsCollector, NewsItem
+from rate_limiter import AdaptiveRateLimiter
+
+
+class RecordingMessages:
+    """リクエストを記録し、1回目はキャッシュ書き込み・2回目以降はキャッシュ読み込みの使用量を返す"""
+
+    def __init__(self):
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        first = len(self.requests) == 1
+        usage = types.SimpleNamespace(input_tokens=50, output_tokens=30,
+                                      cache_creation_input_tokens=1200 if first else 0,
+                                      cache_read_input_tokens=0 if first else 1200)
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text="要約")], usage=usage)
+
+
+def test_single_summaries_share_a_cacheable_system_block(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    collector = AINewsCollector("test-key")
+    collector.rate_limiter = AdaptiveRateLimiter(1e12, 1e12)
+    messages = RecordingMessages()
+    collector.client = types.SimpleNamespace(messages=messages)
+    items = [NewsItem(title=f"Headline {i}", url=f"https://example.com/{i}", published=datetime(2026, 10, 17),
+                      content=f"Article body number {i}", source="example") for i in range(3)]
+
+    for item in items:
+        collector.summarize_single_news(item)
+
+    systems = [request['system'] for request in messages.requests]
+    # 全記事で同じ system ブロック（固定指示＋cache_control）を送る
+    assert all(system == systems[0] for system in systems)
+    assert systems[0] == [{"type": "text", "text": AINewsCollector.SINGLE_SUMMARY_INSTRUCTIONS.strip(),
+                           "cache_control": {"type": "ephemeral"}}]
+    # 記事ごとに変わる部分は messages にだけ入る
+    for item, request in zip(items, messages.requests):
+        assert item.title not in systems[0][0]['text'] and item.content not in systems[0][0]['text']
+        assert [message['role'] for message in request['messages']] == ["user"]
+        assert item.title in request['messages'][0]['content']
+        assert item.content in request['messages'][0]['content']
+
+    usage = collector.metrics.claude["summarize_single_news"]
+    assert usage['requests'] == 3
+    assert usage['cache_creation_input_tokens'] == 1200
+    assert usage['cache_read_input_tokens'] == 2400
+    assert (usage['input_tokens'], usage['output_tokens']) == (150, 90)
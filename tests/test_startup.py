@@ -0,0 +1,9 @@
+import benchmark
+
+
+def test_startup_within_budget():
+    # 起動時間の予算と、起動時に重い依存を読み込まないことの回帰テスト（benchmark.py --startup と同じ計測）
+    report = benchmark.measure_startup(repeat=3)
+    assert report['forbidden_modules'] == []
+    assert report['seconds'] <= benchmark.STARTUP_BUDGET_SECONDS, \
+        f"起動時間が予算を超えています: {report['seconds'] * 1000:.0f}ms"
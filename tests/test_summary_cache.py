@@ -0,0 +1,79 @@
+import types
+from datetime import datetime
+
+import pytest
+
+from ai_news_collector import AINewsCollector, NewsItem
+from rate_limiter import AdaptiveRateLimiter
+from summary_cache import SummaryCache
+
+
+class CountingMessages:
+    """呼び出し回数を数えるメッセージAPI"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        text = f"要約 {self.calls}"
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text=text)], usage=None)
+
+
+def new_collector() -> AINewsCollector:
+    collector = AINewsCollector("test-key")
+    collector.rate_limiter = AdaptiveRateLimiter(1e12, 1e12)
+    collector.client = types.SimpleNamespace(messages=CountingMessages())
+    return collector
+
+
+@pytest.fixture
+def items(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return [NewsItem(title=f"AI news {i}", url=f"https://example.com/{i}", published=datetime(2026, 10, 17),
+                     content=f"machine learning story {i}", source="example") for i in range(5)]
+
+
+def test_second_run_makes_no_api_calls(items):
+    first = new_collector()
+    summaries = [first.summarize_single_news(item) for item in items]
+    assert first.client.messages.calls == len(items)
+    first.summary_cache.close()
+
+    # 別プロセスの実行と同じく、新しいコレクターがディスク上のキャッシュから読む
+    second = new_collector()
+    assert [second.summarize_single_news(item) for item in items] == summaries
+    assert second.client.messages.calls == 0
+    assert second.summary_cache.stats()['hits'] == len(items)
+
+
+def test_prompt_version_change_misses_cache(items, monkeypatch):
+    first = new_collector()
+    for item in items:
+        first.summarize_single_news(item)
+    first.summary_cache.close()
+
+    monkeypatch.setattr(AINewsCollector, 'SUMMARY_PROMPT_VERSION', "changed")
+    second = new_collector()
+    for item in items:
+        second.summarize_single_news(item)
+    assert second.client.messages.calls == len(items)
+
+
+def test_eviction_removes_least_recently_used_in_batches(tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"), max_entries=100)
+    for i in range(100):
+        cache.put(f"key{i}", f"summary {i}")
+    assert cache.get("key0") == "summary 0"  # 最近使われたエントリは残る
+    cache.put("key100", "summary 100")
+
+    # 上限を超えたら上限の EVICTION_BATCH_RATIO 分の余裕ができるまで削除する
+    keys = {row[0] for row in cache._conn.execute("SELECT key FROM summaries")}
+    assert len(keys) == 100 - int(100 * SummaryCache.EVICTION_BATCH_RATIO)
+    assert {"key0", "key100"} <= keys
+    assert "key1" not in keys
+    # 上書きでは行数は増えない
+    for i in range(90, 101):
+        cache.put(f"key{i}", "updated")
+    assert cache.get("key95") == "updated"
+    assert cache._count == len(keys)